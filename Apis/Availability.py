@@ -0,0 +1,88 @@
+import json
+import asyncio
+from typing import Dict, Iterable, List, Optional, Type, TypeVar
+from pydantic import BaseModel
+from Apis.AvailabilityCache import AvailabilityCache
+
+M = TypeVar('M', bound=BaseModel)
+
+# The hashes are sent comma separated in the query string, 100 SHA1 hashes keep the url well below 8 KB,
+# the common limit of proxies and servers in front of the API.
+CHECKCACHED_BATCH_SIZE = 100
+CHECKCACHED_MAX_CONCURRENCY = 8
+
+
+def normalized_hashes(hashes: Iterable[str]) -> Dict[str, str]:
+    """
+    Map every requested hash, as the caller wrote it, to its normalized form.
+    """
+    return {hash: hash.strip().lower() for hash in hashes if hash and hash.strip()}
+
+
+async def check_cached_many(requests, endpoint: str, hashes: Iterable[str], list_files: bool, model: Type[M],
+                            batch_size: int = CHECKCACHED_BATCH_SIZE,
+                            max_concurrency: int = CHECKCACHED_MAX_CONCURRENCY,
+                            cache: Optional[AvailabilityCache] = None) -> Dict[str, Optional[M]]:
+    """
+    Check the availability of many hashes using as few checkcached calls as possible.
+
+    :param requests: The TorBoxRequests used to send the calls.
+    :param endpoint: The checkcached endpoint, for example "torrents/checkcached".
+    :param hashes: The hashes to check.
+    :param list_files: Whether the API should include the files of the cached items.
+    :param model: The model every cached item is parsed into.
+    :param batch_size: Maximum number of hashes sent in a single call.
+    :param max_concurrency: Maximum number of calls in flight at the same time.
+    :param cache: Optional AvailabilityCache, only the hashes missing from the cache are sent to the API.
+    :return: A dict with every requested hash as it was passed, the value is None when the hash is not cached.
+             Hashes are only lowercased for the calls and the cache.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    requested = normalized_hashes(hashes)
+    hashes = list(dict.fromkeys(requested.values()))
+    results: Dict[str, Optional[M]] = dict.fromkeys(hashes)
+
+    if cache is not None:
+        cached = await cache.get_many(endpoint, hashes, list_files)
+        results.update(cached)
+        hashes = [hash for hash in hashes if hash not in cached]
+
+    fetched: Dict[str, Optional[M]] = dict.fromkeys(hashes)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def parse(content: Optional[bytes]) -> List[M]:
+        if content is None:
+            return []
+        return [model.model_validate(item) for item in json.loads(content).get('data') or []]
+
+    async def check_batch(batch: List[str]):
+        async with semaphore:
+            available_items = await requests.get_request_parsed_async(
+                f"{endpoint}?hash={','.join(batch)}&format=list&list_files={list_files}", True, parse)
+
+        for available in available_items:
+            fetched[available.hash.lower()] = available
+
+    await asyncio.gather(*[check_batch(hashes[i:i + batch_size]) for i in range(0, len(hashes), batch_size)])
+
+    if cache is not None and fetched:
+        await cache.set_many(endpoint, fetched, list_files)
+
+    results.update(fetched)
+
+    return {hash: results[normalized] for hash, normalized in requested.items()}
+
+
+async def check_cached_response(requests, endpoint: str, hash: str, list_files: bool, model: Type[M],
+                                cache: AvailabilityCache) -> str:
+    """
+    Check the availability of a single hash through the cache and return a checkcached response body built from the
+    cached entries, the same body a call without cache returns.
+    """
+    results = await check_cached_many(requests, endpoint, [hash], list_files, model, cache=cache)
+    data = [available.model_dump(mode='json') for available in results.values() if available is not None]
+    return json.dumps({'success': True, 'error': None, 'detail': None, 'data': data})
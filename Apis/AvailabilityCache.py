@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class CacheBackend:
+    """
+    Storage interface used by AvailabilityCache.
+    Implement this to share cached availability between processes, for example in Redis.
+    Values are the parsed availability models, or None for hashes which are not cached.
+    """
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Return the stored value for every key which is present and not expired. Absent keys are left out.
+        """
+        raise NotImplementedError()
+
+    async def set_many(self, items: Iterable[Tuple[str, Any, float]]):
+        """
+        Store (key, value, ttl) items, ttl is in seconds.
+        """
+        raise NotImplementedError()
+
+    async def clear(self):
+        raise NotImplementedError()
+
+    @property
+    def evictions(self) -> int:
+        return 0
+
+    def __len__(self) -> int:
+        return 0
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process backend with a bounded number of entries and least recently used eviction.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        """
+        :param max_entries: Maximum number of entries, the least recently used entry is evicted when full.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._evictions = 0
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        now = time.monotonic()
+        found = {}
+
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                continue
+
+            self._entries.move_to_end(key)
+            found[key] = value
+
+        return found
+
+    async def set_many(self, items: Iterable[Tuple[str, Any, float]]):
+        now = time.monotonic()
+
+        for key, value, ttl in items:
+            self._entries[key] = (now + ttl, value)
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    async def clear(self):
+        self._entries.clear()
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AvailabilityCache:
+    """
+    Caches checkcached results per hash, with separate TTLs for cached and not cached hashes.
+    A single instance is shared by the torrents and usenet Apis of a client and all of its tenants.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, max_entries: int = 100_000,
+                 cached_ttl: float = 3600.0, not_cached_ttl: float = 300.0):
+        """
+        :param backend: Optional CacheBackend, defaults to a MemoryCacheBackend.
+        :param max_entries: Maximum number of entries of the default MemoryCacheBackend.
+        :param cached_ttl: Seconds a hash which is cached on TorBox is remembered.
+        :param not_cached_ttl: Seconds a hash which is not cached on TorBox is remembered.
+        """
+        self.backend = backend or MemoryCacheBackend(max_entries)
+        self.cached_ttl = cached_ttl
+        self.not_cached_ttl = not_cached_ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(endpoint: str, hash: str, list_files: bool) -> str:
+        return f"{endpoint}:{hash}:{int(list_files)}"
+
+    async def get_many(self, endpoint: str, hashes: List[str], list_files: bool) -> Dict[str, Any]:
+        """
+        Return the cached result for every hash found in the cache, values may be None for negative entries.
+        """
+        keys = {self.key(endpoint, hash, list_files): hash for hash in hashes}
+        found = await self.backend.get_many(list(keys))
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        return {keys[key]: value for key, value in found.items()}
+
+    async def set_many(self, endpoint: str, results: Dict[str, Any], list_files: bool):
+        await self.backend.set_many(
+            (self.key(endpoint, hash, list_files), value, self.cached_ttl if value is not None else self.not_cached_ttl)
+            for hash, value in results.items())
+
+    async def clear(self):
+        await self.backend.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'size': len(self.backend)
+        }
@@ -0,0 +1,162 @@
+import asyncio
+import inspect
+import threading
+import concurrent.futures
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+async def _await(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+class BackgroundLoop:
+    """
+    An event loop running on a daemon thread, started on first use. Coroutines submitted from any thread run on
+    this loop, so the clients and connection pools bound to it are reused by every call instead of being created
+    per call like with asyncio.run. Submitting is thread-safe.
+    """
+
+    def __init__(self, name: str = "torbox-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self.running:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(loop, started), name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+            return loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, started: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            # Cancel what is still running so it can clean up before the loop is closed.
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def stop(self):
+        """
+        Stop the loop and wait for its thread, the loop is started again by the next call.
+        """
+        with self._lock:
+            if not self.running:
+                return
+            if threading.current_thread() is self._thread:
+                raise RuntimeError("The background loop cannot be stopped from its own thread")
+
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+            self._loop = None
+
+    def submit(self, awaitable: Awaitable[T]) -> 'concurrent.futures.Future[T]':
+        """
+        Schedule an awaitable on the loop and return a concurrent.futures.Future of its result.
+        """
+        coroutine = awaitable if inspect.iscoroutine(awaitable) else _await(awaitable)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.start())
+
+    def run(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run an awaitable on the loop and block until its result.
+
+        :param timeout: Optional seconds after which the call is cancelled and concurrent.futures.TimeoutError
+                        is raised.
+        """
+        if self.running and threading.current_thread() is self._thread:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise RuntimeError("Blocking calls cannot be made from the background loop, await the coroutine instead")
+
+        future = self.submit(awaitable)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Also cancels the call when the waiting thread is interrupted, for example by KeyboardInterrupt.
+            future.cancel()
+            raise
+
+    def run_many(self, awaitables: Iterable[Awaitable[Any]], return_exceptions: bool = False,
+                 timeout: Optional[float] = None) -> List[Any]:
+        """
+        Run awaitables concurrently on the loop and return their results in order.
+
+        :param return_exceptions: Return the errors in the results instead of raising the first one.
+        """
+        awaitables = list(awaitables)
+
+        async def gather() -> List[Any]:
+            return await asyncio.gather(*awaitables, return_exceptions=return_exceptions)
+
+        return self.run(gather(), timeout)
+
+    def iterate(self, iterator: AsyncIterator[T]) -> Iterator[T]:
+        """
+        Iterate an async iterator from a blocking thread, every item is fetched on the loop.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if hasattr(iterator, 'aclose') and self.running:
+                self.run(iterator.aclose())
+
+
+class SyncApi:
+    """
+    Blocking view of an Api. Every *_async method is available without its suffix and runs on the BackgroundLoop,
+    methods returning async iterators return blocking iterators. Other attributes are the ones of the Api.
+    """
+
+    def __init__(self, api: Any, background: BackgroundLoop):
+        self._api = api
+        self._background = background
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        method = getattr(self._api, f"{name}_async", None)
+        if method is None:
+            return getattr(self._api, name)
+
+        @wraps(method)
+        def call(*args, **kwargs):
+            result = method(*args, **kwargs)
+            if inspect.isawaitable(result):
+                return self._background.run(result)
+            if hasattr(result, '__anext__'):
+                return self._background.iterate(result)
+            return result
+
+        return call
+
+    def __dir__(self) -> List[str]:
+        names = set(dir(self._api))
+        return sorted(names | {name[:-len('_async')] for name in names if name.endswith('_async')})
@@ -0,0 +1,98 @@
+from typing import Any, Tuple
+
+
+def decode_value(data: bytes, pos: int = 0) -> Tuple[Any, int]:
+    """
+    Decode the bencoded value starting at pos and return it with the position right after it.
+    Byte strings are returned as bytes, dictionaries keep their keys as bytes.
+    """
+    index = data.index
+    length = len(data)
+
+    def string_end(pos: int) -> Tuple[int, int]:
+        # The length prefix must be plain ASCII digits, int() would also take a sign, spaces or underscores
+        # and a negative length would move the position backwards.
+        colon = index(b':', pos)
+        size = data[pos:colon]
+        if not size.isdigit():
+            raise ValueError(f"Invalid byte string length at position {pos}")
+        end = colon + 1 + int(size)
+        if end > length:
+            raise ValueError("Unexpected end of bencoded data")
+        return colon + 1, end
+
+    def decode(pos: int) -> Tuple[Any, int]:
+        kind = data[pos]
+
+        if kind < 0x3a:  # 0-9, a byte string prefixed with its length
+            start, end = string_end(pos)
+            return data[start:end], end
+
+        if kind == 0x69:  # i
+            end = index(b'e', pos)
+            number = data[pos + 1:end]
+            # Like a byte string length, only ASCII digits with an optional minus sign.
+            if not (number[1:] if number[:1] == b'-' else number).isdigit():
+                raise ValueError(f"Invalid integer at position {pos}")
+            return int(number), end + 1
+
+        if kind == 0x6c:  # l
+            items = []
+            append = items.append
+            pos += 1
+            while True:
+                kind = data[pos]
+                if kind == 0x65:  # e
+                    return items, pos + 1
+                if kind < 0x3a:
+                    # Byte strings are decoded inline, they are most of the values of a torrent.
+                    start, pos = string_end(pos)
+                    append(data[start:pos])
+                else:
+                    item, pos = decode(pos)
+                    append(item)
+
+        if kind == 0x64:  # d
+            items = {}
+            pos += 1
+            while True:
+                kind = data[pos]
+                if kind == 0x65:
+                    return items, pos + 1
+                if not 0x30 <= kind <= 0x39:
+                    raise ValueError("Dictionary keys must be byte strings")
+                start, pos = string_end(pos)
+                key = data[start:pos]
+                if data[pos] < 0x3a:
+                    start, pos = string_end(pos)
+                    items[key] = data[start:pos]
+                else:
+                    items[key], pos = decode(pos)
+
+        raise ValueError(f"Invalid bencoded value at position {pos}")
+
+    try:
+        value, end = decode(pos)
+    except IndexError:
+        raise ValueError("Unexpected end of bencoded data") from None
+    except RecursionError:
+        raise ValueError("Bencoded data is nested too deeply") from None
+    except ValueError as ex:
+        raise ValueError(f"Invalid bencoded data: {ex}") from None
+
+    if end > length:
+        raise ValueError("Unexpected end of bencoded data")
+
+    return value, end
+
+
+def bdecode(data: bytes) -> Any:
+    """
+    Decode bencoded data, for example the content of a .torrent file.
+    """
+    value, end = decode_value(data)
+
+    if end != len(data):
+        raise ValueError("Trailing data after the bencoded value")
+
+    return value
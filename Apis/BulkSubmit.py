@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional, Set, Union
+
+BULK_MAX_CONCURRENCY = 8
+
+_DONE = object()
+
+
+class BulkResult:
+    """
+    Outcome of a single item of a bulk submission.
+
+    :ivar item: The submitted magnet, link or file content.
+    :ivar key: The info-hash or link identifying the item, None when it cannot be derived locally.
+    :ivar result: The add result returned by TorBox, None when the item failed or was skipped.
+    :ivar error: The exception raised while adding the item, usually a TorBoxException.
+    :ivar skipped: The item was not submitted, because it was a duplicate or already in the account.
+    """
+
+    def __init__(self, item: Any, key: Optional[str], result: Any = None, error: Optional[Exception] = None,
+                 skipped: bool = False):
+        self.item = item
+        self.key = key
+        self.result = result
+        self.error = error
+        self.skipped = skipped
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self) -> str:
+        if self.skipped:
+            state = "skipped"
+        elif self.error is not None:
+            state = f"error={self.error!r}"
+        else:
+            state = f"result={self.result!r}"
+        return f"BulkResult(key={self.key!r}, {state})"
+
+
+class _ProducerError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def content_key(item: Union[str, bytes]) -> str:
+    """
+    Key used to drop duplicates of items whose info-hash cannot be derived locally.
+    """
+    data = item.encode('utf-8') if isinstance(item, str) else item
+    return f"sha1:{hashlib.sha1(data).hexdigest()}"
+
+
+async def _iterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def submit_many(items: Union[Iterable[Any], AsyncIterable[Any]],
+                      submit: Callable[[Any], Awaitable[Any]],
+                      item_key: Callable[[Any], Optional[str]],
+                      load_existing: Optional[Callable[[], Awaitable[Set[str]]]] = None,
+                      max_concurrency: int = BULK_MAX_CONCURRENCY) -> AsyncIterator[BulkResult]:
+    """
+    Submit items with bounded concurrency and yield a BulkResult per item as soon as it completes.
+
+    Items are read lazily from the (async) iterable, so a large backlog is never loaded at once. Items with the same
+    key are submitted once, items whose key is returned by load_existing are not submitted at all. Results are
+    yielded in completion order. Closing the iterator cancels the submissions in flight.
+
+    :param items: The items to submit.
+    :param submit: Coroutine function adding a single item and returning its result.
+    :param item_key: Function returning the key, usually the info-hash, of an item or None when it is unknown.
+    :param load_existing: Optional coroutine function returning the keys already present in the account.
+    :param max_concurrency: Maximum number of submissions in flight.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    existing = await load_existing() if load_existing is not None else set()
+    pending = asyncio.Queue(maxsize=max_concurrency)
+    results = asyncio.Queue(maxsize=max_concurrency)
+
+    async def produce():
+        seen = set()
+        try:
+            async for item in _iterate(items):
+                key = item_key(item)
+                dedupe_key = key if key is not None else content_key(item)
+
+                if dedupe_key in seen or (key is not None and key in existing):
+                    await results.put(BulkResult(item, key, skipped=True))
+                    continue
+
+                seen.add(dedupe_key)
+                await pending.put((item, key))
+        except Exception as ex:
+            await results.put(_ProducerError(ex))
+        finally:
+            for _ in range(max_concurrency):
+                await pending.put(_DONE)
+
+    async def work():
+        while True:
+            entry = await pending.get()
+            if entry is _DONE:
+                await results.put(_DONE)
+                return
+
+            item, key = entry
+            try:
+                result = BulkResult(item, key, await submit(item))
+            except Exception as ex:
+                result = BulkResult(item, key, error=ex)
+            await results.put(result)
+
+    tasks = [asyncio.ensure_future(produce()), *(asyncio.ensure_future(work()) for _ in range(max_concurrency))]
+    try:
+        finished = 0
+        while finished < max_concurrency:
+            result = await results.get()
+            if result is _DONE:
+                finished += 1
+            elif isinstance(result, _ProducerError):
+                raise result.error
+            else:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,138 @@
+import time
+from typing import Callable, Dict, Iterable, Optional
+from Exceptions import CircuitOpen, TorBoxException
+from Models import CircuitState
+
+# Errors telling the TorBox side is failing, as opposed to errors caused by the request.
+CIRCUIT_FAILURE_CODES = ("NO_SERVERS_AVAILABLE_ERROR", "DOWNLOAD_SERVER_ERROR", "DATABASE_ERROR")
+
+
+class Circuit:
+    """
+    State of the circuit of a single endpoint family.
+    """
+
+    def __init__(self):
+        self.state = CircuitState.Closed
+        self.failures = 0
+        self.successes = 0
+        self.trial_calls = 0
+        self.opened_at = 0.0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with a circuit per endpoint family.
+
+    A circuit opens after failure_threshold consecutive failures, then every request of that family fails fast with
+    CircuitOpen instead of being sent and retried. After recovery_timeout seconds the circuit is half-open and lets
+    half_open_max_calls trial requests through, success_threshold successes close it again and a failure opens it.
+    Connection errors, timeouts, 5xx responses and the errors in failure_codes count as failures, any other response
+    shows the endpoint is up.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1,
+                 success_threshold: int = 1, failure_codes: Iterable[str] = CIRCUIT_FAILURE_CODES,
+                 on_state_change: Optional[Callable[[str, CircuitState, CircuitState], None]] = None):
+        """
+        :param failure_threshold: Consecutive failures opening the circuit.
+        :param recovery_timeout: Seconds the circuit stays open before trial requests are allowed.
+        :param half_open_max_calls: Trial requests in flight at the same time while half-open.
+        :param success_threshold: Successful trial requests closing the circuit.
+        :param failure_codes: TorBox error codes counted as failures.
+        :param on_state_change: Optional callback receiving the endpoint family, the old and the new state.
+        """
+        if failure_threshold < 1 or half_open_max_calls < 1 or success_threshold < 1:
+            raise ValueError("thresholds must be at least 1")
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.failure_codes = frozenset(failure_codes)
+        self.on_state_change = on_state_change
+        self.circuits: Dict[str, Circuit] = {}
+
+    def _circuit(self, family: str) -> Circuit:
+        circuit = self.circuits.get(family)
+        if circuit is None:
+            circuit = self.circuits[family] = Circuit()
+        return circuit
+
+    def state(self, family: str) -> CircuitState:
+        circuit = self._circuit(family)
+        self._check_recovery(family, circuit)
+        return circuit.state
+
+    def before_call(self, family: str):
+        """
+        Raise CircuitOpen when a request of the endpoint family may not be sent now.
+        """
+        circuit = self._circuit(family)
+        self._check_recovery(family, circuit)
+
+        if circuit.state == CircuitState.Open:
+            raise CircuitOpen(family, circuit.opened_at + self.recovery_timeout - time.monotonic())
+
+        if circuit.state == CircuitState.HalfOpen:
+            if circuit.trial_calls >= self.half_open_max_calls:
+                raise CircuitOpen(family, 0.0)
+            circuit.trial_calls += 1
+
+    def record(self, family: str, error: Optional[Exception] = None, status_code: Optional[int] = None):
+        """
+        Record the outcome of a request allowed by before_call.
+
+        :param error: The error raised by the request, None when it succeeded.
+        :param status_code: The HTTP status of the response, None when no response was received.
+        """
+        circuit = self._circuit(family)
+
+        if error is not None and self.is_failure(error, status_code):
+            if circuit.state == CircuitState.HalfOpen:
+                self._open(family, circuit)
+            elif circuit.state == CircuitState.Closed:
+                circuit.failures += 1
+                if circuit.failures >= self.failure_threshold:
+                    self._open(family, circuit)
+            return
+
+        if circuit.state == CircuitState.HalfOpen:
+            circuit.trial_calls = max(circuit.trial_calls - 1, 0)
+            circuit.successes += 1
+            if circuit.successes >= self.success_threshold:
+                self._set_state(family, circuit, CircuitState.Closed)
+        else:
+            circuit.failures = 0
+
+    def release(self, family: str):
+        """
+        Give back the slot of a trial request which was cancelled before it had an outcome.
+        """
+        circuit = self._circuit(family)
+        if circuit.state == CircuitState.HalfOpen:
+            circuit.trial_calls = max(circuit.trial_calls - 1, 0)
+
+    def is_failure(self, error: Exception, status_code: Optional[int]) -> bool:
+        if isinstance(error, TorBoxException) and error.code is not None:
+            return error.code in self.failure_codes or (status_code is not None and status_code >= 500)
+
+        return status_code is None or status_code >= 500
+
+    def _check_recovery(self, family: str, circuit: Circuit):
+        if circuit.state == CircuitState.Open and time.monotonic() - circuit.opened_at >= self.recovery_timeout:
+            self._set_state(family, circuit, CircuitState.HalfOpen)
+
+    def _open(self, family: str, circuit: Circuit):
+        circuit.opened_at = time.monotonic()
+        self._set_state(family, circuit, CircuitState.Open)
+
+    def _set_state(self, family: str, circuit: Circuit, state: CircuitState):
+        old_state = circuit.state
+        circuit.state = state
+        circuit.failures = 0
+        circuit.successes = 0
+        circuit.trial_calls = 0
+
+        if self.on_state_change is not None and old_state != state:
+            self.on_state_change(family, old_state, state)
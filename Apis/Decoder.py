@@ -0,0 +1,111 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Type
+from pydantic import BaseModel, TypeAdapter
+from Models import DecodeMode, ResponseData
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """
+    Return the compiled adapter validating a response whose data is a list of the model.
+    """
+    return TypeAdapter(ResponseData[List[model]])
+
+
+class LazyModel:
+    """
+    Wraps a raw item and validates it into its model the first time a model attribute is read.
+    Reading the item like a dict, item['id'] or item.get('id'), uses the raw values and never validates.
+    """
+
+    __slots__ = ('raw', '_validate', '_model')
+
+    def __init__(self, raw: Dict[str, Any], validate: Callable[[Dict[str, Any]], BaseModel]):
+        self.raw = raw
+        self._validate = validate
+        self._model = None
+
+    def model(self) -> BaseModel:
+        if self._model is None:
+            self._model = self._validate(self.raw)
+        return self._model
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names which are not found normally. Slots are not set yet while copy and pickle rebuild
+        # the wrapper, and they look up special methods which the model must not answer for.
+        if name in LazyModel.__slots__ or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.model(), name)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.raw[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.raw.get(key, default)
+
+    def __repr__(self) -> str:
+        return f"LazyModel({self.raw!r})"
+
+
+class Decoder:
+    """
+    Decodes list responses into raw dicts, lazily validated models or validated models.
+    """
+
+    def __init__(self, mode: DecodeMode = DecodeMode.Raw):
+        self.mode = mode
+
+    def decode_list(self, content: Optional[bytes], model: Type[BaseModel]) -> Optional[List[Any]]:
+        """
+        Decode the data list of a response body.
+
+        :param content: The raw response body.
+        :param model: The model of the items in the list.
+        """
+        if content is None:
+            return None
+
+        if self.mode == DecodeMode.Validated:
+            # Parses and validates the bytes in one pass, without building the intermediate dicts in Python.
+            return list_adapter(model).validate_json(content).data
+
+        return self.decode_items(json.loads(content).get('data'), model)
+
+    def decode_items(self, items: Optional[List[Dict[str, Any]]], model: Type[BaseModel],
+                     convert: Optional[Callable[[BaseModel], Any]] = None) -> Optional[List[Any]]:
+        """
+        Decode items which were already parsed from JSON.
+
+        :param items: The raw items.
+        :param model: The model of the items.
+        :param convert: Optional function applied to every validated model.
+        """
+        if items is None or self.mode == DecodeMode.Raw:
+            return items
+
+        validate = self.validator(model, convert)
+
+        if self.mode == DecodeMode.Lazy:
+            return [LazyModel(item, validate) for item in items]
+
+        return [validate(item) for item in items]
+
+    def decode_item(self, item: Optional[Dict[str, Any]], model: Type[BaseModel],
+                    convert: Optional[Callable[[BaseModel], Any]] = None) -> Any:
+        if item is None or self.mode == DecodeMode.Raw:
+            return item
+
+        validate = self.validator(model, convert)
+
+        if self.mode == DecodeMode.Lazy:
+            return LazyModel(item, validate)
+
+        return validate(item)
+
+    @staticmethod
+    def validator(model: Type[BaseModel],
+                  convert: Optional[Callable[[BaseModel], Any]] = None) -> Callable[[Dict[str, Any]], Any]:
+        if convert is None:
+            return model.model_validate
+        return lambda item: convert(model.model_validate(item))
@@ -0,0 +1,104 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from Apis.Decoder import LazyModel
+
+
+def get_field(item: Any, name: str) -> Any:
+    """
+    Read a field from an item which is either a raw dict, a LazyModel or a model.
+    """
+    if isinstance(item, (dict, LazyModel)):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+class DownloadIndex:
+    """
+    Local mirror of the downloads of an account, indexed by hash and by id.
+    The mirror is rebuilt from the list endpoints when it is older than the refresh interval, or on demand.
+    Lookups between refreshes are dictionary lookups and do not touch the API.
+    """
+
+    def __init__(self, loader: Callable[[bool], Awaitable[Iterable[Any]]], refresh_interval: float = 60.0):
+        """
+        :param loader: Coroutine function returning every download of the account, it receives the skip_cache flag.
+        :param refresh_interval: Seconds after which the mirror is considered stale and reloaded on the next lookup.
+        """
+        self._loader = loader
+        self.refresh_interval = refresh_interval
+        self.refreshed_at: Optional[float] = None
+        self._by_hash: Dict[str, Any] = {}
+        self._by_id: Dict[int, Any] = {}
+        self._generation = 0
+        self._reload: Optional[asyncio.Future] = None
+        self._reload_generation = 0
+        self._reload_skip_cache = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_interval
+
+    def invalidate(self):
+        """
+        Mark the mirror as stale, the next lookup reloads it.
+        """
+        self.refreshed_at = None
+        self._generation += 1
+
+    async def refresh(self, skip_cache: bool = False):
+        """
+        Reload the mirror from the API. Callers arriving while a reload is running share it, unless the mirror
+        was invalidated since it started.
+        """
+        reload = self._reload
+        if (reload is None or reload.done() or self._reload_generation != self._generation
+                or skip_cache and not self._reload_skip_cache):
+            reload = self._reload = asyncio.ensure_future(self._load(skip_cache))
+            self._reload_generation = self._generation
+            self._reload_skip_cache = skip_cache
+
+        # A cancelled caller does not cancel the reload shared with the others.
+        await asyncio.shield(reload)
+
+    async def ensure_fresh(self, skip_cache: bool = False):
+        if self.stale:
+            await self.refresh(skip_cache)
+
+    async def _load(self, skip_cache: bool):
+        async with self._lock:
+            generation = self._generation
+            items = await self._loader(skip_cache)
+            by_hash = {}
+            by_id = {}
+
+            # The first item wins, loaders return active downloads before queued ones.
+            for item in items or []:
+                hash = get_field(item, 'hash')
+                if hash:
+                    by_hash.setdefault(hash.lower(), item)
+                by_id.setdefault(get_field(item, 'id'), item)
+
+            self._by_hash = by_hash
+            self._by_id = by_id
+            # The list may predate an add or a delete made during the reload, it is reloaded on the next lookup.
+            if generation == self._generation:
+                self.refreshed_at = time.monotonic()
+
+    async def get_by_hash(self, hash: str) -> Optional[Any]:
+        await self.ensure_fresh()
+        return self._by_hash.get(hash.lower())
+
+    async def get_by_id(self, id: int) -> Optional[Any]:
+        await self.ensure_fresh()
+        return self._by_id.get(id)
+
+    def remove(self, item: Any):
+        hash = get_field(item, 'hash')
+        if hash:
+            self._by_hash.pop(hash.lower(), None)
+        self._by_id.pop(get_field(item, 'id'), None)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
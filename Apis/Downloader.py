@@ -0,0 +1,279 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Awaitable, Callable, List, Optional
+from Apis.Transport import Transport
+from Apis.RetryPolicy import RetryPolicy
+from Exceptions import DownloadError
+
+DOWNLOAD_CONNECTIONS = 16
+DOWNLOAD_SEGMENT_SIZE = 32 * 1024 * 1024
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+CHECKPOINT_INTERVAL = 1.0
+
+# Statuses of an expired or revoked download link, a new link is requested before the next attempt.
+LINK_EXPIRED_STATUS_CODES = (401, 403, 404, 410)
+
+_seek_lock = threading.Lock()
+
+
+def _write_at(fd: int, data: bytearray, offset: int):
+    if hasattr(os, 'pwrite'):
+        os.pwrite(fd, data, offset)
+        return
+
+    # Windows has no pwrite, the seek and the write must not interleave with another segment.
+    with _seek_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+def _md5_file(path: str) -> str:
+    md5 = hashlib.md5()
+    with open(path, 'rb') as file:
+        while chunk := file.read(8 * 1024 * 1024):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def target_path(directory: str, name: str) -> str:
+    """
+    Join the directory and the relative path of a file as reported by TorBox, without leaving the directory.
+    """
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    return os.path.join(directory, *parts) if parts else os.path.join(directory, 'download')
+
+
+async def _gather_or_cancel(coroutines: List[Awaitable]) -> List:
+    # Unlike a plain gather, the other tasks are cancelled as soon as one of them fails.
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class DownloadTarget:
+    """
+    A file to download.
+
+    :ivar path: Where the file is written.
+    :ivar size: Size of the file in bytes.
+    :ivar resolve: Coroutine function returning a download link, called again when a link expires.
+    :ivar md5: Optional expected md5 of the file, checked once the download is complete.
+    :ivar invalidate: Optional function receiving a link which was rejected, so it is not resolved again.
+    """
+
+    def __init__(self, path: str, size: int, resolve: Callable[[], Awaitable[str]], md5: Optional[str] = None,
+                 invalidate: Optional[Callable[[str], None]] = None):
+        self.path = path
+        self.size = size
+        self.resolve = resolve
+        self.md5 = md5
+        self.invalidate = invalidate
+
+    def __repr__(self) -> str:
+        return f"DownloadTarget(path={self.path!r}, size={self.size})"
+
+
+class _FileState:
+    # Progress of a file being downloaded, done holds the bytes written of every segment.
+
+    def __init__(self, target: DownloadTarget, segment_size: int):
+        self.target = target
+        self.segment_size = segment_size
+        self.part_path = f"{target.path}.part"
+        self.checkpoint_path = f"{target.path}.part.json"
+        self.segments = max((target.size + segment_size - 1) // segment_size, 1)
+        self.done = [0] * self.segments
+        self.saved_at = time.monotonic()
+        self.fd = None
+        self.writes = set()
+        self._url = None
+        self._url_lock = asyncio.Lock()
+
+    def segment_range(self, index: int):
+        start = index * self.segment_size
+        return start, min(start + self.segment_size, self.target.size) - 1
+
+    async def url(self) -> str:
+        async with self._url_lock:
+            if self._url is None:
+                self._url = await self.target.resolve()
+            return self._url
+
+    def invalidate_url(self, url: str):
+        if self._url == url:
+            self._url = None
+            if self.target.invalidate is not None:
+                self.target.invalidate(url)
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if (checkpoint.get('size') == self.target.size and checkpoint.get('segment_size') == self.segment_size
+                and len(checkpoint.get('done', [])) == self.segments and os.path.exists(self.part_path)
+                and os.path.getsize(self.part_path) == self.target.size):
+            self.done = checkpoint['done']
+
+    def save_checkpoint(self):
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump({'size': self.target.size, 'segment_size': self.segment_size, 'done': list(self.done)}, file)
+        os.replace(temporary_path, self.checkpoint_path)
+        self.saved_at = time.monotonic()
+
+
+class Downloader:
+    """
+    Downloads files with several concurrent HTTP Range requests per file.
+
+    Every file is split in segments which are fetched in parallel and written at their offset in a preallocated
+    file, so a single slow connection does not limit the throughput. Progress is saved in a checkpoint next to the
+    file, an interrupted download resumes where it stopped. The file gets its final name once it is complete and,
+    when an md5 is known, verified.
+    """
+
+    def __init__(self, transport: Transport, retry_policy: Optional[RetryPolicy] = None,
+                 connections: int = DOWNLOAD_CONNECTIONS, segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+                 buffer_size: int = DOWNLOAD_BUFFER_SIZE, checkpoint_interval: float = CHECKPOINT_INTERVAL,
+                 verify: bool = True, on_progress: Optional[Callable[[DownloadTarget, int], None]] = None):
+        """
+        :param transport: Transport used for the range requests.
+        :param retry_policy: Policy deciding whether a failed segment is retried, defaults to 3 retries.
+        :param connections: Maximum number of range requests in flight, shared by all files.
+        :param segment_size: Size in bytes of the part of a file fetched by a single range request.
+        :param buffer_size: Bytes received before they are written to the file.
+        :param checkpoint_interval: Minimum seconds between two saves of the checkpoint of a file.
+        :param verify: Check the md5 of the downloaded files when it is known.
+        :param on_progress: Optional callback receiving the target and the number of bytes just written.
+        """
+        if connections < 1:
+            raise ValueError("connections must be at least 1")
+        if segment_size < 1:
+            raise ValueError("segment_size must be at least 1")
+
+        self._transport = transport
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=3)
+        self.connections = connections
+        self.segment_size = segment_size
+        self.buffer_size = buffer_size
+        self.checkpoint_interval = checkpoint_interval
+        self.verify = verify
+        self.on_progress = on_progress
+
+    async def download_async(self, targets: List[DownloadTarget]) -> List[str]:
+        """
+        Download the files and return their paths. Files which already exist with the expected size are skipped.
+        """
+        semaphore = asyncio.Semaphore(self.connections)
+        return await _gather_or_cancel([self._download_file_async(target, semaphore) for target in targets])
+
+    async def _download_file_async(self, target: DownloadTarget, semaphore: asyncio.Semaphore) -> str:
+        if os.path.exists(target.path) and os.path.getsize(target.path) == target.size:
+            return target.path
+
+        os.makedirs(os.path.dirname(target.path) or '.', exist_ok=True)
+        state = _FileState(target, self.segment_size)
+        state.load_checkpoint()
+
+        state.fd = os.open(state.part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        try:
+            # Preallocate, the segments are written at their offset in any order.
+            os.ftruncate(state.fd, target.size)
+            await _gather_or_cancel([self._fetch_segment_async(state, index, semaphore)
+                                     for index in range(state.segments)])
+        finally:
+            # A cancelled write still runs on its thread, the file must stay open until it is done.
+            await asyncio.gather(*state.writes, return_exceptions=True)
+            os.close(state.fd)
+            state.save_checkpoint()
+
+        if self.verify and target.md5:
+            md5 = await asyncio.to_thread(_md5_file, state.part_path)
+            if md5 != target.md5.lower():
+                # The data is corrupt, the next attempt starts from scratch.
+                os.remove(state.part_path)
+                os.remove(state.checkpoint_path)
+                raise DownloadError(f"md5 mismatch for {target.path}: expected {target.md5}, got {md5}", target.path)
+
+        os.replace(state.part_path, target.path)
+        os.remove(state.checkpoint_path)
+        return target.path
+
+    async def _fetch_segment_async(self, state: _FileState, index: int, semaphore: asyncio.Semaphore):
+        start, end = state.segment_range(index)
+        attempt = 0
+
+        while start + state.done[index] <= end:
+            try:
+                async with semaphore:
+                    await self._fetch_range_async(state, index, start, end)
+                if start + state.done[index] <= end:
+                    raise DownloadError(f"Connection closed before the end of the range of {state.target.path}",
+                                        state.target.path)
+            except Exception as ex:
+                status_code = getattr(ex, 'status_code', None)
+                # An expired link is requested again, which is always worth a retry.
+                expired = status_code in LINK_EXPIRED_STATUS_CODES and attempt < self.retry_policy.max_retries
+                if isinstance(ex, DownloadError) and status_code is None:
+                    # The range was cut short, the connection dropped like on a transport error.
+                    retryable = attempt < self.retry_policy.max_retries
+                else:
+                    retryable = self.retry_policy.should_retry(attempt, ex, status_code)
+                if not expired and not retryable:
+                    raise
+                await asyncio.sleep(0 if expired else self.retry_policy.backoff(attempt))
+                attempt += 1
+
+    async def _fetch_range_async(self, state: _FileState, index: int, start: int, end: int):
+        offset = start + state.done[index]
+        url = await state.url()
+        headers = {"Range": f"bytes={offset}-{end}"}
+
+        async with self._transport.stream("GET", url, headers, chunk_size=self.buffer_size) as response:
+            if response.status_code in LINK_EXPIRED_STATUS_CODES:
+                state.invalidate_url(url)
+                raise DownloadError(f"Download link of {state.target.path} was rejected", state.target.path,
+                                    response.status_code)
+            if not response.ok:
+                raise DownloadError(f"Downloading {state.target.path} failed with status {response.status_code}",
+                                    state.target.path, response.status_code)
+            if response.status_code != 206 and (offset != 0 or end != state.target.size - 1):
+                raise DownloadError("The download server does not support range requests", state.target.path,
+                                    response.status_code)
+
+            buffer = bytearray()
+            async for chunk in response.iter_chunks():
+                buffer += chunk
+                if len(buffer) >= self.buffer_size:
+                    offset = await self._write_async(state, index, buffer, offset, end)
+                    buffer = bytearray()
+            if buffer:
+                await self._write_async(state, index, buffer, offset, end)
+
+    async def _write_async(self, state: _FileState, index: int, buffer: bytearray, offset: int, end: int) -> int:
+        del buffer[end + 1 - offset:]
+        write = asyncio.get_running_loop().run_in_executor(None, _write_at, state.fd, buffer, offset)
+        state.writes.add(write)
+        write.add_done_callback(state.writes.discard)
+        await asyncio.shield(write)
+        state.done[index] += len(buffer)
+
+        if self.on_progress is not None:
+            self.on_progress(state.target, len(buffer))
+
+        if time.monotonic() - state.saved_at >= self.checkpoint_interval:
+            state.save_checkpoint()
+
+        return offset + len(buffer)
@@ -0,0 +1,25 @@
+from urllib.parse import urlsplit
+
+# Endpoint names, the last path segment of the url, grouped by the kind of work they cause on TorBox.
+ENDPOINT_FAMILIES = {
+    "createtorrent": "create",
+    "createusenetdownload": "create",
+    "createwebdownload": "create",
+    "mylist": "mylist",
+    "getqueued": "mylist",
+    "checkcached": "checkcached",
+    "requestdl": "requestdl",
+    "controltorrent": "control",
+    "controlqueued": "control",
+    "controlusenetdownload": "control",
+}
+
+DEFAULT_FAMILY = "default"
+
+
+def endpoint_family(url: str) -> str:
+    """
+    Return the family of an api url, for example "torrents/mylist?bypass_cache=True" belongs to "mylist".
+    """
+    endpoint = urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]
+    return ENDPOINT_FAMILIES.get(endpoint, DEFAULT_FAMILY)
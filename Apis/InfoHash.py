@@ -0,0 +1,145 @@
+import re
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from Apis.Bencode import decode_value
+
+_HEX_HASH = re.compile(r'^[0-9a-fA-F]{40}$')
+_BASE32_HASH = re.compile(r'^[A-Za-z2-7]{32}$')
+
+
+def magnet_info_hash(magnet: str) -> Optional[str]:
+    """
+    Return the lowercase hex v1 info-hash of a magnet link, None when it has no btih.
+    Base32 encoded hashes are converted to hex, the format TorBox uses.
+    """
+    parts = urlsplit(magnet.strip())
+    if parts.scheme.lower() != 'magnet':
+        return None
+
+    for name, value in parse_qsl(parts.query):
+        if name != 'xt' or not value.lower().startswith('urn:btih:'):
+            continue
+
+        info_hash = value[9:]
+        if _HEX_HASH.match(info_hash):
+            return info_hash.lower()
+        if _BASE32_HASH.match(info_hash):
+            return base64.b32decode(info_hash.upper()).hex()
+
+    return None
+
+
+class TorrentMetadata:
+    """
+    Metadata of a .torrent file read locally.
+
+    :ivar info_hash: Lowercase hex v1 info-hash, the btih TorBox uses, None for v2 only torrents.
+    :ivar info_hash_v2: Lowercase hex v2 info-hash, None for v1 only torrents.
+    :ivar name: Name of the torrent.
+    :ivar files: Path and size of every file, padding files excluded.
+    """
+
+    def __init__(self, info_hash: Optional[str], info_hash_v2: Optional[str], name: str,
+                 files: List[Tuple[str, int]]):
+        self.info_hash = info_hash
+        self.info_hash_v2 = info_hash_v2
+        self.name = name
+        self.files = files
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size in self.files)
+
+    def __repr__(self) -> str:
+        return f"TorrentMetadata(info_hash={self.info_hash!r}, name={self.name!r}, files={len(self.files)})"
+
+
+def _text(value: Any) -> str:
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+
+
+def _field(container: Dict[bytes, Any], key: bytes, kind: type, default: Any = None) -> Any:
+    # The decoded values have whatever type the file says, a wrong one must fail like any other invalid torrent.
+    value = container.get(key, default)
+    if not isinstance(value, kind):
+        raise ValueError(f"Invalid torrent file: {_text(key)} must be a {kind.__name__}")
+    return value
+
+
+def _path(file: Dict[bytes, Any]) -> List[bytes]:
+    path = _field(file, b'path.utf-8', list) if b'path.utf-8' in file else _field(file, b'path', list, [])
+    if not all(isinstance(part, bytes) for part in path):
+        raise ValueError("Invalid torrent file: path must be a list of byte strings")
+    return path
+
+
+def _file_tree(tree: Dict[bytes, Any], parent: List[str], files: List[Tuple[str, int]]):
+    # In a v2 file tree a file is a dict with an empty key holding its length.
+    for name, node in tree.items():
+        if not isinstance(node, dict):
+            raise ValueError("Invalid torrent file: file tree entries must be dictionaries")
+        if name == b'':
+            files.append(("/".join(parent), _field(node, b'length', int, 0)))
+        else:
+            _file_tree(node, parent + [_text(name)], files)
+
+
+def torrent_metadata(data: bytes) -> TorrentMetadata:
+    """
+    Read the info-hashes and the file list of a .torrent file, without any network request.
+    Raises ValueError when the data is not a valid torrent.
+    """
+    if data[:1] != b'd':
+        raise ValueError("Invalid torrent file")
+
+    # The info-hash is the hash of the info dict exactly as it is encoded in the file, so its span is kept.
+    info = None
+    info_span = None
+    pos = 1
+    try:
+        while data[pos] != 0x65:  # e
+            key, pos = decode_value(data, pos)
+            start = pos
+            value, pos = decode_value(data, pos)
+            if key == b'info':
+                info = value
+                info_span = data[start:pos]
+    except (IndexError, ValueError) as ex:
+        raise ValueError(f"Invalid torrent file: {ex}") from None
+
+    if not isinstance(info, dict):
+        raise ValueError("Invalid torrent file: missing info dictionary")
+
+    is_v2 = info.get(b'meta version') == 2
+    has_v1 = b'pieces' in info
+    name = _text(_field(info, b'name.utf-8', bytes) if b'name.utf-8' in info else _field(info, b'name', bytes, b''))
+
+    files = []
+    if b'files' in info:
+        for file in _field(info, b'files', list):
+            if not isinstance(file, dict):
+                raise ValueError("Invalid torrent file: files must be a list of dictionaries")
+            if b'p' in _field(file, b'attr', bytes, b''):
+                continue
+            files.append(("/".join([name, *map(_text, _path(file))]), _field(file, b'length', int, 0)))
+    elif b'length' in info:
+        files.append((name, _field(info, b'length', int)))
+    elif is_v2 and b'file tree' in info:
+        tree = _field(info, b'file tree', dict)
+        # A single file torrent holds the file itself at the root of the tree, named like the torrent.
+        root = next(iter(tree.values()), None)
+        single_file = len(tree) == 1 and isinstance(root, dict) and b'' in root
+        _file_tree(tree, [] if single_file else [name], files)
+
+    return TorrentMetadata(hashlib.sha1(info_span).hexdigest() if has_v1 or not is_v2 else None,
+                           hashlib.sha256(info_span).hexdigest() if is_v2 else None,
+                           name, files)
+
+
+def magnet_link(info_hash: str, name: Optional[str] = None) -> str:
+    link = f"magnet:?xt=urn:btih:{info_hash}"
+    if name:
+        link += f"&{urlencode({'dn': name})}"
+    return link
@@ -0,0 +1,172 @@
+import re
+import json
+import codecs
+from typing import Any, List, Optional
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_WHITESPACE = re.compile(r'\s*')
+
+
+class JsonItemStream:
+    """
+    Incrementally extracts the items of the array stored under a key of the top-level JSON object,
+    for example the "data" list of a TorBox response.
+
+    Feed the response body chunk by chunk, every call returns the items completed by that chunk. Only the item
+    being parsed is buffered, so memory stays flat regardless of the size of the array. The object around the
+    array is scanned in Python, the items themselves are decoded by the C accelerated json decoder.
+    """
+
+    def __init__(self, key: str = 'data'):
+        self._key = key
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._in_items = False
+        self._expect_item = True
+        self._first_item = True
+        self._retry_length = 0
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        if self.finished:
+            return []
+
+        self._buffer += self._utf8.decode(chunk)
+        items = []
+
+        if not self._in_items:
+            self._scan_object()
+        if self._in_items and len(self._buffer) >= self._retry_length:
+            self._decode_items(items)
+
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        Return the items still buffered once the whole body has been fed, and check the array was complete.
+        """
+        items = []
+
+        if self._in_items and not self.finished:
+            self._decode_items(items)
+            if not self.finished:
+                raise ValueError(f"Response ended before the end of the '{self._key}' list")
+
+        return items
+
+    def _scan_object(self):
+        # Walks the top-level object until the array under the key is opened, the last string read directly in
+        # the top-level object before a value is the key of that value.
+        buffer = self._buffer
+        pos = self._pos
+        end = len(buffer)
+
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = end
+                    break
+
+                pos = match.start()
+                if buffer[pos] == '\\':
+                    self._escape = True
+                    pos += 1
+                    continue
+
+                self._in_string = False
+                if self._string_start is not None:
+                    self._last_key = buffer[self._string_start + 1:pos]
+                    self._string_start = None
+                pos += 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = end
+                break
+
+            pos = match.start()
+            char = buffer[pos]
+            pos += 1
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._string_start = pos - 1
+            elif char in '{[':
+                self._depth += 1
+                if char == '[' and self._depth == 2 and self._last_key == self._key:
+                    self._in_items = True
+                    break
+            else:
+                self._depth -= 1
+
+        keep = self._string_start if self._string_start is not None else pos
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._string_start is not None:
+            self._string_start = 0
+
+    def _decode_items(self, items: List[Any]):
+        buffer = self._buffer
+        pos = self._pos
+        end = len(buffer)
+
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos >= end:
+                break
+
+            if not self._expect_item:
+                char = buffer[pos]
+                if char == ']':
+                    self.finished = True
+                    pos += 1
+                    break
+                if char != ',':
+                    raise ValueError(f"Unexpected character {char!r} in the '{self._key}' list")
+                self._expect_item = True
+                pos += 1
+                continue
+
+            if buffer[pos] == ']':
+                if not self._first_item:
+                    raise ValueError(f"Unexpected character ']' in the '{self._key}' list")
+                self.finished = True
+                pos += 1
+                break
+
+            try:
+                item, item_end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                item_end = None
+
+            # A number at the end of the buffer may continue in the next chunk, wait for the next separator.
+            if item_end is None or _WHITESPACE.match(buffer, item_end).end() >= end:
+                # Retry once the incomplete item has doubled in size, so large items are not decoded over and over.
+                self._retry_length = pos + 2 * (end - pos)
+                break
+
+            items.append(item)
+            self._first_item = False
+            self._retry_length = 0
+            self._expect_item = False
+            pos = item_end
+
+        self._buffer = buffer[pos:]
+        self._pos = 0
+        self._retry_length = max(self._retry_length - pos, 0)
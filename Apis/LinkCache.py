@@ -0,0 +1,145 @@
+import json
+import time
+from calendar import timegm
+from functools import partial
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl
+from Apis.SingleFlight import SingleFlight
+
+# Query parameters holding the unix time at which a signed link expires.
+EXPIRY_PARAMETERS = ('expires', 'Expires', 'exp', 'e')
+
+
+def link_expiry(link: str) -> Optional[float]:
+    """
+    Return the unix time at which a signed link expires, None when the link does not tell.
+    """
+    parameters = dict(parse_qsl(urlsplit(link).query))
+
+    for name in EXPIRY_PARAMETERS:
+        if parameters.get(name, '').isdigit():
+            return float(parameters[name])
+
+    # S3 style presigned links carry the signing time and a lifetime in seconds.
+    signed_at = parameters.get('X-Amz-Date')
+    lifetime = parameters.get('X-Amz-Expires')
+    if signed_at and lifetime and lifetime.isdigit():
+        try:
+            return timegm(time.strptime(signed_at, '%Y%m%dT%H%M%SZ')) + int(lifetime)
+        except ValueError:
+            return None
+
+    return None
+
+
+def response_link(response: Optional[str]) -> Optional[str]:
+    # requestdl answers with the link in the data of the response.
+    try:
+        link = json.loads(response).get('data') if response else None
+    except (ValueError, AttributeError):
+        return None
+    return link if isinstance(link, str) else None
+
+
+class LinkCache:
+    """
+    Caches requestdl responses per account, item, file and zip flag.
+
+    An entry expires after the TTL, or earlier when the link is signed with a shorter expiry. Identical requests
+    made while the link is being requested wait for that request instead of sending their own. A single instance
+    is shared by the torrents and usenet Apis of a client and all of its tenants, the account is part of the key.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 10_000, expiry_margin: float = 60.0):
+        """
+        :param ttl: Maximum seconds a link is reused.
+        :param max_entries: Maximum number of links, the least recently used link is evicted when full.
+        :param expiry_margin: Seconds before the signed expiry of a link after which it is not handed out anymore.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.expiry_margin = expiry_margin
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._keys_by_link: Dict[str, Hashable] = {}
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached response for the key, or fetch it once for all concurrent callers.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._remove(key)
+
+        return await self._flight.do(key, partial(self._fetch, key, fetch))
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[str]]) -> str:
+        self.misses += 1
+        response = await fetch()
+        self._store(key, response)
+        return response
+
+    def _store(self, key: Hashable, response: str):
+        link = response_link(response)
+        if link is None:
+            return
+
+        ttl = self.ttl
+        expires_at = link_expiry(link)
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - self.expiry_margin - time.time())
+        if ttl <= 0:
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, response)
+        self._keys_by_link[link] = key
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._keys_by_link.pop(response_link(entry[1]), None)
+
+    def invalidate(self, key: Hashable):
+        self._remove(key)
+
+    def invalidate_link(self, link: str):
+        """
+        Forget a link, call this when fetching it returned 403 or 404.
+        """
+        key = self._keys_by_link.get(link)
+        if key is not None:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_link.clear()
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.coalesced
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'size': len(self._entries),
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
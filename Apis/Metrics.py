@@ -0,0 +1,175 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+from Apis.RequestHooks import RequestHooks, RequestInfo
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class FamilyMetrics:
+    """
+    The metrics of one endpoint family.
+
+    :ivar requests: Attempts sent, retries included.
+    :ivar errors: Attempts which failed, either without a response or with an error response.
+    :ivar status_codes: Number of responses per HTTP status.
+    :ivar bucket_counts: Number of responses per latency bucket, the last entry counts the slower ones.
+    :ivar latency_sum: Total seconds spent waiting for responses.
+    :ivar request_bytes: Request body bytes sent, bodies of unknown size are not counted.
+    :ivar response_bytes: Response body bytes received.
+    :ivar retries: Number of retries.
+    :ivar backoff_seconds: Total seconds of backoff before retries.
+    :ivar decodes: Number of response bodies parsed from JSON.
+    :ivar decode_seconds: Total seconds spent parsing response bodies.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.requests = 0
+        self.errors = 0
+        self.status_codes: Dict[int, int] = {}
+        self.bucket_counts: List[int] = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.decodes = 0
+        self.decode_seconds = 0.0
+
+    @property
+    def responses(self) -> int:
+        return sum(self.bucket_counts)
+
+    def observe_latency(self, seconds: float):
+        self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+        self.latency_sum += seconds
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        """
+        Estimate a latency quantile from the histogram, interpolating linearly inside the bucket like Prometheus'
+        histogram_quantile. Latencies above the last bound are reported as the last bound.
+        """
+        total = self.responses
+        if total == 0:
+            return None
+
+        rank = quantile * total
+        cumulative = 0
+        for index, count in enumerate(self.bucket_counts):
+            if count and cumulative + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+
+        return self.buckets[-1]
+
+
+class MetricsCollector(RequestHooks):
+    """
+    Request hooks keeping the metrics of every endpoint family in memory.
+    Read them from families or export them with prometheus_text.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        :param buckets: Increasing upper bounds in seconds of the latency histogram buckets.
+        """
+        if list(buckets) != sorted(buckets) or not buckets:
+            raise ValueError("buckets must be a non-empty increasing sequence")
+
+        self.buckets = tuple(buckets)
+        self.families: Dict[str, FamilyMetrics] = {}
+
+    def family(self, family: str) -> FamilyMetrics:
+        metrics = self.families.get(family)
+        if metrics is None:
+            metrics = self.families[family] = FamilyMetrics(self.buckets)
+        return metrics
+
+    def reset(self):
+        self.families = {}
+
+    def on_request_start(self, request: RequestInfo):
+        metrics = self.family(request.family)
+        metrics.requests += 1
+        metrics.request_bytes += request.request_bytes or 0
+
+    def on_request_end(self, request: RequestInfo, status_code: int, response_bytes: int, seconds: float):
+        metrics = self.family(request.family)
+        metrics.status_codes[status_code] = metrics.status_codes.get(status_code, 0) + 1
+        metrics.response_bytes += response_bytes
+        metrics.observe_latency(seconds)
+
+    def on_request_error(self, request: RequestInfo, error: BaseException, status_code: Optional[int],
+                         seconds: float):
+        self.family(request.family).errors += 1
+
+    def on_retry(self, request: RequestInfo, delay: float, error: Exception):
+        metrics = self.family(request.family)
+        metrics.retries += 1
+        metrics.backoff_seconds += delay
+
+    def on_decode(self, family: str, seconds: float):
+        metrics = self.family(family)
+        metrics.decodes += 1
+        metrics.decode_seconds += seconds
+
+    def prometheus_text(self, prefix: str = "torbox") -> str:
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        :param prefix: Prefix of every metric name.
+        """
+        lines = []
+        families = sorted(self.families.items())
+
+        def counter(name: str, help: str, attribute: str):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for family, metrics in families:
+                lines.append(f'{prefix}_{name}{{family="{family}"}} {_number(getattr(metrics, attribute))}')
+
+        counter("requests_total", "Request attempts sent, retries included.", "requests")
+        counter("request_errors_total", "Request attempts which failed.", "errors")
+
+        lines.append(f"# HELP {prefix}_responses_total Responses received by HTTP status.")
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for family, metrics in families:
+            for status_code, count in sorted(metrics.status_codes.items()):
+                lines.append(f'{prefix}_responses_total{{family="{family}",code="{status_code}"}} {count}')
+
+        name = f"{prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Time between sending a request and receiving its response.")
+        lines.append(f"# TYPE {name} histogram")
+        for family, metrics in families:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), metrics.bucket_counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{family="{family}",le="{_number(bound)}"}} {cumulative}')
+            lines.append(f'{name}_sum{{family="{family}"}} {_number(metrics.latency_sum)}')
+            lines.append(f'{name}_count{{family="{family}"}} {cumulative}')
+
+        counter("request_bytes_total", "Request body bytes sent.", "request_bytes")
+        counter("response_bytes_total", "Response body bytes received.", "response_bytes")
+        counter("retries_total", "Retried request attempts.", "retries")
+        counter("backoff_seconds_total", "Seconds spent in backoff before retries.", "backoff_seconds")
+
+        name = f"{prefix}_decode_seconds"
+        lines.append(f"# HELP {name} Time spent parsing response bodies from JSON.")
+        lines.append(f"# TYPE {name} summary")
+        for family, metrics in families:
+            lines.append(f'{name}_sum{{family="{family}"}} {_number(metrics.decode_seconds)}')
+            lines.append(f'{name}_count{{family="{family}"}} {metrics.decodes}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _number(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return repr(value)
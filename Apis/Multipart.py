@@ -0,0 +1,153 @@
+import os
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple, Union
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+UploadSource = Union[bytes, str, os.PathLike, BinaryIO, AsyncIterable[bytes]]
+
+
+def _quote(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+def source_name(source: UploadSource, default: str) -> str:
+    """
+    Return the file name of a path or a named file object, or the default.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(os.fspath(source))
+    name = getattr(source, 'name', None)
+    if isinstance(name, str) and name:
+        return os.path.basename(name)
+    return default
+
+
+async def read_source(source: UploadSource) -> bytes:
+    """
+    Read a whole upload source into memory, meant for small files like torrents.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    return b"".join([chunk async for chunk in _iter_source(source, _start(source))])
+
+
+def _start(source: UploadSource) -> Optional[int]:
+    if hasattr(source, 'read') and hasattr(source, 'seekable') and source.seekable():
+        return source.tell()
+    return None
+
+
+def _size(source: UploadSource, start: Optional[int]) -> Optional[int]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if start is not None:
+        end = source.seek(0, os.SEEK_END)
+        source.seek(start)
+        return end - start
+    return None
+
+
+async def _iter_source(source: UploadSource, start: Optional[int],
+                       chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+        return
+
+    if hasattr(source, '__aiter__'):
+        async for chunk in source:
+            yield chunk
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        file = await asyncio.to_thread(open, source, 'rb')
+    else:
+        file = source
+        if start is not None:
+            file.seek(start)
+
+    try:
+        # File reads run on the default executor so a slow disk does not block the event loop.
+        while True:
+            chunk = await asyncio.to_thread(file.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        if file is not source:
+            file.close()
+
+
+class MultipartBody:
+    """
+    multipart/form-data request body which is streamed part by part.
+
+    Files are read chunk by chunk while the request is sent, so uploading a file uses constant memory.
+    Files may be bytes, a path, a binary file object or an async iterable of bytes. The Content-Length is known
+    unless a file is an async iterable, the body is sent chunked then.
+    """
+
+    def __init__(self, fields: Dict[str, Any], boundary: Optional[str] = None):
+        """
+        :param fields: Form fields, a tuple (filename, source, content type) adds a file. None values are dropped.
+        :param boundary: Optional boundary, a random one is used by default.
+        """
+        self.boundary = boundary or os.urandom(16).hex()
+        self._parts: List[Tuple[bytes, Any, Optional[int]]] = []
+
+        for name, value in fields.items():
+            if value is None:
+                continue
+
+            if isinstance(value, tuple):
+                filename, source, content_type = value
+                header = (f'--{self.boundary}\r\n'
+                          f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'
+                          f'Content-Type: {content_type}\r\n\r\n')
+                self._parts.append((header.encode('utf-8'), source, _start(source)))
+            else:
+                header = (f'--{self.boundary}\r\n'
+                          f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n')
+                self._parts.append((header.encode('utf-8'), str(value).encode('utf-8'), None))
+
+        self._footer = f'--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    @property
+    def content_length(self) -> Optional[int]:
+        length = len(self._footer)
+        for header, source, start in self._parts:
+            size = _size(source, start)
+            if size is None:
+                return None
+            length += len(header) + size + 2
+        return length
+
+    @property
+    def replayable(self) -> bool:
+        """
+        Whether the body can be sent again, an async iterable can only be read once.
+        """
+        return all(not hasattr(source, '__aiter__') and (not hasattr(source, 'read') or start is not None)
+                   for _, source, start in self._parts)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": self.content_type}
+        length = self.content_length
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        return headers
+
+    async def chunks(self, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        for header, source, start in self._parts:
+            yield header
+            async for chunk in _iter_source(source, start, chunk_size):
+                yield chunk
+            yield b'\r\n'
+        yield self._footer
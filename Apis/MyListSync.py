@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from Apis.DownloadIndex import get_field
+
+
+class SyncDiff:
+    """
+    The changes between two snapshots of the downloads of an account.
+    """
+
+    def __init__(self, added: List[Any], updated: List[Any], removed: List[Any]):
+        self.added = added  # Items which were not in the previous snapshot
+        self.updated = updated  # Items with a different updated_at than in the previous snapshot
+        self.removed = removed  # Items from the previous snapshot which no longer exist, see MyListSync
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def __repr__(self) -> str:
+        return f"SyncDiff(added={len(self.added)}, updated={len(self.updated)}, removed={len(self.removed)})"
+
+
+class MyListSync:
+    """
+    Keeps a snapshot of the downloads of an account and reports what changed on every sync.
+
+    The first sync downloads the full list. Following syncs only fetch the items which can still change, the ones
+    which are active or not finished, one by one through the single id query, together with the first page of the
+    list to discover new items, the list returns the newest items first. Every full_sync_every syncs, or when the
+    first page only holds unknown items, the full list is downloaded again to pick up anything the deltas missed.
+
+    Finished items are not fetched by the delta syncs, so their removal is only reported by the next full sync.
+    Call sync(full=True) after deleting downloads outside of this client to see the removal right away.
+    """
+
+    def __init__(self, api, full_sync_every: int = 10, head_size: int = 50, max_delta_items: int = 100,
+                 max_concurrency: int = 8):
+        """
+        :param api: The TorrentsApi or UsenetApi to sync.
+        :param full_sync_every: Download the full list every this many syncs.
+        :param head_size: Number of items of the first page fetched to discover new items.
+        :param max_delta_items: Download the full list instead when more items than this can still change.
+        :param max_concurrency: Maximum number of single item queries in flight at the same time.
+        """
+        self._api = api
+        self.full_sync_every = full_sync_every
+        self.head_size = head_size
+        self.max_delta_items = max_delta_items
+        self.max_concurrency = max_concurrency
+        self.snapshot: Optional[Dict[int, Any]] = None
+        self._syncs_since_full = 0
+
+    @staticmethod
+    def can_change(item: Any) -> bool:
+        return bool(get_field(item, 'active')) or not get_field(item, 'download_finished')
+
+    async def sync(self, full: bool = False) -> SyncDiff:
+        """
+        Bring the snapshot up to date and return the changes since the previous sync.
+
+        :param full: Download the full list even if a delta sync is possible.
+        """
+        if full or self.snapshot is None or self._syncs_since_full + 1 >= self.full_sync_every:
+            return await self._full_sync()
+
+        watched = [id for id, item in self.snapshot.items() if self.can_change(item)]
+        if len(watched) > self.max_delta_items:
+            return await self._full_sync()
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(id: int):
+            async with semaphore:
+                return await self._api.get_list_item_async(id, True)
+
+        head, *items = await asyncio.gather(self._api.get_current_async(True, offset=0, limit=self.head_size),
+                                            *[fetch(id) for id in watched])
+        head = head or []
+
+        if len(head) >= self.head_size and all(get_field(item, 'id') not in self.snapshot for item in head):
+            # More new items than the first page holds, only a full download can find all of them.
+            return await self._full_sync()
+
+        added, updated, removed = [], [], []
+        for id, item in zip(watched, items):
+            if item is None:
+                removed.append(self.snapshot.pop(id))
+        for item in [*head, *[item for item in items if item is not None]]:
+            self._apply(item, added, updated)
+
+        self._syncs_since_full += 1
+        return SyncDiff(added, updated, removed)
+
+    async def _full_sync(self) -> SyncDiff:
+        items = await self._api.get_current_async(True) or []
+        previous = self.snapshot or {}
+        self.snapshot = {}
+
+        added, updated = [], []
+        for item in items:
+            id = get_field(item, 'id')
+            if id in previous:
+                self.snapshot[id] = previous.pop(id)
+            self._apply(item, added, updated)
+
+        self._syncs_since_full = 0
+        return SyncDiff(added, updated, list(previous.values()))
+
+    def _apply(self, item: Any, added: List[Any], updated: List[Any]):
+        id = get_field(item, 'id')
+        known = self.snapshot.get(id)
+
+        if known is None:
+            added.append(item)
+        elif known is not item and get_field(known, 'updated_at') != get_field(item, 'updated_at'):
+            updated.append(item)
+        else:
+            return
+
+        self.snapshot[id] = item
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+DEFAULT_PAGE_SIZE = 100
+
+
+async def iter_pages(fetch_page: Callable[[int, int], Awaitable[Optional[List[Any]]]],
+                     page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = True) -> AsyncIterator[Any]:
+    """
+    Yield the items of a list endpoint page by page using offset and limit.
+
+    While the caller processes a page the next one is already requested, so the next page is usually ready by the
+    time it is needed. Breaking out of the loop stops the iteration, the prefetched request is cancelled when the
+    iterator is closed.
+
+    :param fetch_page: Coroutine function receiving the offset and limit and returning the items of that page.
+    :param page_size: Number of items requested per page.
+    :param prefetch: Request the next page while the current one is being processed.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+
+    offset = 0
+    next_page = asyncio.ensure_future(fetch_page(offset, page_size))
+
+    try:
+        while next_page is not None:
+            page = await next_page or []
+            next_page = None
+            offset += page_size
+
+            # A short page is the last one.
+            has_more = len(page) >= page_size
+            if has_more and prefetch:
+                next_page = asyncio.ensure_future(fetch_page(offset, page_size))
+
+            for item in page:
+                yield item
+
+            if has_more and next_page is None:
+                next_page = asyncio.ensure_future(fetch_page(offset, page_size))
+    finally:
+        if next_page is not None:
+            if not next_page.done():
+                next_page.cancel()
+            elif not next_page.cancelled():
+                # Retrieve the error of a prefetched page nobody will read, asyncio would log it otherwise.
+                next_page.exception()
@@ -0,0 +1,142 @@
+import time
+import asyncio
+from typing import Dict, Optional, Tuple
+from Apis.EndpointFamily import DEFAULT_FAMILY
+
+# Requests per second and burst size per endpoint family, kept below the limits TorBox enforces.
+DEFAULT_RATE_LIMITS = {
+    "create": (1.0, 10),
+    "checkcached": (5.0, 10),
+    "mylist": (5.0, 10),
+    "requestdl": (5.0, 10),
+    DEFAULT_FAMILY: (5.0, 10),
+}
+
+# Number of accounts with buckets above which the idle ones are forgotten.
+PRUNE_ACCOUNTS = 1024
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at a constant rate.
+    A caller takes a token even when the bucket is empty and waits until that token is refilled, this queues
+    callers in order and never lets a burst through after a wait.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        :param rate: Tokens added per second.
+        :param burst: Maximum number of tokens, the number of requests allowed at once.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def full(self) -> bool:
+        """
+        Whether the bucket holds every token, it then behaves exactly like a new bucket.
+        """
+        self._refill()
+        return self._tokens >= self.burst
+
+    @property
+    def wait_time(self) -> float:
+        """
+        Seconds a request made now would wait.
+        """
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def reserve(self) -> float:
+        """
+        Take a token and return the seconds to wait until it may be used.
+        """
+        self._refill()
+        self._tokens -= 1
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # The token was never used, keeping it would hold back every later caller.
+                self._refill()
+                self._tokens = min(self.burst, self._tokens + 1)
+                raise
+
+    def pause(self, seconds: float):
+        """
+        Hold back every request for the given seconds, used when TorBox answers with a rate limit error.
+        """
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class RateLimiter:
+    """
+    Async rate limiter with a token bucket per account and endpoint family, TorBox enforces its limits per account.
+    A single instance is shared by every Api of a client and its tenants, each account draws from its own budget
+    and a rate limit error of one account only holds back that account.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        """
+        :param limits: Endpoint families mapped to (requests per second, burst). Families which are not listed use
+                       the "default" entry, or are not limited when there is none. Defaults to DEFAULT_RATE_LIMITS.
+        """
+        self.limits = DEFAULT_RATE_LIMITS if limits is None else limits
+        self._accounts: Dict[Optional[str], Dict[str, TokenBucket]] = {}
+        self._prune_above = PRUNE_ACCOUNTS
+
+    def buckets(self, account: Optional[str] = None) -> Dict[str, TokenBucket]:
+        """
+        Return the buckets of an account, None for the requests sent without authentication.
+        """
+        buckets = self._accounts.get(account)
+        if buckets is None:
+            if len(self._accounts) >= self._prune_above:
+                self._prune()
+            buckets = self._accounts[account] = {family: TokenBucket(rate, burst)
+                                                 for family, (rate, burst) in self.limits.items()}
+        return buckets
+
+    def _prune(self):
+        # Tenants can be created per incoming request, the accounts whose buckets are all full are forgotten.
+        self._accounts = {account: buckets for account, buckets in self._accounts.items()
+                          if not all(bucket.full for bucket in buckets.values())}
+        self._prune_above = max(PRUNE_ACCOUNTS, 2 * len(self._accounts))
+
+    def bucket(self, family: str, account: Optional[str] = None) -> Optional[TokenBucket]:
+        buckets = self.buckets(account)
+        return buckets.get(family) or buckets.get(DEFAULT_FAMILY)
+
+    async def acquire(self, family: str, account: Optional[str] = None):
+        bucket = self.bucket(family, account)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def wait_time(self, family: str, account: Optional[str] = None) -> float:
+        """
+        Seconds a request of the endpoint family made now by the account would wait.
+        """
+        bucket = self.bucket(family, account)
+        return bucket.wait_time if bucket is not None else 0.0
+
+    def pause(self, family: str, seconds: float, account: Optional[str] = None):
+        bucket = self.bucket(family, account)
+        if bucket is not None:
+            bucket.pause(seconds)
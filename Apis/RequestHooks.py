@@ -0,0 +1,110 @@
+import logging
+from urllib.parse import urlencode
+from typing import Any, Iterable, Optional, Tuple, Union
+from Apis.Multipart import MultipartBody
+
+logger = logging.getLogger(__name__)
+
+
+class RequestInfo:
+    """
+    One attempt of a request, passed to every hook of that attempt.
+
+    :ivar method: The HTTP method.
+    :ivar path: The api path without its query string, so tokens passed in the url never reach the hooks.
+    :ivar family: The endpoint family, see endpoint_family.
+    :ivar attempt: Number of retries done before this attempt.
+    :ivar request_bytes: Size of the request body, None when it is streamed with an unknown size.
+    """
+
+    __slots__ = ('method', 'path', 'family', 'attempt', 'request_bytes')
+
+    def __init__(self, method: str, url: str, family: str, attempt: int = 0, request_bytes: Optional[int] = 0):
+        self.method = method
+        self.path = url.split('?', 1)[0]
+        self.family = family
+        self.attempt = attempt
+        self.request_bytes = request_bytes
+
+    def __repr__(self) -> str:
+        return f"RequestInfo({self.method} {self.path}, family={self.family!r}, attempt={self.attempt})"
+
+
+class RequestHooks:
+    """
+    Receives the events of the requests sent by TorBoxRequests. Every event does nothing by default, subclass and
+    override the events you need. Hooks are called inline on the event loop and should return quickly.
+
+    Every attempt starts with on_request_start, then on_request_end when a response was received and
+    on_request_error when the attempt failed or was cancelled, an error response triggers both. on_retry follows a
+    failed attempt which is retried. An exception raised by a hook is logged and ignored, it never fails, retries
+    or counts against the request.
+    """
+
+    def on_request_start(self, request: RequestInfo):
+        pass
+
+    def on_request_end(self, request: RequestInfo, status_code: int, response_bytes: int, seconds: float):
+        """
+        :param seconds: Time between sending the request and receiving the complete response.
+        """
+        pass
+
+    def on_request_error(self, request: RequestInfo, error: BaseException, status_code: Optional[int],
+                         seconds: float):
+        """
+        :param error: The error of the attempt, asyncio.CancelledError when it was cancelled.
+        :param status_code: The HTTP status, None when no response was received.
+        """
+        pass
+
+    def on_retry(self, request: RequestInfo, delay: float, error: Exception):
+        """
+        :param delay: Seconds of backoff before the next attempt.
+        """
+        pass
+
+    def on_decode(self, family: str, seconds: float):
+        """
+        Called after a response body of the family was parsed from JSON.
+        """
+        pass
+
+
+def notify_hooks(hooks: Tuple[RequestHooks, ...], event: str, *args: Any):
+    """
+    Call the event on every hook, an error of one hook does not reach the request or the other hooks.
+    """
+    for hook in hooks:
+        try:
+            getattr(hook, event)(*args)
+        except Exception:
+            logger.exception("Request hook %r failed in %s", hook, event)
+
+
+def hook_tuple(hooks: Union[None, RequestHooks, Iterable[RequestHooks]]) -> Tuple[RequestHooks, ...]:
+    """
+    Normalize the request_hooks option of TorBoxPyClient into a tuple, empty when no hook is installed.
+    """
+    if hooks is None:
+        return ()
+    if isinstance(hooks, RequestHooks):
+        return hooks,
+    return tuple(hooks)
+
+
+def body_size(data: Any) -> Optional[int]:
+    """
+    Return the size of a request body as sent by the transports.
+    """
+    if data is None:
+        return 0
+    if isinstance(data, MultipartBody):
+        return data.content_length
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, dict):
+        return len(urlencode({k: v for k, v in data.items() if v is not None}))
+    if isinstance(data, (list, tuple)):
+        return len(urlencode([(k, v) for k, v in data if v is not None]))
+    return None
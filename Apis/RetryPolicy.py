@@ -0,0 +1,155 @@
+import sys
+import random
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+from Exceptions import AccessTokenExpired, TorBoxException
+
+# Errors which are worth retrying because they are transient on the TorBox side.
+RETRY_ERROR_CODES = {
+    "DATABASE_ERROR": True,
+    "DOWNLOAD_SERVER_ERROR": True,
+    "NO_SERVERS_AVAILABLE_ERROR": True,
+    "UNKNOWN_ERROR": True,
+}
+
+# Errors caused by the request or the account, retrying them can never succeed.
+NEVER_RETRY_ERROR_CODES = {
+    code: False for code in (
+        "NO_AUTH", "BAD_TOKEN", "AUTH_ERROR", "INVALID_OPTION", "ENDPOINT_NOT_FOUND", "ITEM_NOT_FOUND",
+        "PLAN_RESTRICTED_FEATURE", "DUPLICATE_ITEM", "BOZO_RSS_FEED", "TOO_MUCH_DATA", "MISSING_REQUIRED_OPTION",
+        "TOO_MANY_OPTIONS", "BOZO_TORRENT", "BOZO_NZB", "MONTHLY_LIMIT", "COOLDOWN_LIMIT", "ACTIVE_LIMIT",
+        "INVALID_DEVICE", "DIFF_ISSUE", "LINK_OFFLINE",
+    )
+}
+
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+# Statuses telling that the request was refused before being processed, so even an add can be sent again.
+NOT_APPLIED_STATUS_CODES = (429, 503)
+
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is retried and how long to wait before the next attempt.
+
+    Delays grow exponentially with full jitter, a random delay between 0 and base_delay * 2 ** attempt, so clients
+    which failed together do not retry together. A Retry-After header sent by the API is respected. TorBox error
+    codes are looked up in error_rules first, the HTTP status decides for the codes which are not listed.
+
+    Requests which are not idempotent, the POST adding a torrent for example, may have been applied by TorBox
+    before a timeout or a server error, retrying them could add the download twice. They are only retried on
+    not_applied_status_codes, unless retry_non_idempotent is set.
+    Subclass and override should_retry or backoff for custom behaviour.
+    """
+
+    def __init__(self, max_retries: int = 1, base_delay: float = 0.5, max_delay: float = 30.0,
+                 deadline: Optional[float] = None, error_rules: Optional[Dict[str, bool]] = None,
+                 retry_status_codes: Iterable[int] = RETRY_STATUS_CODES, respect_retry_after: bool = True,
+                 retry_non_idempotent: bool = False,
+                 not_applied_status_codes: Iterable[int] = NOT_APPLIED_STATUS_CODES):
+        """
+        :param max_retries: Maximum number of retries after the first attempt.
+        :param base_delay: Delay cap in seconds of the first retry, it doubles with every retry.
+        :param max_delay: Maximum delay cap in seconds of a single retry.
+        :param deadline: Optional overall time budget in seconds for a request including its retries.
+                         A retry which cannot start within the deadline is not attempted.
+        :param error_rules: TorBox error codes mapped to whether they are retried, defaults to
+                            RETRY_ERROR_CODES and NEVER_RETRY_ERROR_CODES.
+        :param retry_status_codes: HTTP status codes which are retried when the error code has no rule.
+        :param respect_retry_after: Wait at least as long as the Retry-After header asks for.
+        :param retry_non_idempotent: Retry POST requests like GET requests, they may then be applied twice.
+        :param not_applied_status_codes: HTTP status codes on which POST requests are retried anyway, because the
+                                         API refused them without processing them.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.error_rules = error_rules if error_rules is not None else {**RETRY_ERROR_CODES, **NEVER_RETRY_ERROR_CODES}
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.respect_retry_after = respect_retry_after
+        self.retry_non_idempotent = retry_non_idempotent
+        self.not_applied_status_codes = frozenset(not_applied_status_codes)
+
+    def should_retry(self, attempt: int, error: Exception, status_code: Optional[int] = None,
+                     method: str = 'GET') -> bool:
+        """
+        :param attempt: Number of retries already done.
+        :param error: The error of the last attempt.
+        :param status_code: The HTTP status of the last attempt, None when no response was received.
+        :param method: The HTTP method of the request.
+        """
+        if attempt >= self.max_retries or isinstance(error, AccessTokenExpired):
+            return False
+
+        rule = self.error_rules.get(error.code) if isinstance(error, TorBoxException) else None
+
+        if rule is False:
+            return False
+
+        if method not in IDEMPOTENT_METHODS and not self.retry_non_idempotent:
+            return status_code in self.not_applied_status_codes
+
+        if rule is not None:
+            return rule
+
+        if status_code is None:
+            return self.is_transport_error(error)
+
+        return status_code in self.retry_status_codes
+
+    @staticmethod
+    def is_transport_error(error: Exception) -> bool:
+        """
+        Whether the error is a connection error or a timeout raised by the transport, and not a bug.
+        """
+        # Timeouts, connection errors and the errors of requests are all OSError.
+        if isinstance(error, (OSError, asyncio.TimeoutError)):
+            return True
+
+        # aiohttp is only checked when the transport loaded it.
+        aiohttp = sys.modules.get('aiohttp')
+        return aiohttp is not None and isinstance(error, aiohttp.ClientError)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Return the delay in seconds before the next attempt.
+
+        :param attempt: Number of retries already done.
+        :param retry_after: Seconds requested by the Retry-After header, if any.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+        if self.respect_retry_after and retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        Parse a Retry-After header, which holds either seconds or an HTTP date.
+        """
+        if not value:
+            return None
+
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+
+        # Imported here, email.utils is slow to import and HTTP dates are rare.
+        from email.utils import parsedate_to_datetime
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Runs a single call per key at a time, callers arriving while it runs await the same result.
+    Nothing is kept once the call completes, a later call with the same key runs again.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            pending = self._calls.get(key)
+            if pending is None:
+                break
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller running the call got cancelled, the call is started again.
+
+        self.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as ex:
+            future.set_exception(ex)
+            # Retrieved here so asyncio does not warn when nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
@@ -1,4 +1,5 @@
-from Models import AuthenticationType
+import copy
+from Models import AuthenticationType, DecodeMode
 
 
 class Store:
@@ -7,6 +8,12 @@ class Store:
         self.api_url = "https://api.torbox.app/v1/api/"
         self.app_id = int
         self.retry_count = 0
+        self.retry_policy = None
+        self.rate_limiter = None
+        self.circuit_breaker = None
+        self.link_cache = None
+        self.single_flight = None
+        self.request_hooks = ()
         self.authentication_type = None
         self.api_key = None
         self.device_code = None
@@ -14,6 +21,12 @@ class Store:
         self.oauth_client_id = None
         self.oauth_client_secret = None
         self.oauth_refresh_token = None
+        self.availability_cache = None
+        self.index_refresh_interval = None
+        self.decode_mode = DecodeMode.Raw
+
+    def copy(self):
+        return copy.copy(self)
 
     @property
     def bearer_token(self):
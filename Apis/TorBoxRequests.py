@@ -1,17 +1,24 @@
-import requests
 import json
+import time
 import asyncio
+from contextlib import AsyncExitStack
 from Exceptions import AccessTokenExpired, TorBoxException
+from Models import AuthenticationType
 from Apis import Store
-from typing import Optional, Tuple, TypeVar, Generic, Dict, Any, List
-import aiohttp
+from Apis.Transport import Transport
+from Apis.Multipart import MultipartBody
+from Apis.RetryPolicy import RetryPolicy
+from Apis.EndpointFamily import endpoint_family
+from Apis.JsonStream import JsonItemStream
+from Apis.RequestHooks import RequestInfo, body_size, notify_hooks
+from typing import Optional, Tuple, TypeVar, Generic, Dict, Any, List, AsyncIterator, Callable
 
 T = TypeVar('T')
 
 
 class TorBoxRequests:
-    def __init__(self, http_client: requests.Session, store: Store):
-        self._http_client = http_client
+    def __init__(self, transport: Transport, store: Store):
+        self._transport = transport
         self._store = store
 
     async def request(self, base_url: str,
@@ -20,54 +27,217 @@ class TorBoxRequests:
                       require_authentication: bool,
                       request_type: 'RequestType',
                       data: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
-        self._http_client.headers.pop("Authorization", None)
+        content, header_value = await self.request_content(base_url, url, header_output, require_authentication,
+                                                           request_type, data)
+        return content.decode('utf-8') if content is not None else None, header_value
 
-        if require_authentication:
-            self._http_client.headers["Authorization"] = f"Bearer {self._store.bearer_token}"
-
-        retry_count = 0
+    async def request_content(self, base_url: str,
+                              url: str,
+                              header_output: Optional[str],
+                              require_authentication: bool,
+                              request_type: 'RequestType',
+                              data: Optional[Dict[str, Any]]) -> Tuple[Optional[bytes], Optional[str]]:
+        if request_type not in (RequestType.Get, RequestType.Post):
+            raise ValueError("Invalid request type")
+
+        headers = self.build_headers(require_authentication)
+        policy = self.retry_policy
+        rate_limiter = self._store.rate_limiter
+        # TorBox limits every account separately, tenants sharing the limiter each have their own buckets.
+        account = self._store.bearer_token if rate_limiter is not None and require_authentication else None
+        circuit_breaker = self._store.circuit_breaker
+        family = endpoint_family(url)
+        # A body streamed from an async iterator is consumed by the first attempt.
+        replayable = not isinstance(data, MultipartBody) or data.replayable
+        started_at = time.monotonic()
+        # Hooks are skipped entirely when none is installed, the request path stays as cheap as without them.
+        hooks = self._store.request_hooks
+        request = None
+        sent_at = 0.0
+        if hooks:
+            request_bytes = body_size(data) if request_type == RequestType.Post else 0
+
+        attempt = 0
         while True:
+            status_code = None
+            retry_after = None
+
+            if rate_limiter is not None:
+                await rate_limiter.acquire(family, account)
+
+            # Fails fast with CircuitOpen, outside of the try so it is not retried.
+            if circuit_breaker is not None:
+                circuit_breaker.before_call(family)
+
+            if hooks:
+                request = RequestInfo(request_type, url, family, attempt, request_bytes)
+                notify_hooks(hooks, 'on_request_start', request)
+                sent_at = time.perf_counter()
+
             try:
-                if request_type == RequestType.Get:
-                    response = self._http_client.get(f"{base_url}{url}")
-                elif request_type == RequestType.Post:
-                    response = self._http_client.post(
-                        f"{base_url}{url}", data=data)
-                else:
-                    raise ValueError("Invalid request type")
+                response = await self._transport.send(request_type, f"{base_url}{url}", headers,
+                                                      data if request_type == RequestType.Post else None)
+                status_code = response.status_code
+                content = response.content
 
-                text = response.content.decode('utf-8')
+                if hooks:
+                    notify_hooks(hooks, 'on_request_end', request, status_code, len(content),
+                                 time.perf_counter() - sent_at)
 
-                if response.status_code == 401 and require_authentication and self._store.authentication_type == 'OAuth2':
-                    tor_box_exception = self.parse_tor_box_exception(text)
+                if response.status_code == 401 and require_authentication and self._store.authentication_type == AuthenticationType.OAuth2:
+                    tor_box_exception = self.parse_tor_box_exception(content.decode('utf-8'))
 
-                    if tor_box_exception and tor_box_exception.error == "BAD_TOKEN":
+                    if tor_box_exception and tor_box_exception.code == "BAD_TOKEN":
                         raise AccessTokenExpired()
 
                 if response.status_code == 204:
-                    text = None
+                    content = None
 
                 if not response.ok:
-                    tor_box_exception = self.parse_tor_box_exception(text)
+                    retry_after = RetryPolicy.parse_retry_after(response.headers.get("Retry-After"))
+                    if response.status_code == 429 and rate_limiter is not None:
+                        # Hold back every caller of this family, not only the one which was rejected.
+                        rate_limiter.pause(family, retry_after or policy.base_delay, account)
+                    raise self.response_exception(response.status_code, content)
 
-                    if tor_box_exception:
-                        raise tor_box_exception
-                    else:
-                        raise Exception(text)
+                if circuit_breaker is not None:
+                    circuit_breaker.record(family)
 
                 if header_output:
                     header_value = response.headers.get(header_output)
-                    return text, header_value
-
-                return text, None
-            except TorBoxException:
+                    return content, header_value
+
+                return content, None
+            except asyncio.CancelledError as ex:
+                if circuit_breaker is not None:
+                    circuit_breaker.release(family)
+                if hooks:
+                    notify_hooks(hooks, 'on_request_error', request, ex, status_code, time.perf_counter() - sent_at)
                 raise
-            except Exception:
-                if retry_count >= self._store.retry_count:
+            except Exception as ex:
+                if circuit_breaker is not None:
+                    circuit_breaker.record(family, ex, status_code)
+
+                if hooks:
+                    notify_hooks(hooks, 'on_request_error', request, ex, status_code, time.perf_counter() - sent_at)
+
+                if not replayable or not policy.should_retry(attempt, ex, status_code, request_type):
+                    raise
+
+                delay = policy.backoff(attempt, retry_after)
+                if policy.deadline is not None and time.monotonic() - started_at + delay > policy.deadline:
                     raise
 
-                retry_count += 1
-                await asyncio.sleep(1 * retry_count)
+                if hooks:
+                    notify_hooks(hooks, 'on_retry', request, delay, ex)
+
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        return self._store.retry_policy or RetryPolicy(max_retries=self._store.retry_count)
+
+    def response_exception(self, status_code: int, content: Optional[bytes]) -> Exception:
+        text = content.decode('utf-8') if content is not None else None
+        tor_box_exception = self.parse_tor_box_exception(text)
+
+        if tor_box_exception:
+            tor_box_exception.status_code = status_code
+            return tor_box_exception
+        else:
+            return Exception(text)
+
+    async def stream_items_async(self, url: str, require_authentication: bool, key: str = 'data') -> AsyncIterator[Any]:
+        """
+        Yield the items of the list stored under key in the response, while the response is being downloaded.
+        Streams are not retried, items may already have been handed out when a failure happens.
+        """
+        headers = self.build_headers(require_authentication)
+        circuit_breaker = self._store.circuit_breaker
+        hooks = self._store.request_hooks
+        family = endpoint_family(url)
+
+        if self._store.rate_limiter is not None:
+            await self._store.rate_limiter.acquire(family,
+                                                   self._store.bearer_token if require_authentication else None)
+
+        if circuit_breaker is not None:
+            circuit_breaker.before_call(family)
+
+        request = RequestInfo(RequestType.Get, url, family) if hooks else None
+        notify_hooks(hooks, 'on_request_start', request)
+        sent_at = time.perf_counter()
+
+        def request_error(error: BaseException, status_code: Optional[int] = None):
+            notify_hooks(hooks, 'on_request_error', request, error, status_code, time.perf_counter() - sent_at)
+
+        async with AsyncExitStack() as stack:
+            try:
+                response = await stack.enter_async_context(
+                    self._transport.stream(RequestType.Get, f"{self._store.api_url}{url}", headers))
+            except asyncio.CancelledError as ex:
+                if circuit_breaker is not None:
+                    circuit_breaker.release(family)
+                request_error(ex)
+                raise
+            except Exception as ex:
+                if circuit_breaker is not None:
+                    circuit_breaker.record(family, ex)
+                request_error(ex)
+                raise
+
+            if not response.ok:
+                content = await response.read()
+                error = self.response_exception(response.status_code, content)
+                if circuit_breaker is not None:
+                    circuit_breaker.record(family, error, response.status_code)
+                notify_hooks(hooks, 'on_request_end', request, response.status_code, len(content),
+                             time.perf_counter() - sent_at)
+                request_error(error, response.status_code)
+                raise error
+
+            if circuit_breaker is not None:
+                circuit_breaker.record(family)
+
+            items = JsonItemStream(key)
+            received = 0
+            decode_seconds = 0.0
+            failed = False
+            try:
+                async for chunk in response.iter_chunks():
+                    if hooks:
+                        received += len(chunk)
+                        decode_started_at = time.perf_counter()
+                        chunk_items = items.feed(chunk)
+                        decode_seconds += time.perf_counter() - decode_started_at
+                    else:
+                        chunk_items = items.feed(chunk)
+
+                    for item in chunk_items:
+                        yield item
+
+                for item in items.close():
+                    yield item
+            except Exception as ex:
+                failed = True
+                request_error(ex, response.status_code)
+                raise
+            finally:
+                # Also reached when the caller stops iterating early, the bytes read so far are reported.
+                if hooks and not failed:
+                    notify_hooks(hooks, 'on_request_end', request, response.status_code, received,
+                                 time.perf_counter() - sent_at)
+                    notify_hooks(hooks, 'on_decode', family, decode_seconds)
+
+    def build_headers(self, require_authentication: bool) -> Dict[str, str]:
+        # Headers are built for every request, the transport is shared between clients and concurrent calls.
+        headers = {}
+
+        if require_authentication:
+            headers["Authorization"] = f"Bearer {self._store.bearer_token}"
+
+        return headers
 
     async def request_generic(self, base_url: str,
                               url: str,
@@ -80,6 +250,8 @@ class TorBoxRequests:
             return T()
 
         try:
+            if self._store.request_hooks:
+                return self._timed_decode(url, json.loads, result)
             return json.loads(result)
         except json.JSONDecodeError as ex:
             raise json.JSONDecodeError(
@@ -103,6 +275,31 @@ class TorBoxRequests:
         text, _ = await self.request(self._store.api_url, url, None, require_authentication, RequestType.Get, None)
         return text
 
+    async def get_request_content_async(self, url: str, require_authentication: bool) -> Optional[bytes]:
+        content, _ = await self.request_content(self._store.api_url, url, None, require_authentication, RequestType.Get, None)
+        return content
+
+    async def get_request_parsed_async(self, url: str, require_authentication: bool,
+                                       parse: Callable[[Optional[bytes]], T]) -> T:
+        """
+        GET the url and parse the response body.
+        With single flight enabled, concurrent calls for the same account and url share one request and receive
+        the same parsed result, callers requesting the same url must therefore parse it the same way.
+        """
+        single_flight = self._store.single_flight
+
+        async def call() -> T:
+            content = await self.get_request_content_async(url, require_authentication)
+            if self._store.request_hooks:
+                return self._timed_decode(url, parse, content)
+            return parse(content)
+
+        if single_flight is None:
+            return await call()
+
+        key = (self._store.bearer_token if require_authentication else None, self._store.decode_mode, url)
+        return await single_flight.do(key, call)
+
     async def get_request_async_generic(self, url: str, require_authentication: bool) -> T:
         return await self.request_generic(self._store.api_url, url, require_authentication, RequestType.Get, None)
 
@@ -124,7 +321,9 @@ class TorBoxRequests:
         return await self.request_generic(self._store.api_url, url, require_authentication, RequestType.Post, data)
 
     async def post_request_multipart_async(self, url: str, data: Optional[Dict[str, Any]], require_authentication: bool) -> T:
-        return await self.request_generic(self._store.api_url, url, require_authentication, RequestType.Post, data)
+        # Files are (filename, source, content type) tuples, they are streamed while the request is sent.
+        content = MultipartBody(data or {})
+        return await self.request_generic(self._store.api_url, url, require_authentication, RequestType.Post, content)
 
     async def put_request_async(self, url: str, file: bytes, require_authentication: bool):
         content = file
@@ -137,6 +336,14 @@ class TorBoxRequests:
     async def delete_request_async(self, url: str, require_authentication: bool):
         await self.request(self._store.api_url, url, None, require_authentication, RequestType.Delete, None)
 
+    def _timed_decode(self, url: str, decode: Callable[[Any], T], content: Any) -> T:
+        started_at = time.perf_counter()
+        try:
+            return decode(content)
+        finally:
+            seconds = time.perf_counter() - started_at
+            notify_hooks(self._store.request_hooks, 'on_decode', endpoint_family(url), seconds)
+
     @staticmethod
     def parse_tor_box_exception(text: Optional[str]) -> Optional['TorBoxException']:
         try:
@@ -153,6 +360,18 @@ class TorBoxRequests:
             return None
 
 
+def page_parameters(offset: Optional[int], limit: Optional[int]) -> str:
+    """
+    Build the offset and limit query parameters of the list endpoints.
+    """
+    parameters = ""
+    if offset is not None:
+        parameters += f"&offset={offset}"
+    if limit is not None:
+        parameters += f"&limit={limit}"
+    return parameters
+
+
 class RequestType:
     Get = 'GET'
     Post = 'POST'
@@ -1,81 +1,226 @@
 import json
-import requests
+from functools import partial
+import asyncio
 from urllib.parse import urlencode
-from Apis import TorBoxRequests, Store
-from typing import List, Optional
-from Models import AvailableTorrent, QueuedTorrent, Response, TorrentAddResult, TorrentInfoResult
+from Apis import TorBoxRequests, Store, Transport
+from Apis.TorBoxRequests import page_parameters
+from Exceptions import DownloadError, TorBoxException
+from Apis.DownloadIndex import DownloadIndex, get_field
+from Apis.Watcher import Watcher
+from Apis.ColumnarSnapshot import ColumnarSnapshot
+from Apis.Decoder import Decoder, LazyModel
+from Apis.Pagination import iter_pages, DEFAULT_PAGE_SIZE
+from Apis.Availability import check_cached_many, check_cached_response, CHECKCACHED_BATCH_SIZE, CHECKCACHED_MAX_CONCURRENCY
+from Apis.Downloader import Downloader, DownloadTarget, target_path, DOWNLOAD_CONNECTIONS, DOWNLOAD_SEGMENT_SIZE
+from Apis.BulkSubmit import BulkResult, submit_many, BULK_MAX_CONCURRENCY
+from Apis.Multipart import UploadSource, read_source, source_name
+from Apis.InfoHash import magnet_info_hash, magnet_link, torrent_metadata
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Set, Union
+from Models import AvailableTorrent, DecodeMode, QueuedTorrent, Response, TorrentAddResult, TorrentInfoResult
+
+
+def queued_to_info_result(torrent: QueuedTorrent) -> TorrentInfoResult:
+    # A queued torrent only carries a few of the info fields, the model is constructed without validation.
+    return TorrentInfoResult.model_construct(
+        id=torrent.id,
+        auth_id=torrent.auth_id,
+        hash=torrent.hash,
+        name=torrent.name,
+        magnet=torrent.magnet,
+        created_at=torrent.created_at,
+        download_state="queued",
+        torrent_file=torrent.torrent_file is not None,
+        progress=0.0,
+        files=[],
+        download_speed=0,
+        seeds=0,
+        updated_at=torrent.created_at
+    )
+
+
+def to_info_result(torrent: Any) -> TorrentInfoResult:
+    if isinstance(torrent, TorrentInfoResult):
+        return torrent
+    if isinstance(torrent, LazyModel):
+        return torrent.model()
+    if torrent.get('download_state') == "queued":
+        return queued_to_info_result(QueuedTorrent.model_validate(torrent))
+    return TorrentInfoResult.model_validate(torrent)
 
 
 class TorrentsApi:
-    def __init__(self, http_client: requests.Session, store: Store):
-        self._requests = TorBoxRequests(http_client, store)
+    def __init__(self, transport: Transport, store: Store):
+        self._requests = TorBoxRequests(transport, store)
+        self._transport = transport
         self._store = store
+        self._decoder = Decoder(store.decode_mode)
+        self.index = None
+        # One poller per account, shared by everyone waiting for a download of this account.
+        self.watcher = Watcher(self._load_index_async)
+
+        if store.index_refresh_interval is not None:
+            self.index = DownloadIndex(self._load_index_async, store.index_refresh_interval)
+
+    async def _load_index_async(self, skip_cache: bool) -> List[Any]:
+        current_torrents, queued_torrents = await asyncio.gather(
+            self.get_current_async(skip_cache),
+            self.get_queued_async(skip_cache))
+        return [*(current_torrents or []), *(queued_torrents or [])]
+
+    async def get_current_async(self, skip_cache: bool = False, offset: Optional[int] = None,
+                                limit: Optional[int] = None) -> Optional[List[TorrentInfoResult]]:
+        return await self._requests.get_request_parsed_async(
+            f"torrents/mylist?bypass_cache={skip_cache}{page_parameters(offset, limit)}", True,
+            partial(self._decoder.decode_list, model=TorrentInfoResult))
+
+    async def iter_current_async(self, skip_cache: bool = False) -> AsyncIterator[Any]:
+        """
+        Yield the torrents of the account one by one while mylist is being downloaded.
+        Memory use does not grow with the size of the account. Items are dicts, LazyModel or TorrentInfoResult
+        depending on the decode mode of the client.
+        """
+        async for item in self._requests.stream_items_async(f"torrents/mylist?bypass_cache={skip_cache}", True):
+            yield self._decoder.decode_item(item, TorrentInfoResult)
+
+    async def snapshot_async(self, skip_cache: bool = False) -> ColumnarSnapshot:
+        """
+        Build a ColumnarSnapshot of the torrents and their files while mylist is being downloaded,
+        the decoded list is never held in memory.
+        """
+        snapshot = ColumnarSnapshot()
+        async for item in self._requests.stream_items_async(f"torrents/mylist?bypass_cache={skip_cache}", True):
+            snapshot.append(item)
+        return snapshot
 
-    async def get_current_async(self, skip_cache: bool = False) -> Optional[List[TorrentInfoResult]]:
-        list_response = await self._requests.get_request_async(f"torrents/mylist?bypass_cache={skip_cache}", True)
-        if list_response is None:
+    async def get_list_item_async(self, id: int, skip_cache: bool = False) -> Optional[TorrentInfoResult]:
+        """
+        Fetch a single torrent of mylist by its id, None when it is not in the account.
+        Queued torrents are not part of mylist.
+        """
+        try:
+            return await self._requests.get_request_parsed_async(
+                f"torrents/mylist?id={id}&bypass_cache={skip_cache}", True, self._parse_list_item)
+        except TorBoxException as ex:
+            if ex.code == "ITEM_NOT_FOUND":
+                return None
+            raise
+
+    def _parse_list_item(self, content: Optional[bytes]) -> Optional[TorrentInfoResult]:
+        if content is None:
             return None
-        return json.loads(list_response).get('data')
+        return self._decoder.decode_item(json.loads(content).get('data') or None, TorrentInfoResult)
+
+    async def get_queued_async(self, skip_cache: bool = False, offset: Optional[int] = None,
+                               limit: Optional[int] = None) -> Optional[List[TorrentInfoResult]]:
+        return await self._requests.get_request_parsed_async(
+            f"torrents/getqueued?bypass_cache={skip_cache}{page_parameters(offset, limit)}", True,
+            self._parse_queued)
 
-    async def get_queued_async(self, skip_cache: bool = False) -> Optional[List[TorrentInfoResult]]:
-        list_response = await self._requests.get_request_async("torrents/getqueued", True)
-        if list_response is None:
+    def _parse_queued(self, content: Optional[bytes]) -> Optional[List[TorrentInfoResult]]:
+        if content is None:
             return None
-        queued_torrents: List[QueuedTorrent] = json.loads(
-            list_response).get('data')
-        torrents = [
-            TorrentInfoResult(
-                id=torrent.id,
-                auth_id=torrent.auth_id,
-                hash=torrent.hash,
-                name=torrent.name,
-                magnet=torrent.magnet,
-                created_at=torrent.created_at,
-                download_state="queued",
-                torrent_file=torrent.torrent_file is not None,
-                progress=0.0,
-                files=[],
-                download_speed=0,
-                seeds=0,
-                updated_at=torrent.created_at
-            ) for torrent in queued_torrents
-        ]
-        return torrents
+        # Raw queued torrents are marked with their state, so they can be told apart from the ones in mylist.
+        queued_torrents = [{**torrent, 'download_state': "queued"}
+                           for torrent in json.loads(content).get('data') or []]
+        if self._decoder.mode == DecodeMode.Raw:
+            # Queued torrents have always been returned as TorrentInfoResult, the raw mode keeps them typed.
+            return [to_info_result(torrent) for torrent in queued_torrents]
+        return self._decoder.decode_items(queued_torrents, QueuedTorrent, queued_to_info_result)
+
+    def paginate_current_async(self, page_size: int = DEFAULT_PAGE_SIZE, skip_cache: bool = False,
+                               prefetch: bool = True) -> AsyncIterator[Any]:
+        """
+        Iterate over the torrents of the account one page at a time, the next page is fetched in the background.
+        """
+        return iter_pages(lambda offset, limit: self.get_current_async(skip_cache, offset, limit), page_size, prefetch)
+
+    def paginate_queued_async(self, page_size: int = DEFAULT_PAGE_SIZE, skip_cache: bool = False,
+                              prefetch: bool = True) -> AsyncIterator[Any]:
+        """
+        Iterate over the queued torrents of the account one page at a time,
+        the next page is fetched in the background.
+        """
+        return iter_pages(lambda offset, limit: self.get_queued_async(skip_cache, offset, limit), page_size, prefetch)
 
     async def get_id_info_async(self, id: int, skip_cache: bool = False) -> Optional[TorrentInfoResult]:
-        current_torrent = await self._requests.get_request_async(f"torrents/mylist?bypass_cache={skip_cache}", True)
-        if current_torrent:
-            torrent = json.loads(current_torrent).get('data')
-            if torrent:
-                return torrent
+        if self.index is not None:
+            if skip_cache:
+                await self.index.refresh(skip_cache)
+            torrent = await self.index.get_by_id(id)
+            return to_info_result(torrent) if torrent is not None else None
+        torrent = await self.get_list_item_async(id, skip_cache)
+        if torrent is not None:
+            return to_info_result(torrent)
+        # Queued torrents are not part of mylist until they are started.
         queued_torrents = await self.get_queued_async(skip_cache)
         if queued_torrents:
             for torrent in queued_torrents:
-                if torrent['id'] == id:
-                    return torrent
+                if get_field(torrent, 'id') == id:
+                    return to_info_result(torrent)
         return None
 
     async def get_hash_info_async(self, hash: str, skip_cache: bool = False) -> Optional[TorrentInfoResult]:
+        if self.index is not None:
+            if skip_cache:
+                await self.index.refresh(skip_cache)
+            torrent = await self.index.get_by_hash(hash)
+            return to_info_result(torrent) if torrent is not None else None
         current_torrents = await self.get_current_async(skip_cache)
         if current_torrents:
             for torrent in current_torrents:
-                if torrent['hash'] == hash:
-                    return torrent
+                if get_field(torrent, 'hash') == hash:
+                    return to_info_result(torrent)
         queued_torrents = await self.get_queued_async(skip_cache)
         if queued_torrents:
             for torrent in queued_torrents:
-                if torrent['hash'] == hash:
-                    return torrent
+                if get_field(torrent, 'hash') == hash:
+                    return to_info_result(torrent)
         return None
 
-    async def add_file_async(self, file: bytes, seeding: int = 1, allow_zip: bool = False, name: Optional[str] = None) -> Response[TorrentAddResult]:
+    async def add_file_async(self, file: UploadSource, seeding: int = 1, allow_zip: bool = False, name: Optional[str] = None,
+                             check_existing: bool = False, check_cached: bool = False) -> Response[TorrentAddResult]:
+        """
+        :param file: The torrent file as bytes, a path, a binary file object or an async iterable of bytes.
+                     The file is streamed while it is uploaded.
+        :param check_existing: Read the info-hash from the file and do not upload it when the torrent is already in
+                               the account, the existing torrent is returned instead.
+        :param check_cached: Read the info-hash from the file and add a cached torrent by its magnet link instead of
+                             uploading the file.
+        """
+        if check_existing or check_cached:
+            # Torrent files are small, reading one to get its info-hash is cheaper than an upload.
+            file = await read_source(file)
+            info_hash = torrent_metadata(file).info_hash
+            if info_hash is not None:
+                if check_existing:
+                    existing = await (self.index.get_by_hash(info_hash) if self.index is not None
+                                      else self.get_hash_info_async(info_hash))
+                    if existing is not None:
+                        return {
+                            "success": True,
+                            "error": None,
+                            "detail": "Torrent is already in the account, the file was not uploaded.",
+                            "data": {
+                                "hash": info_hash,
+                                "torrent_id": get_field(existing, 'id'),
+                                "auth_id": str(get_field(existing, 'auth_id')),
+                            }
+                        }
+
+                if check_cached:
+                    available = await self.get_availability_many_async([info_hash])
+                    if available.get(info_hash) is not None:
+                        return await self.add_magnet_async(magnet_link(info_hash, name), seeding, allow_zip, name)
+
         content = {
-            'file': ('torrent.torrent', file, 'application/x-bittorrent'),
+            'file': (source_name(file, 'torrent.torrent'), file, 'application/x-bittorrent'),
             'seed': str(seeding),
             'allow_zip': str(allow_zip),
             'name': name
         }
-        return await self._requests.post_request_multipart_async("torrents/createtorrent", content, True)
+        result = await self._requests.post_request_multipart_async("torrents/createtorrent", content, True)
+        self._invalidate_index()
+        return result
 
     async def add_magnet_async(self, magnet: str, seeding: int = 1, allow_zip: bool = False, name: Optional[str] = None) -> Response[TorrentAddResult]:
         data = {
@@ -84,22 +229,114 @@ class TorrentsApi:
             "allow_zip": str(allow_zip),
             "name": name
         }
-        return await self._requests.post_request_async_generic("torrents/createtorrent", data, True)
+        result = await self._requests.post_request_async_generic("torrents/createtorrent", data, True)
+        self._invalidate_index()
+        return result
+
+    def add_many_async(self, items: Union[Iterable[Union[str, bytes]], AsyncIterable[Union[str, bytes]]],
+                       seeding: int = 1, allow_zip: bool = False, skip_existing: bool = True,
+                       max_concurrency: int = BULK_MAX_CONCURRENCY) -> AsyncIterator[BulkResult]:
+        """
+        Add many torrents and yield a BulkResult per item as it completes, its result is a TorrentAddResult.
+
+        :param items: Magnet links (str) and torrent files (bytes).
+        :param skip_existing: Do not submit torrents whose info-hash is already in the account.
+        :param max_concurrency: Maximum number of torrents submitted at the same time, requests also go through
+                                the rate limiter of the client.
+        """
+        async def submit(item: Union[str, bytes]) -> TorrentAddResult:
+            if isinstance(item, bytes):
+                response = await self.add_file_async(item, seeding, allow_zip)
+            else:
+                response = await self.add_magnet_async(item, seeding, allow_zip)
+            return TorrentAddResult.model_validate((response or {}).get('data') or {})
+
+        return submit_many(items, submit, self._item_hash,
+                           self._existing_hashes_async if skip_existing else None, max_concurrency)
+
+    @staticmethod
+    def _item_hash(item: Union[str, bytes]) -> Optional[str]:
+        if isinstance(item, str):
+            return magnet_info_hash(item)
+        try:
+            return torrent_metadata(item).info_hash
+        except ValueError:
+            # Submitted anyway, TorBox reports the invalid torrent in the result of the item.
+            return None
+
+    async def _existing_hashes_async(self) -> Set[str]:
+        torrents = await self._load_index_async(True)
+        return {get_field(torrent, 'hash').lower() for torrent in torrents if get_field(torrent, 'hash')}
 
     async def control_async(self, hash: str, action: str) -> Response:
-        info = await self.get_hash_info_async(hash, skip_cache=True)
+        info = await self._find_hash_async(hash)
+        if info is None:
+            raise TorBoxException("ITEM_NOT_FOUND")
         data = {
-            'torrent_id': info['id'],
+            'torrent_id': get_field(info, 'id'),
             'operation': action
         }
         json_content = json.dumps(data)
-        endpoint = "torrents/controlqueued" if info['download_state'] == "queued" else "torrents/controltorrent"
-        return await self._requests.post_request_raw_async(endpoint, json_content, True)
+        endpoint = "torrents/controlqueued" if get_field(info, 'download_state') == "queued" else "torrents/controltorrent"
+        result = await self._requests.post_request_raw_async(endpoint, json_content, True)
+        if self.index is not None:
+            if action == "delete":
+                self.index.remove(info)
+            else:
+                # The state changed, a started queued torrent is then controlled with controltorrent.
+                self.index.invalidate()
+        return result
+
+    async def _find_hash_async(self, hash: str) -> Optional[TorrentInfoResult]:
+        if self.index is None:
+            return await self.get_hash_info_async(hash, skip_cache=True)
+        info = await self.index.get_by_hash(hash)
+        if info is None:
+            # The torrent may have been added after the last refresh of the index.
+            await self.index.refresh(skip_cache=True)
+            info = await self.index.get_by_hash(hash)
+        return info
+
+    def _invalidate_index(self):
+        if self.index is not None:
+            self.index.invalidate()
 
     async def get_availability_async(self, hash: str, list_files: bool = False) -> Response[List[AvailableTorrent]]:
+        """
+        Return the checkcached response for a single hash. With an availability cache the response is rebuilt from
+        the cached entries and only a miss calls the API.
+        """
+        cache = self._store.availability_cache
+        if cache is not None:
+            return await check_cached_response(self._requests, "torrents/checkcached", hash, list_files, AvailableTorrent, cache)
         return await self._requests.get_request_async(f"torrents/checkcached?hash={hash}&format=list&list_files={list_files}", True)
 
+    async def get_availability_many_async(self, hashes: Iterable[str], list_files: bool = False,
+                                          batch_size: int = CHECKCACHED_BATCH_SIZE,
+                                          max_concurrency: int = CHECKCACHED_MAX_CONCURRENCY) -> Dict[str, Optional[AvailableTorrent]]:
+        return await check_cached_many(self._requests, "torrents/checkcached", hashes, list_files, AvailableTorrent,
+                                       batch_size, max_concurrency, self._store.availability_cache)
+
     async def request_download_async(self, torrent_id: int, file_id: Optional[int], zip: bool = False) -> Response[str]:
+        link_cache = self._store.link_cache
+        if link_cache is None:
+            return await self._request_download_async(torrent_id, file_id, zip)
+
+        key = ("torrents", self._store.bearer_token, torrent_id, file_id, zip)
+        return await link_cache.get_or_fetch(key, partial(self._request_download_async, torrent_id, file_id, zip))
+
+    def invalidate_download_link(self, torrent_id: int, file_id: Optional[int], zip: bool = False):
+        """
+        Forget the cached link of a file, for example when fetching it returned 403 or 404.
+        """
+        if self._store.link_cache is not None:
+            self._store.link_cache.invalidate(("torrents", self._store.bearer_token, torrent_id, file_id, zip))
+
+    def _invalidate_link(self, link: str):
+        if self._store.link_cache is not None:
+            self._store.link_cache.invalidate_link(link)
+
+    async def _request_download_async(self, torrent_id: int, file_id: Optional[int], zip: bool = False) -> Response[str]:
         parameters = {
             'token': self._store.bearer_token,
             'torrent_id': str(torrent_id),
@@ -108,3 +345,34 @@ class TorrentsApi:
         }
         uri = f"torrents/requestdl?{urlencode(parameters)}"
         return await self._requests.get_request_async(uri, True)
+
+    async def _download_link_async(self, torrent_id: int, file_id: Optional[int], zip: bool = False) -> str:
+        response = json.loads(await self.request_download_async(torrent_id, file_id, zip))
+        return response['data']
+
+    async def download_async(self, torrent_id: int, directory: str, file_ids: Optional[Iterable[int]] = None,
+                             connections: int = DOWNLOAD_CONNECTIONS, segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+                             verify: bool = True, **options) -> List[str]:
+        """
+        Download the files of a torrent into a directory with parallel range requests and return their paths.
+        An interrupted download resumes from its checkpoint when called again.
+
+        :param file_ids: Optional ids of the files to download, all files by default.
+        :param connections: Maximum number of range requests in flight.
+        :param segment_size: Size in bytes of the part of a file fetched by a single range request.
+        :param verify: Check the md5 of every file reported by TorBox.
+        :param options: Other options passed to Downloader.
+        """
+        info = await self.get_id_info_async(torrent_id, skip_cache=True)
+        if info is None:
+            raise DownloadError(f"Torrent {torrent_id} was not found")
+
+        selected = set(file_ids) if file_ids is not None else None
+        targets = [DownloadTarget(target_path(directory, file.name), file.size,
+                                  partial(self._download_link_async, torrent_id, file.id), file.md5,
+                                  self._invalidate_link)
+                   for file in getattr(info, 'files', None) or [] if selected is None or file.id in selected]
+
+        downloader = Downloader(self._transport, self._requests.retry_policy, connections, segment_size,
+                                verify=verify, **options)
+        return await downloader.download_async(targets)
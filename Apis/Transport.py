@@ -0,0 +1,269 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Mapping, AsyncIterator, Iterator, Tuple, TYPE_CHECKING
+from Apis.Multipart import MultipartBody
+
+# aiohttp and requests are imported by the transport using them, a client never loads both.
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class TransportResponse:
+    """Represents a fully read HTTP response returned by a transport."""
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+
+class StreamingResponse:
+    """Represents an HTTP response whose body is read chunk by chunk."""
+
+    def __init__(self, status_code: int, headers: Mapping[str, str], chunks: AsyncIterator[bytes]):
+        self.status_code = status_code
+        self.headers = headers
+        self._chunks = chunks
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def iter_chunks(self) -> AsyncIterator[bytes]:
+        return self._chunks
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self._chunks])
+
+
+class Transport:
+    """
+    Base class for the HTTP transports used by TorBoxRequests.
+    A transport sends a single request and returns the complete response, headers are passed per request
+    so a single transport can be shared by every Api of a client.
+    """
+
+    async def send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                   data: Optional[Any] = None) -> TransportResponse:
+        raise NotImplementedError()
+
+    def stream(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, data: Optional[Any] = None,
+               chunk_size: int = STREAM_CHUNK_SIZE):
+        """
+        Send a request and return an async context manager yielding a StreamingResponse.
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        pass
+
+
+class AiohttpTransport(Transport):
+    """
+    Non-blocking transport backed by a pooled aiohttp.ClientSession.
+    The session is created lazily on first use, because it has to be bound to the running event loop.
+    """
+
+    def __init__(self, connection_limit: int = 100, connection_limit_per_host: int = 0,
+                 keepalive_timeout: float = 30.0, timeout: Optional[float] = None,
+                 session: Optional['aiohttp.ClientSession'] = None):
+        """
+        :param connection_limit: Maximum number of simultaneous connections in the pool, 0 for no limit.
+        :param connection_limit_per_host: Maximum number of simultaneous connections to the same host, 0 for no limit.
+        :param keepalive_timeout: Seconds an idle connection is kept alive for reuse.
+        :param timeout: Total timeout in seconds for a single request, None for no timeout.
+        :param session: Optional aiohttp.ClientSession if you want to use your own session.
+        """
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session = session
+        self._owns_session = session is None
+        self._loop = None
+        self._session_lock = threading.Lock()
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+
+        if self._session is not None and not self._owns_session:
+            return self._session
+
+        # The session is bound to the loop it was created on. The new session is in place before anything is awaited,
+        # so concurrent first calls on a loop share it, and the lock keeps loops on other threads from replacing it
+        # unseen. Only then the session of the previous loop is closed.
+        with self._session_lock:
+            if self._session is not None and self._loop is loop and not self._session.closed:
+                return self._session
+
+            old_session, old_loop = self._session, self._loop
+            connector = aiohttp.TCPConnector(limit=self.connection_limit,
+                                             limit_per_host=self.connection_limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._session = session
+            self._loop = loop
+
+        if old_loop is not loop:
+            await self._close(old_session, old_loop)
+
+        return session
+
+    async def _close_session(self):
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        await self._close(session, loop)
+
+    @staticmethod
+    async def _close(session: Optional['aiohttp.ClientSession'], loop: Optional[asyncio.AbstractEventLoop]):
+        if session is None or session.closed:
+            return
+
+        if loop is asyncio.get_running_loop() or loop.is_closed():
+            # aiohttp releases the pool of a closed loop without touching its connections.
+            await session.close()
+        else:
+            # The connections belong to a loop still alive on another thread, they are closed there.
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+    @staticmethod
+    def _body(headers: Optional[Dict[str, str]], data: Optional[Any]) -> Tuple[Optional[Dict[str, str]], Optional[Any]]:
+        if isinstance(data, MultipartBody):
+            return {**(headers or {}), **data.headers}, data.chunks()
+        if isinstance(data, dict):
+            # requests silently drops None values from form data, aiohttp refuses them.
+            return headers, {k: v for k, v in data.items() if v is not None}
+        return headers, data
+
+    async def send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                   data: Optional[Any] = None) -> TransportResponse:
+        session = await self._get_session()
+        headers, data = self._body(headers, data)
+        async with session.request(method, url, headers=headers, data=data) as response:
+            content = await response.read()
+            return TransportResponse(response.status, response.headers, content)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                     data: Optional[Any] = None, chunk_size: int = STREAM_CHUNK_SIZE):
+        session = await self._get_session()
+        headers, data = self._body(headers, data)
+        async with session.request(method, url, headers=headers, data=data) as response:
+            yield StreamingResponse(response.status, response.headers, response.content.iter_chunked(chunk_size))
+
+    async def close(self):
+        if self._owns_session:
+            await self._close_session()
+
+
+class RequestsTransport(Transport):
+    """
+    Fallback transport backed by a requests.Session.
+    The blocking calls are executed on the default executor so they do not block the event loop.
+    """
+
+    def __init__(self, http_client: Optional['requests.Session'] = None):
+        """
+        :param http_client: Optional requests.Session if you want to use your own Session.
+        """
+        if http_client is None:
+            import requests
+            http_client = requests.Session()
+
+        self._http_client = http_client
+
+    @property
+    def http_client(self) -> 'requests.Session':
+        return self._http_client
+
+    @staticmethod
+    def _body(headers: Optional[Dict[str, str]], data: Optional[Any]) -> Tuple[Optional[Dict[str, str]], Optional[Any]]:
+        if not isinstance(data, MultipartBody):
+            return headers, data
+
+        # requests sends from a worker thread, the chunks are produced on the event loop which is free meanwhile.
+        body = _SyncBody(data.chunks(), asyncio.get_running_loop(), data.content_length)
+        return {**(headers or {}), "Content-Type": data.content_type}, body if body.length is not None else iter(body)
+
+    async def send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                   data: Optional[Any] = None) -> TransportResponse:
+        headers, data = self._body(headers, data)
+        response = await asyncio.to_thread(self._http_client.request, method, url, headers=headers, data=data)
+        return TransportResponse(response.status_code, response.headers, response.content)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                     data: Optional[Any] = None, chunk_size: int = STREAM_CHUNK_SIZE):
+        headers, data = self._body(headers, data)
+        response = await asyncio.to_thread(self._http_client.request, method, url, headers=headers, data=data,
+                                           stream=True)
+
+        async def iter_chunks():
+            iterator = response.iter_content(chunk_size)
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, None)
+                if chunk is None:
+                    return
+                yield chunk
+
+        try:
+            yield StreamingResponse(response.status_code, response.headers, iter_chunks())
+        finally:
+            response.close()
+
+    async def close(self):
+        self._http_client.close()
+
+
+class _SyncBody:
+    """
+    Iterates an async iterator of chunks from a worker thread. requests reads the length from __len__ and sends
+    the body with a Content-Length, it is only iterated when the length is unknown and the body is sent chunked.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop, length: Optional[int]):
+        self._chunks = chunks
+        self._loop = loop
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(self._chunks.__anext__(), self._loop).result()
+            except StopAsyncIteration:
+                return
+
+
+def create_transport(transport: Optional[Any] = None, http_client: Optional['requests.Session'] = None,
+                     **options) -> Transport:
+    """
+    Resolve the transport selected on TorBoxPyClient.
+
+    :param transport: A Transport instance, "aiohttp" or "requests". Defaults to "aiohttp".
+    :param http_client: Optional requests.Session, selects the requests transport when given.
+    :param options: Options passed to AiohttpTransport.
+    """
+    if isinstance(transport, Transport):
+        return transport
+
+    if http_client is not None or transport == "requests":
+        return RequestsTransport(http_client)
+
+    if transport is None or transport == "aiohttp":
+        return AiohttpTransport(**options)
+
+    raise ValueError(f"Unknown transport: {transport}")
@@ -1,46 +1,130 @@
 import json
-import http.client
+from functools import partial
 from urllib.parse import urlencode
-from typing import List, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Set, Union
 from Models import AvailableUsenet, Response, UsenetAddResult, UsenetInfoResult
-from Apis import TorBoxRequests, Store
+from Apis import TorBoxRequests, Store, Transport
+from Apis.TorBoxRequests import page_parameters
+from Exceptions import DownloadError, TorBoxException
+from Apis.DownloadIndex import DownloadIndex, get_field
+from Apis.Watcher import Watcher
+from Apis.ColumnarSnapshot import ColumnarSnapshot
+from Apis.Decoder import Decoder, LazyModel
+from Apis.Pagination import iter_pages, DEFAULT_PAGE_SIZE
+from Apis.Availability import check_cached_many, check_cached_response, CHECKCACHED_BATCH_SIZE, CHECKCACHED_MAX_CONCURRENCY
+from Apis.Multipart import UploadSource, source_name
+from Apis.Downloader import Downloader, DownloadTarget, target_path, DOWNLOAD_CONNECTIONS, DOWNLOAD_SEGMENT_SIZE
+from Apis.BulkSubmit import BulkResult, submit_many, BULK_MAX_CONCURRENCY
+
+
+def to_info_result(download: Any) -> UsenetInfoResult:
+    if isinstance(download, UsenetInfoResult):
+        return download
+    if isinstance(download, LazyModel):
+        return download.model()
+    return UsenetInfoResult.model_validate(download)
 
 
 class UsenetApi:
-    def __init__(self, http_client: http.client.HTTPConnection, store: Store):
-        self._requests = TorBoxRequests(http_client, store)
+    def __init__(self, transport: Transport, store: Store):
+        self._requests = TorBoxRequests(transport, store)
+        self._transport = transport
         self._store = store
+        self._decoder = Decoder(store.decode_mode)
+        self.index = None
+        # One poller per account, shared by everyone waiting for a download of this account.
+        self.watcher = Watcher(self.get_current_async)
 
-    async def get_current_async(self, skip_cache: bool = False) -> Optional[List[UsenetInfoResult]]:
-        list_data = await self._requests.get_request_async(f"usenet/mylist?bypass_cache={skip_cache}", True)
+        if store.index_refresh_interval is not None:
+            self.index = DownloadIndex(self.get_current_async, store.index_refresh_interval)
 
-        if list_data is None:
-            return None
+    async def get_current_async(self, skip_cache: bool = False, offset: Optional[int] = None,
+                                limit: Optional[int] = None) -> Optional[List[UsenetInfoResult]]:
+        return await self._requests.get_request_parsed_async(
+            f"usenet/mylist?bypass_cache={skip_cache}{page_parameters(offset, limit)}", True,
+            partial(self._decoder.decode_list, model=UsenetInfoResult))
 
-        return json.loads(list_data).get('data')
+    async def iter_current_async(self, skip_cache: bool = False) -> AsyncIterator[Any]:
+        """
+        Yield the usenet downloads of the account one by one while mylist is being downloaded.
+        Memory use does not grow with the size of the account. Items are dicts, LazyModel or UsenetInfoResult
+        depending on the decode mode of the client.
+        """
+        async for item in self._requests.stream_items_async(f"usenet/mylist?bypass_cache={skip_cache}", True):
+            yield self._decoder.decode_item(item, UsenetInfoResult)
 
-    async def get_hash_info_async(self, hash: str, skip_cache: bool = False) -> Optional[UsenetInfoResult]:
-        current_downloads = await self.get_current_async(skip_cache)
+    async def snapshot_async(self, skip_cache: bool = False) -> ColumnarSnapshot:
+        """
+        Build a ColumnarSnapshot of the usenet downloads and their files while mylist is being downloaded,
+        the decoded list is never held in memory.
+        """
+        snapshot = ColumnarSnapshot()
+        async for item in self._requests.stream_items_async(f"usenet/mylist?bypass_cache={skip_cache}", True):
+            snapshot.append(item)
+        return snapshot
 
-        if current_downloads is None:
+    async def get_list_item_async(self, id: int, skip_cache: bool = False) -> Optional[UsenetInfoResult]:
+        """
+        Fetch a single usenet download of mylist by its id, None when it is not in the account.
+        """
+        try:
+            return await self._requests.get_request_parsed_async(
+                f"usenet/mylist?id={id}&bypass_cache={skip_cache}", True, self._parse_list_item)
+        except TorBoxException as ex:
+            if ex.code == "ITEM_NOT_FOUND":
+                return None
+            raise
+
+    def _parse_list_item(self, content: Optional[bytes]) -> Optional[UsenetInfoResult]:
+        if content is None:
             return None
 
-        return next((item for item in current_downloads if item.hash == hash), None)
+        return self._decoder.decode_item(json.loads(content).get('data') or None, UsenetInfoResult)
+
+    def paginate_current_async(self, page_size: int = DEFAULT_PAGE_SIZE, skip_cache: bool = False,
+                               prefetch: bool = True) -> AsyncIterator[Any]:
+        """
+        Iterate over the usenet downloads of the account one page at a time,
+        the next page is fetched in the background.
+        """
+        return iter_pages(lambda offset, limit: self.get_current_async(skip_cache, offset, limit), page_size, prefetch)
+
+    async def get_hash_info_async(self, hash: str, skip_cache: bool = False) -> Optional[UsenetInfoResult]:
+        if self.index is not None:
+            if skip_cache:
+                await self.index.refresh(skip_cache)
+            current_download = await self.index.get_by_hash(hash)
+        else:
+            current_downloads = await self.get_current_async(skip_cache) or []
+            current_download = next((item for item in current_downloads if get_field(item, 'hash') == hash), None)
+
+        return to_info_result(current_download) if current_download is not None else None
 
     async def get_id_info_async(self, id: int, skip_cache: bool = False) -> Optional[UsenetInfoResult]:
-        current_download = await self._requests.get_request_async(f"usenet/mylist?bypass_cache={skip_cache}", True)
+        if self.index is not None:
+            if skip_cache:
+                await self.index.refresh(skip_cache)
+            current_download = await self.index.get_by_id(id)
+        else:
+            current_download = await self.get_list_item_async(id, skip_cache)
 
-        return current_download.get('data') if current_download else None
+        return to_info_result(current_download) if current_download is not None else None
 
-    async def add_file_async(self, file: bytes, post_processing: int = -1, name: Optional[str] = None, password: Optional[str] = None) -> Response[UsenetAddResult]:
+    async def add_file_async(self, file: UploadSource, post_processing: int = -1, name: Optional[str] = None, password: Optional[str] = None) -> Response[UsenetAddResult]:
+        """
+        :param file: The NZB file as bytes, a path, a binary file object or an async iterable of bytes.
+                     The file is streamed while it is uploaded.
+        """
         content = {
-            'file': ('nzb.nzb', file, 'application/x-nzb'),
+            'file': (source_name(file, 'nzb.nzb'), file, 'application/x-nzb'),
             'post_processing': str(post_processing),
             'name': name,
             'password': password
         }
 
-        return await self._requests.post_request_multipart_async("usenet/createusenetdownload", content, True)
+        result = await self._requests.post_request_multipart_async("usenet/createusenetdownload", content, True)
+        self._invalidate_index()
+        return result
 
     async def add_link_async(self, link: str, post_processing: int = -1, name: Optional[str] = None, password: Optional[str] = None) -> Response[UsenetAddResult]:
         data = {
@@ -50,24 +134,116 @@ class UsenetApi:
             'password': password
         }
 
-        return await self._requests.post_request_async("usenet/createusenetdownload", data, True)
+        result = await self._requests.post_request_async_generic("usenet/createusenetdownload", data, True)
+        self._invalidate_index()
+        return result
+
+    def add_many_async(self, items: Union[Iterable[Union[str, bytes]], AsyncIterable[Union[str, bytes]]],
+                       post_processing: int = -1, password: Optional[str] = None, skip_existing: bool = True,
+                       max_concurrency: int = BULK_MAX_CONCURRENCY) -> AsyncIterator[BulkResult]:
+        """
+        Add many usenet downloads and yield a BulkResult per item as it completes, its result is a UsenetAddResult.
+
+        :param items: Links to NZB files (str) and NZB files (bytes).
+        :param skip_existing: Do not submit links which are already the original url of a download in the account.
+        :param max_concurrency: Maximum number of downloads submitted at the same time, requests also go through
+                                the rate limiter of the client.
+        """
+        async def submit(item: Union[str, bytes]) -> UsenetAddResult:
+            if isinstance(item, bytes):
+                response = await self.add_file_async(item, post_processing, password=password)
+            else:
+                response = await self.add_link_async(item, post_processing, password=password)
+            return UsenetAddResult.model_validate((response or {}).get('data') or {})
+
+        return submit_many(items, submit, self._item_key,
+                           self._existing_keys_async if skip_existing else None, max_concurrency)
+
+    @staticmethod
+    def _item_key(item: Union[str, bytes]) -> Optional[str]:
+        # The hash of a usenet download is computed by TorBox, links are identified by the link itself.
+        return item.strip() if isinstance(item, str) else None
+
+    async def _existing_keys_async(self) -> Set[str]:
+        downloads = await self.get_current_async(True)
+        return {get_field(download, 'original_url') for download in downloads or [] if get_field(download, 'original_url')}
 
     async def control_async(self, hash: str, action: str, all: bool = False) -> Response:
-        info = await self.get_hash_info_async(hash, skip_cache=True)
+        info = await self._find_hash_async(hash)
+        if info is None and not all:
+            raise TorBoxException("ITEM_NOT_FOUND")
 
         data = {
-            'usenet_id': info.id if info else None,
+            'usenet_id': get_field(info, 'id') if info else None,
             'operation': action,
             'all': all
         }
 
         json_content = json.dumps(data)
-        return await self._requests.post_request_raw_async("usenet/controlusenetdownload", json_content, True)
+        result = await self._requests.post_request_raw_async("usenet/controlusenetdownload", json_content, True)
+
+        if self.index is not None:
+            if info is not None and action == "delete" and not all:
+                self.index.remove(info)
+            else:
+                # The state of the download, or of all of them, changed.
+                self.index.invalidate()
+
+        return result
+
+    async def _find_hash_async(self, hash: str) -> Optional[UsenetInfoResult]:
+        if self.index is None:
+            return await self.get_hash_info_async(hash, skip_cache=True)
+
+        info = await self.index.get_by_hash(hash)
+
+        if info is None:
+            # The download may have been added after the last refresh of the index.
+            await self.index.refresh(skip_cache=True)
+            info = await self.index.get_by_hash(hash)
+
+        return info
+
+    def _invalidate_index(self):
+        if self.index is not None:
+            self.index.invalidate()
 
     async def get_availability_async(self, hash: str, list_files: bool = False) -> Response[List[Optional[AvailableUsenet]]]:
+        """
+        Return the checkcached response for a single hash. With an availability cache the response is rebuilt from
+        the cached entries and only a miss calls the API.
+        """
+        cache = self._store.availability_cache
+        if cache is not None:
+            return await check_cached_response(self._requests, "usenet/checkcached", hash, list_files, AvailableUsenet, cache)
         return await self._requests.get_request_async(f"usenet/checkcached?hash={hash}&format=list&list_files={list_files}", True)
 
+    async def get_availability_many_async(self, hashes: Iterable[str], list_files: bool = False,
+                                          batch_size: int = CHECKCACHED_BATCH_SIZE,
+                                          max_concurrency: int = CHECKCACHED_MAX_CONCURRENCY) -> Dict[str, Optional[AvailableUsenet]]:
+        return await check_cached_many(self._requests, "usenet/checkcached", hashes, list_files, AvailableUsenet,
+                                       batch_size, max_concurrency, self._store.availability_cache)
+
     async def request_download_async(self, usenet_id: int, file_id: Optional[int], zip: bool = False) -> Response[str]:
+        link_cache = self._store.link_cache
+        if link_cache is None:
+            return await self._request_download_async(usenet_id, file_id, zip)
+
+        key = ("usenet", self._store.bearer_token, usenet_id, file_id, zip)
+        return await link_cache.get_or_fetch(key, partial(self._request_download_async, usenet_id, file_id, zip))
+
+    def invalidate_download_link(self, usenet_id: int, file_id: Optional[int], zip: bool = False):
+        """
+        Forget the cached link of a file, for example when fetching it returned 403 or 404.
+        """
+        if self._store.link_cache is not None:
+            self._store.link_cache.invalidate(("usenet", self._store.bearer_token, usenet_id, file_id, zip))
+
+    def _invalidate_link(self, link: str):
+        if self._store.link_cache is not None:
+            self._store.link_cache.invalidate_link(link)
+
+    async def _request_download_async(self, usenet_id: int, file_id: Optional[int], zip: bool = False) -> Response[str]:
         parameters = {
             'token': self._store.bearer_token,
             'usenet_id': str(usenet_id),
@@ -77,3 +253,34 @@ class UsenetApi:
 
         uri = f"usenet/requestdl?{urlencode(parameters)}"
         return await self._requests.get_request_async(uri, True)
+
+    async def _download_link_async(self, usenet_id: int, file_id: Optional[int], zip: bool = False) -> str:
+        response = json.loads(await self.request_download_async(usenet_id, file_id, zip))
+        return response['data']
+
+    async def download_async(self, usenet_id: int, directory: str, file_ids: Optional[Iterable[int]] = None,
+                             connections: int = DOWNLOAD_CONNECTIONS, segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+                             verify: bool = True, **options) -> List[str]:
+        """
+        Download the files of a usenet download into a directory with parallel range requests and return their paths.
+        An interrupted download resumes from its checkpoint when called again.
+
+        :param file_ids: Optional ids of the files to download, all files by default.
+        :param connections: Maximum number of range requests in flight.
+        :param segment_size: Size in bytes of the part of a file fetched by a single range request.
+        :param verify: Check the md5 of every file reported by TorBox.
+        :param options: Other options passed to Downloader.
+        """
+        info = await self.get_id_info_async(usenet_id, skip_cache=True)
+        if info is None:
+            raise DownloadError(f"Usenet download {usenet_id} was not found")
+
+        selected = set(file_ids) if file_ids is not None else None
+        targets = [DownloadTarget(target_path(directory, file.name), file.size,
+                                  partial(self._download_link_async, usenet_id, file.id), file.md5,
+                                  self._invalidate_link)
+                   for file in getattr(info, 'files', None) or [] if selected is None or file.id in selected]
+
+        downloader = Downloader(self._transport, self._requests.retry_policy, connections, segment_size,
+                                verify=verify, **options)
+        return await downloader.download_async(targets)
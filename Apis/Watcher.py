@@ -0,0 +1,250 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+from Apis.DownloadIndex import get_field
+from Exceptions import TorBoxException
+
+FINISHED = "finished"
+
+# Download states in which nothing changes until the user acts, watching them does not need fast polling.
+IDLE_STATES = frozenset(("paused", "stalled", "stalled (no seeds)", "error", "failed", "completed", "cached"))
+
+
+def item_state(item: Any) -> Optional[str]:
+    return get_field(item, 'download_state') if item is not None else None
+
+
+def is_finished(item: Any) -> bool:
+    return bool(get_field(item, 'download_finished')) or item_state(item) in ("completed", "cached")
+
+
+def matches(item: Any, state: Union[str, Callable[[Any], bool]]) -> bool:
+    if callable(state):
+        return state(item)
+    if state == FINISHED:
+        return is_finished(item)
+    return item_state(item) == state
+
+
+class WatchEvent:
+    """
+    A change of a download seen by the Watcher.
+
+    :ivar hash: Lowercase hash of the download.
+    :ivar old_state: The previous download_state, None when the download was added.
+    :ivar new_state: The current download_state, None when the download was removed.
+    :ivar item: The current item, or the last known item when it was removed.
+    """
+
+    def __init__(self, hash: str, old_state: Optional[str], new_state: Optional[str], item: Any):
+        self.hash = hash
+        self.old_state = old_state
+        self.new_state = new_state
+        self.item = item
+
+    def __repr__(self) -> str:
+        return f"WatchEvent(hash={self.hash!r}, {self.old_state!r} -> {self.new_state!r})"
+
+
+class Watcher:
+    """
+    Polls the downloads of an account on behalf of every waiter and subscriber, so any number of them cost a single
+    poll. The poller only runs while someone is waiting or subscribed.
+
+    The interval adapts to the watched downloads: min_interval while one of them is progressing or a waited for
+    download is not listed yet, the smallest eta when it is longer, and an interval doubling up to max_interval while
+    nothing is progressing or polls fail. A waiter for an unlisted download polls early, never sooner than
+    min_interval after the last poll.
+    """
+
+    def __init__(self, loader: Callable[[bool], Awaitable[Optional[Iterable[Any]]]], min_interval: float = 2.0,
+                 max_interval: float = 60.0):
+        """
+        :param loader: Coroutine function returning every download of the account, it receives the skip_cache flag.
+        :param min_interval: Seconds between polls while a watched download is progressing.
+        :param max_interval: Maximum seconds between polls.
+        """
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("intervals must be positive and min_interval at most max_interval")
+
+        self._loader = loader
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.polls = 0
+        self.last_error: Optional[Exception] = None
+        self._items: Optional[Dict[str, Any]] = None
+        self._waiters: Dict[str, List[Any]] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def wait_for(self, hash: str, state: Union[str, Callable[[Any], bool]] = FINISHED,
+                       timeout: Optional[float] = None) -> Any:
+        """
+        Wait until the download with the hash reaches a state and return its item.
+
+        :param state: A download_state, FINISHED for a finished download, or a function receiving the item.
+        :param timeout: Optional seconds after which asyncio.TimeoutError is raised.
+        :raises TorBoxException: ITEM_NOT_FOUND when the download is removed while waiting.
+        """
+        hash = hash.lower()
+        item = self._items.get(hash) if self._items is not None and self.running else None
+        if item is not None and matches(item, state):
+            return item
+
+        waiter = asyncio.get_running_loop().create_future()
+        # The last flag records whether the download was seen, so its removal can be told from it not being listed yet.
+        entry = [state, waiter, item is not None]
+        self._waiters.setdefault(hash, []).append(entry)
+        # A download in the snapshot is checked by the next scheduled poll, only an unknown one is worth an early poll.
+        self._ensure_running(wake=self._items is None or hash not in self._items)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        finally:
+            waiters = self._waiters.get(hash)
+            if waiters is not None:
+                waiters.remove(entry)
+                if not waiters:
+                    del self._waiters[hash]
+            self._stop_if_unused()
+
+    async def events(self) -> AsyncIterator[WatchEvent]:
+        """
+        Yield every change of a download of the account, starting with the changes after the first poll.
+        """
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        self._ensure_running(wake=False)
+
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+            self._stop_if_unused()
+
+    def _ensure_running(self, wake: bool):
+        if wake:
+            self._wake.set()
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    def _stop_if_unused(self):
+        # Wake the poller so it notices nobody is left instead of sleeping through a long interval.
+        if not self._waiters and not self._subscribers:
+            self._wake.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._waiters or self._subscribers:
+                self._wake.clear()
+                started = loop.time()
+                await self.poll()
+
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+
+                # A wake polls early, but never sooner than min_interval after the last poll.
+                delay = started + self.min_interval - loop.time()
+                if delay > 0 and (self._waiters or self._subscribers):
+                    await asyncio.sleep(delay)
+        finally:
+            # The snapshot is only current while the poller runs. Kept, it would answer wait_for from old data
+            # and show a new subscriber changes which happened before it subscribed.
+            self._items = None
+
+    async def poll(self):
+        """
+        Load the downloads once, emit the changes and resolve the waiters.
+        """
+        self.polls += 1
+        try:
+            items = await self._loader(True)
+        except Exception as ex:
+            self.last_error = ex
+            self.interval = min(self.interval * 2, self.max_interval)
+            return
+
+        self.last_error = None
+        current = {}
+        for item in items or []:
+            hash = get_field(item, 'hash')
+            if hash:
+                current.setdefault(hash.lower(), item)
+
+        if self._items is not None:
+            self._emit_changes(self._items, current)
+        self._items = current
+
+        self._resolve_waiters()
+        self.interval = self._next_interval()
+
+    def _emit_changes(self, previous: Dict[str, Any], current: Dict[str, Any]):
+        if not self._subscribers:
+            return
+
+        events = []
+        for hash, item in current.items():
+            old_item = previous.get(hash)
+            if old_item is None or item_state(old_item) != item_state(item):
+                events.append(WatchEvent(hash, item_state(old_item), item_state(item), item))
+        for hash, item in previous.items():
+            if hash not in current:
+                events.append(WatchEvent(hash, item_state(item), None, item))
+
+        for queue in self._subscribers:
+            for event in events:
+                queue.put_nowait(event)
+
+    def _resolve_waiters(self):
+        for hash, waiters in self._waiters.items():
+            item = self._items.get(hash)
+            for entry in waiters:
+                state, waiter, seen = entry
+                if waiter.done():
+                    continue
+                if item is None:
+                    if seen:
+                        waiter.set_exception(TorBoxException("ITEM_NOT_FOUND"))
+                    continue
+                if matches(item, state):
+                    waiter.set_result(item)
+                else:
+                    entry[2] = True
+
+    def _next_interval(self) -> float:
+        # A download being waited for is usually about to be added, keep looking for it until it is listed.
+        if any(hash not in self._items for hash in self._waiters):
+            return self.min_interval
+
+        # Waiters only care about their own downloads, subscribers about all of them.
+        if self._subscribers:
+            watched = self._items.values()
+        else:
+            watched = [self._items[hash] for hash in self._waiters if hash in self._items]
+
+        etas = []
+        for item in watched:
+            if is_finished(item) or item_state(item) in IDLE_STATES:
+                continue
+            eta = get_field(item, 'eta')
+            etas.append(eta if isinstance(eta, (int, float)) and eta > 0 else 0)
+
+        if not etas:
+            return min(self.interval * 2, self.max_interval)
+
+        return min(max(min(etas), self.min_interval), self.max_interval)
@@ -1,4 +1,50 @@
-from Apis.TorBoxRequests import TorBoxRequests
-from Apis.TorrentsApi import TorrentsApi
-from Apis.Store import Store
-from Apis.TorrentsApi import TorrentsApi
+from LazyImports import lazy_package
+
+# The submodules are imported on first access, so a client only loads the transport and the Apis it uses.
+lazy_package(__name__, {
+    "MultipartBody": "Multipart",
+    "Transport": "Transport",
+    "TransportResponse": "Transport",
+    "AiohttpTransport": "Transport",
+    "RequestsTransport": "Transport",
+    "create_transport": "Transport",
+    "endpoint_family": "EndpointFamily",
+    "RequestHooks": "RequestHooks",
+    "RequestInfo": "RequestHooks",
+    "hook_tuple": "RequestHooks",
+    "MetricsCollector": "Metrics",
+    "FamilyMetrics": "Metrics",
+    "RateLimiter": "RateLimiter",
+    "TokenBucket": "RateLimiter",
+    "CircuitBreaker": "CircuitBreaker",
+    "RetryPolicy": "RetryPolicy",
+    "bdecode": "Bencode",
+    "TorrentMetadata": "InfoHash",
+    "torrent_metadata": "InfoHash",
+    "magnet_info_hash": "InfoHash",
+    "magnet_link": "InfoHash",
+    "BulkResult": "BulkSubmit",
+    "Downloader": "Downloader",
+    "DownloadTarget": "Downloader",
+    "BackgroundLoop": "BackgroundLoop",
+    "SyncApi": "BackgroundLoop",
+    "SingleFlight": "SingleFlight",
+    "LinkCache": "LinkCache",
+    "AvailabilityCache": "AvailabilityCache",
+    "CacheBackend": "AvailabilityCache",
+    "MemoryCacheBackend": "AvailabilityCache",
+    "Decoder": "Decoder",
+    "LazyModel": "Decoder",
+    "DownloadIndex": "DownloadIndex",
+    "Watcher": "Watcher",
+    "WatchEvent": "Watcher",
+    "TorBoxRequests": "TorBoxRequests",
+    "MyListSync": "MyListSync",
+    "SyncDiff": "MyListSync",
+    "ColumnarSnapshot": "ColumnarSnapshot",
+    "DownloadRow": "ColumnarSnapshot",
+    "FileRow": "ColumnarSnapshot",
+    "TorrentsApi": "TorrentsApi",
+    "UsenetApi": "UsenetApi",
+    "Store": "Store",
+})
@@ -0,0 +1,330 @@
+"""
+Local mock of the TorBox endpoints used by the client, serving synthetic accounts.
+
+Run from the repository root, the api url is printed once the server listens:
+    python -m Benchmarks.MockServer --torrents 10000 --latency 0.02 --error-rate 0.01
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import Counter
+from itertools import islice
+from typing import Any, Dict, Optional, Tuple
+from aiohttp import web
+from Benchmarks.SyntheticData import queued_torrent, torrent, usenet_download
+
+AUTH_ID = "5a0e9d2a-54fd-4b3a-9b52-3c8e0ad2a7f0"
+
+_BTIH = re.compile(r'btih:([0-9a-fA-F]{40})')
+
+
+def _body(data: Any, detail: str = "") -> bytes:
+    return json.dumps({"success": True, "error": None, "detail": detail, "data": data}).encode('utf-8')
+
+
+def _error(status: int, error: str, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    body = json.dumps({"success": False, "error": error, "detail": error, "data": None})
+    return web.Response(status=status, body=body, content_type='application/json', headers=headers)
+
+
+def _response(body: bytes) -> web.Response:
+    return web.Response(body=body, content_type='application/json')
+
+
+class MockAccount:
+    """
+    The downloads of one API key. Encoded mylist pages are cached until the account changes,
+    so serving a large account costs the server little compared to the client.
+    """
+
+    def __init__(self, torrents: int, queued: int, usenet_downloads: int, files: int, seed: int):
+        self.torrents: Dict[int, Dict[str, Any]] = {item['id']: item for item in
+                                                    (torrent(id, files, seed) for id in range(1, torrents + 1))}
+        self.queued: Dict[int, Dict[str, Any]] = {item['id']: item for item in
+                                                  (queued_torrent(id) for id in range(torrents + 1,
+                                                                                      torrents + queued + 1))}
+        self.usenet: Dict[int, Dict[str, Any]] = {item['id']: item for item in
+                                                  (usenet_download(id, files, seed)
+                                                   for id in range(1, usenet_downloads + 1))}
+        self.next_id = torrents + queued + 1
+        self._encoded: Dict[Tuple[str, int, Optional[int]], bytes] = {}
+
+    def items(self, kind: str) -> Dict[int, Dict[str, Any]]:
+        return getattr(self, kind)
+
+    def changed(self, kind: str):
+        self._encoded = {key: body for key, body in self._encoded.items() if key[0] != kind}
+
+    def encoded(self, kind: str, offset: int = 0, limit: Optional[int] = None) -> bytes:
+        key = (kind, offset, limit)
+        body = self._encoded.get(key)
+        if body is None:
+            items = self.items(kind).values()
+            body = self._encoded[key] = _body(list(islice(items, offset, offset + limit if limit is not None else None)))
+        return body
+
+    def find(self, kind: str, id: int) -> Optional[Dict[str, Any]]:
+        return self.items(kind).get(id) or (self.queued.get(id) if kind == 'torrents' else None)
+
+
+class MockTorBoxServer:
+    """
+    aiohttp server answering mylist, getqueued, createtorrent, checkcached, requestdl, controltorrent,
+    controlqueued and their usenet equivalents like TorBox does.
+
+    Every API key gets its own synthetic account, generated on first use. Latency, jitter and the share of
+    failing requests can be changed while the server runs. The number of requests per endpoint is counted in
+    requests.
+    """
+
+    def __init__(self, torrents: int = 10_000, queued: int = 100, usenet_downloads: int = 1_000, files: int = 3,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 host: str = '127.0.0.1', port: int = 0, seed: int = 0):
+        """
+        :param torrents: Number of torrents in every account.
+        :param queued: Number of queued torrents in every account.
+        :param usenet_downloads: Number of usenet downloads in every account.
+        :param files: Number of files of every download.
+        :param latency: Seconds every response is delayed.
+        :param jitter: Maximum random seconds added to the latency.
+        :param error_rate: Share of requests answered with error_status instead of being handled.
+        :param error_status: HTTP status of the injected errors, 429 responses carry a Retry-After header.
+        :param port: Port to listen on, 0 picks a free port.
+        """
+        self.torrents = torrents
+        self.queued = queued
+        self.usenet_downloads = usenet_downloads
+        self.files = files
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.requests: Counter = Counter()
+        self.accounts: Dict[str, MockAccount] = {}
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}/v1/api/"
+
+    def account(self, token: str) -> MockAccount:
+        account = self.accounts.get(token)
+        if account is None:
+            seed = self.seed + int(hashlib.md5(token.encode('utf-8')).hexdigest()[:8], 16)
+            account = self.accounts[token] = MockAccount(self.torrents, self.queued, self.usenet_downloads,
+                                                         self.files, seed)
+        return account
+
+    def application(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware], client_max_size=64 * 1024 * 1024)
+        for kind in ('torrents', 'usenet'):
+            app.router.add_get(f'/v1/api/{kind}/mylist', self._mylist)
+            app.router.add_get(f'/v1/api/{kind}/checkcached', self._checkcached)
+            app.router.add_get(f'/v1/api/{kind}/requestdl', self._requestdl)
+        app.router.add_get('/v1/api/torrents/getqueued', self._getqueued)
+        app.router.add_post('/v1/api/torrents/createtorrent', self._create)
+        app.router.add_post('/v1/api/usenet/createusenetdownload', self._create)
+        app.router.add_post('/v1/api/torrents/controltorrent', self._control)
+        app.router.add_post('/v1/api/torrents/controlqueued', self._control)
+        app.router.add_post('/v1/api/usenet/controlusenetdownload', self._control)
+        return app
+
+    async def start(self) -> str:
+        """
+        Start listening and return the api url.
+        """
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.port = self._runner.addresses[0][1]
+        return self.api_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests[request.path[len('/v1/api/'):]] += 1
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            if self.error_status == 429:
+                return _error(429, "TOO_MANY_REQUESTS", {"Retry-After": "0"})
+            return _error(self.error_status, "DATABASE_ERROR")
+
+        if not self._token(request):
+            return _error(401, "NO_AUTH")
+
+        return await handler(request)
+
+    @staticmethod
+    def _token(request: web.Request) -> Optional[str]:
+        authorization = request.headers.get('Authorization', '')
+        return authorization[7:] if authorization.startswith('Bearer ') else request.query.get('token')
+
+    def _account(self, request: web.Request) -> MockAccount:
+        return self.account(self._token(request))
+
+    @staticmethod
+    def _kind(request: web.Request) -> str:
+        return request.path.split('/')[3]
+
+    @staticmethod
+    def _page(request: web.Request):
+        offset = int(request.query.get('offset', 0))
+        limit = request.query.get('limit')
+        return offset, int(limit) if limit is not None else None
+
+    async def _mylist(self, request: web.Request) -> web.Response:
+        account = self._account(request)
+        kind = self._kind(request)
+
+        if 'id' in request.query:
+            item = account.items(kind).get(int(request.query['id']))
+            if item is None:
+                return _error(404, "ITEM_NOT_FOUND")
+            return _response(_body(item))
+
+        return _response(account.encoded(kind, *self._page(request)))
+
+    async def _getqueued(self, request: web.Request) -> web.Response:
+        return _response(self._account(request).encoded('queued', *self._page(request)))
+
+    async def _checkcached(self, request: web.Request) -> web.Response:
+        hashes = [hash for hash in request.query.get('hash', '').lower().split(',') if hash]
+        list_files = request.query.get('list_files') == 'True'
+        cached = []
+
+        # Half of the hashes are cached, decided by the hash itself so repeated checks agree.
+        for hash in hashes:
+            if sum(hash.encode('ascii', 'replace')) % 2 == 0:
+                available = {"name": f"Cached.{hash[:8]}", "size": len(hash) << 20, "hash": hash}
+                if list_files:
+                    available["files"] = [{"name": f"Cached.{hash[:8]}/Part.{i}.mkv", "size": 1 << 20}
+                                          for i in range(self.files)]
+                cached.append(available)
+
+        if request.query.get('format') == 'list':
+            return _response(_body(cached))
+        return _response(_body({available['hash']: available for available in cached}))
+
+    async def _requestdl(self, request: web.Request) -> web.Response:
+        kind = self._kind(request)
+        id = request.query.get('torrent_id') or request.query.get('usenet_id')
+        if not request.query.get('token') or id is None:
+            return _error(400, "MISSING_REQUIRED_OPTION")
+        if self._account(request).find(kind, int(id)) is None:
+            return _error(404, "ITEM_NOT_FOUND")
+
+        file_id = request.query.get('file_id', 'zip')
+        expires = int(time.time()) + 3600
+        return _response(_body(f"{self.url}/dl/{kind}/{id}/{file_id}?expires={expires}"))
+
+    async def _create(self, request: web.Request) -> web.Response:
+        account = self._account(request)
+        kind = self._kind(request)
+        form = await request.post()
+
+        upload = form.get('file')
+        if upload is not None:
+            hash = hashlib.sha1(upload.file.read()).hexdigest()
+        else:
+            source = form.get('magnet') or form.get('link') or ''
+            match = _BTIH.search(source)
+            hash = match.group(1).lower() if match else hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+        id = account.next_id
+        account.next_id += 1
+        if kind == 'torrents':
+            item = torrent(id, self.files, self.seed)
+            item.update(hash=hash, download_state="metaDL", download_finished=False, eta=0)
+            if form.get('name'):
+                item['name'] = form['name']
+            account.torrents[id] = item
+            data = {"hash": hash, "torrent_id": id, "auth_id": AUTH_ID}
+        else:
+            item = usenet_download(id, self.files, self.seed)
+            item.update(hash=hash[:32], original_url=form.get('link') or "", download_state="queued",
+                        download_finished=False)
+            account.usenet[id] = item
+            data = {"hash": item['hash'], "usenet_download_id": id, "auth_id": AUTH_ID}
+
+        account.changed(kind)
+        return _response(_body(data, "Download added."))
+
+    async def _control(self, request: web.Request) -> web.Response:
+        account = self._account(request)
+        kind = self._kind(request)
+        try:
+            data = json.loads(await request.text())
+        except ValueError:
+            data = dict(await request.post())
+
+        id = data.get('torrent_id') or data.get('usenet_id')
+        items = account.queued if request.path.endswith('controlqueued') else account.items(kind)
+        if id is None or int(id) not in items:
+            return _error(404, "ITEM_NOT_FOUND")
+
+        if data.get('operation') == 'delete':
+            del items[int(id)]
+            account.changed('queued' if items is account.queued else kind)
+        elif data.get('operation') == 'start' and items is account.queued:
+            # A started queued torrent becomes an active torrent, keeping its id and hash.
+            del items[int(id)]
+            account.torrents[int(id)] = dict(torrent(int(id)), download_state="downloading", download_finished=False)
+            account.changed('queued')
+            account.changed('torrents')
+        return _response(_body(None, "Operation successful."))
+
+
+async def serve(server: MockTorBoxServer):
+    print(await server.start(), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--torrents', type=int, default=10_000)
+    parser.add_argument('--queued', type=int, default=100)
+    parser.add_argument('--usenet', type=int, default=1_000)
+    parser.add_argument('--files', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(MockTorBoxServer(arguments.torrents, arguments.queued, arguments.usenet, arguments.files,
+                                           arguments.latency, arguments.jitter, arguments.error_rate,
+                                           arguments.error_status, arguments.host, arguments.port)))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,129 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+MIME_TYPES = ["video/x-matroska", "video/mp4", "application/x-subrip", "text/plain", "image/jpeg"]
+DOWNLOAD_STATES = ["downloading", "uploading", "stalled (no seeds)", "paused", "completed", "cached"]
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def info_hash(id: int, length: int = 40) -> str:
+    return f"{id:0{length}x}"
+
+
+def _timestamp(seconds: int) -> str:
+    return (_EPOCH + timedelta(seconds=seconds)).isoformat().replace("+00:00", "Z")
+
+
+def file(id: int, torrent_id: int, rng: random.Random) -> Dict[str, Any]:
+    name = f"Synthetic.Torrent.{torrent_id}/Part.{id}.mkv"
+    return {
+        "id": id,
+        "md5": f"{rng.getrandbits(128):032x}",
+        "hash": info_hash(rng.getrandbits(64)),
+        "name": name,
+        "size": rng.randint(1 << 20, 1 << 32),
+        "s3_path": f"{info_hash(torrent_id)}/{name}",
+        "mime_type": rng.choice(MIME_TYPES),
+        "short_name": f"Part.{id}.mkv",
+        "absolute_path": f"/downloads/{name}"
+    }
+
+
+def torrent(id: int, files: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a mylist torrent entry with every field of TorrentInfoResult filled in.
+    """
+    rng = random.Random(seed * 1_000_003 + id)
+    state = rng.choice(DOWNLOAD_STATES)
+    finished = state in ("uploading", "completed", "cached")
+    torrent_files = [file(i, id, rng) for i in range(files)]
+    return {
+        "id": id,
+        "auth_id": "5a0e9d2a-54fd-4b3a-9b52-3c8e0ad2a7f0",
+        "server": rng.randint(1, 40),
+        "hash": info_hash(id),
+        "name": f"Synthetic.Torrent.{id}",
+        "magnet": f"magnet:?xt=urn:btih:{info_hash(id)}&dn=Synthetic.Torrent.{id}",
+        "size": sum(f["size"] for f in torrent_files),
+        "active": not finished or state == "uploading",
+        "created_at": _timestamp(id),
+        "updated_at": _timestamp(id + rng.randint(0, 86400)),
+        "download_state": state,
+        "seeds": rng.randint(0, 500),
+        "peers": rng.randint(0, 500),
+        "ratio": round(rng.random() * 3, 2),
+        "progress": 1.0 if finished else round(rng.random(), 3),
+        "download_speed": 0 if finished else rng.randint(0, 100_000_000),
+        "upload_speed": rng.randint(0, 10_000_000),
+        "eta": 0 if finished else rng.randint(1, 86400),
+        "torrent_file": rng.random() < 0.2,
+        "expires_at": None,
+        "download_present": finished,
+        "files": torrent_files,
+        "download_path": f"/downloads/Synthetic.Torrent.{id}",
+        "inactive_check": 0,
+        "availability": round(rng.random() * 10, 2),
+        "download_finished": finished,
+        "tracker": None,
+        "total_uploaded": rng.randint(0, 1 << 34),
+        "total_downloaded": rng.randint(0, 1 << 34),
+        "cached": finished,
+        "owner": "5a0e9d2a-54fd-4b3a-9b52-3c8e0ad2a7f0",
+        "seed_torrent": False,
+        "allow_zipped": True,
+        "long_term_seeding": False,
+        "tracker_message": None
+    }
+
+
+def queued_torrent(id: int) -> Dict[str, Any]:
+    return {
+        "id": id,
+        "auth_id": "5a0e9d2a-54fd-4b3a-9b52-3c8e0ad2a7f0",
+        "created_at": _timestamp(id),
+        "magnet": f"magnet:?xt=urn:btih:{info_hash(id)}&dn=Queued.Torrent.{id}",
+        "torrent_file": None,
+        "hash": info_hash(id),
+        "name": f"Queued.Torrent.{id}",
+        "type": "torrent"
+    }
+
+
+def usenet_download(id: int, files: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a mylist usenet entry with every field of UsenetInfoResult filled in.
+    """
+    rng = random.Random(seed * 1_000_003 + id)
+    state = rng.choice(DOWNLOAD_STATES)
+    finished = state in ("completed", "cached")
+    download_files = [file(i, id, rng) for i in range(files)]
+    return {
+        "id": id,
+        "created_at": _timestamp(id),
+        "updated_at": _timestamp(id + rng.randint(0, 86400)),
+        "auth_id": "5a0e9d2a-54fd-4b3a-9b52-3c8e0ad2a7f0",
+        "name": f"Synthetic.Usenet.{id}",
+        "hash": info_hash(id, 32),
+        "download_state": state,
+        "download_speed": 0 if finished else rng.randint(0, 100_000_000),
+        "original_url": f"https://indexer.invalid/{id}.nzb",
+        "eta": 0 if finished else rng.randint(1, 86400),
+        "progress": 1 if finished else 0,
+        "size": sum(f["size"] for f in download_files),
+        "download_id": f"{id}",
+        "files": download_files,
+        "active": not finished,
+        "cached": finished,
+        "download_present": finished,
+        "download_finished": finished
+    }
+
+
+def torrents(count: int, files: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    return [torrent(id, files, seed) for id in range(1, count + 1)]
+
+
+def usenet_downloads(count: int, files: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    return [usenet_download(id, files, seed) for id in range(1, count + 1)]
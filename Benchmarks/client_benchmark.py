@@ -0,0 +1,150 @@
+"""
+Throughput, latency and peak memory of the main client operations against the local mock TorBox server.
+
+The server runs in a separate process so its work is not measured. Every operation is first timed, then run once
+more under tracemalloc for its peak memory, tracing slows Python down too much to do both at once.
+
+Run from the repository root:
+    python -m Benchmarks.client_benchmark --torrents 10000 --latency 0.01
+    python -m Benchmarks.client_benchmark --only mylist checkcached --decode-mode validated
+"""
+import sys
+import time
+import asyncio
+import argparse
+import tracemalloc
+from typing import Any, Awaitable, Callable, List, Optional
+from Benchmarks.SyntheticData import info_hash
+from Models import DecodeMode
+from TorBox import TorBoxPyClient
+
+
+class Operation:
+    def __init__(self, name: str, calls: int, call: Callable[[TorBoxPyClient, int], Awaitable[Any]]):
+        self.name = name
+        self.calls = calls
+        self.call = call
+
+
+async def _stream(client: TorBoxPyClient, i: int) -> int:
+    return sum([1 async for _ in client.torrents.iter_current_async()])
+
+
+def operations(torrents: int, usenet_downloads: int) -> List[Operation]:
+    hashes = [info_hash(id) for id in range(1, torrents + 1)]
+    return [
+        Operation("mylist", 20, lambda client, i: client.torrents.get_current_async(True)),
+        Operation("mylist stream", 20, _stream),
+        Operation("mylist page", 500, lambda client, i: client.torrents.get_current_async(
+            True, i * 100 % max(torrents, 1), 100)),
+        Operation("mylist by id", 500, lambda client, i: client.torrents.get_id_info_async(i % torrents + 1)),
+        Operation("getqueued", 200, lambda client, i: client.torrents.get_queued_async(True)),
+        Operation("checkcached", 50, lambda client, i: client.torrents.get_availability_many_async(
+            hashes[i * 1000 % max(torrents, 1):][:1000])),
+        Operation("requestdl", 1000, lambda client, i: client.torrents.request_download_async(i % torrents + 1, 0)),
+        Operation("createtorrent", 500, lambda client, i: client.torrents.add_magnet_async(
+            f"magnet:?xt=urn:btih:{info_hash(10_000_000 + i)}")),
+        Operation("usenet mylist", 50, lambda client, i: client.usenet.get_current_async(True)),
+        Operation("usenet requestdl", 1000, lambda client, i: client.usenet.request_download_async(
+            i % usenet_downloads + 1, 0)),
+    ]
+
+
+def percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+async def run_operation(client: TorBoxPyClient, operation: Operation, calls: int, concurrency: int):
+    latencies = []
+    errors = 0
+    next_call = 0
+
+    async def worker():
+        nonlocal next_call, errors
+        while next_call < calls:
+            i = next_call
+            next_call += 1
+            started_at = time.perf_counter()
+            try:
+                await operation.call(client, i)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, calls))))
+    return time.perf_counter() - started_at, latencies, errors
+
+
+async def peak_memory(client: TorBoxPyClient, operation: Operation) -> int:
+    tracemalloc.start()
+    try:
+        await operation.call(client, 0)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def start_server(arguments) -> asyncio.subprocess.Process:
+    server = await asyncio.create_subprocess_exec(
+        sys.executable, '-m', 'Benchmarks.MockServer', '--torrents', str(arguments.torrents),
+        '--usenet', str(arguments.usenet), '--files', str(arguments.files), '--latency', str(arguments.latency),
+        '--jitter', str(arguments.jitter), '--error-rate', str(arguments.error_rate),
+        stdout=asyncio.subprocess.PIPE)
+    arguments.url = (await server.stdout.readline()).decode('utf-8').strip()
+    return server
+
+
+async def main(arguments):
+    server: Optional[asyncio.subprocess.Process] = None
+    if arguments.url is None:
+        server = await start_server(arguments)
+
+    client = TorBoxPyClient(transport=arguments.transport, decode_mode=DecodeMode[arguments.decode_mode.title()],
+                            retry_count=arguments.retries)
+    client._store.api_url = arguments.url
+    client.use_api_authentication("benchmark")
+
+    try:
+        # Generates the synthetic account on the server and warms up the connection pool.
+        await client.torrents.get_current_async(True)
+        await client.usenet.get_current_async(True)
+
+        print(f"{arguments.torrents} torrents, {arguments.usenet} usenet downloads, {arguments.files} files each, "
+              f"{arguments.transport} transport, {arguments.decode_mode} decoding, concurrency {arguments.concurrency}")
+        print(f"{'operation':<20}{'calls':>7}{'errors':>8}{'calls/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+
+        for operation in operations(arguments.torrents, arguments.usenet):
+            if arguments.only and operation.name not in arguments.only:
+                continue
+
+            calls = max(int(operation.calls * arguments.scale), 1)
+            elapsed, latencies, errors = await run_operation(client, operation, calls, arguments.concurrency)
+            peak = await peak_memory(client, operation)
+            print(f"{operation.name:<20}{calls:>7}{errors:>8}{calls / elapsed:>10.1f}"
+                  f"{percentile(latencies, 50) * 1e3:>10.2f}{percentile(latencies, 99) * 1e3:>10.2f}"
+                  f"{peak / 1e6:>10.1f}")
+    finally:
+        await client.close()
+        if server is not None:
+            server.terminate()
+            await server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Api url of a running mock server, one is started when omitted.")
+    parser.add_argument('--torrents', type=int, default=10_000)
+    parser.add_argument('--usenet', type=int, default=1_000)
+    parser.add_argument('--files', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplies the number of calls per operation.")
+    parser.add_argument('--transport', choices=['aiohttp', 'requests'], default='aiohttp')
+    parser.add_argument('--decode-mode', choices=[mode.name.lower() for mode in DecodeMode], default='raw')
+    parser.add_argument('--only', nargs='*', help="Names of the operations to run.")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,46 @@
+"""
+Per item decode cost of a mylist response in every DecodeMode.
+
+Run from the repository root:
+    python -m Benchmarks.decode_benchmark --items 10000
+"""
+import json
+import argparse
+import timeit
+from Apis.Decoder import Decoder
+from Benchmarks.SyntheticData import torrents
+from Models import DecodeMode, TorrentInfoResult
+
+
+def run(items: int, files: int, repeat: int):
+    content = json.dumps({"success": True, "error": None, "detail": "Torrents list retrieved successfully.",
+                          "data": torrents(items, files)}).encode('utf-8')
+
+    raw = Decoder(DecodeMode.Raw)
+    lazy = Decoder(DecodeMode.Lazy)
+    validated = Decoder(DecodeMode.Validated)
+    validated.decode_list(content, TorrentInfoResult)  # Builds the TypeAdapter outside of the measurement
+
+    cases = [
+        ("raw", lambda: raw.decode_list(content, TorrentInfoResult)),
+        ("lazy", lambda: lazy.decode_list(content, TorrentInfoResult)),
+        ("lazy, every item read", lambda: [t.name for t in lazy.decode_list(content, TorrentInfoResult)]),
+        ("validated", lambda: validated.decode_list(content, TorrentInfoResult)),
+        ("json.loads + model_validate", lambda: [TorrentInfoResult.model_validate(t)
+                                                 for t in json.loads(content)['data']]),
+    ]
+
+    print(f"{items} torrents, {files} files each, {len(content) / 1e6:.1f} MB response, best of {repeat}")
+    print(f"{'mode':<30}{'total ms':>12}{'us/item':>12}")
+    for name, case in cases:
+        best = min(timeit.repeat(case, number=1, repeat=repeat))
+        print(f"{name:<30}{best * 1e3:>12.1f}{best * 1e6 / items:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=10_000)
+    parser.add_argument('--files', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    arguments = parser.parse_args()
+    run(arguments.items, arguments.files, arguments.repeat)
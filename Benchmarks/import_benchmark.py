@@ -0,0 +1,64 @@
+"""
+Cold start cost of the client, every scenario runs in a fresh interpreter.
+
+Run from the repository root:
+    python -m Benchmarks.import_benchmark --runs 20
+    python -m Benchmarks.import_benchmark --importtime 15
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ("import TorBox", "import TorBox"),
+    ("create a client", "import TorBox; TorBox.TorBoxPyClient()"),
+    ("first torrents call", "import TorBox; TorBox.TorBoxPyClient().torrents"),
+    ("every module", "import Apis, Models, TorBox; "
+                     "[getattr(package, name) for package in (Apis, Models) for name in package.__all__]"),
+]
+
+_TIMED = "import time; _started = time.perf_counter(); {code}; print(time.perf_counter() - _started)"
+
+
+def measure(code: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', _TIMED.format(code=code)], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout
+        times.append(float(output))
+    return statistics.median(times)
+
+
+def importtime(code: str, top: int):
+    """
+    Print the modules with the largest cumulative import time reported by python -X importtime.
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stderr
+    modules = []
+    for line in output.splitlines()[1:]:
+        _, self_time, cumulative, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        modules.append((int(cumulative), int(self_time), name))
+
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module ({code})")
+    for cumulative, self_time, name in sorted(modules, reverse=True)[:top]:
+        print(f"{cumulative / 1e3:>14.1f}{self_time / 1e3:>10.1f}  {name}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--importtime', type=int, metavar='TOP',
+                        help="Print the slowest modules of 'import TorBox' instead.")
+    arguments = parser.parse_args()
+
+    if arguments.importtime:
+        importtime("import TorBox", arguments.importtime)
+    else:
+        print(f"{'scenario':<22}{'median ms':>10}  (median of {arguments.runs} fresh interpreters)")
+        for name, code in SCENARIOS:
+            print(f"{name:<22}{measure(code, arguments.runs) * 1e3:>10.1f}")
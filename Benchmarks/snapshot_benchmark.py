@@ -0,0 +1,70 @@
+"""
+Memory and aggregate cost of a ColumnarSnapshot compared to the decoded mylist.
+
+Run from the repository root:
+    python -m Benchmarks.snapshot_benchmark --items 10000 --files 20
+"""
+import gc
+import json
+import argparse
+import timeit
+import tracemalloc
+from collections import defaultdict
+from Apis.ColumnarSnapshot import ColumnarSnapshot
+from Benchmarks.SyntheticData import torrents
+
+
+def allocated(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def run(items: int, files: int):
+    content = json.dumps({"success": True, "data": torrents(items, files)}).encode('utf-8')
+
+    decoded, decoded_size = allocated(lambda: json.loads(content)['data'])
+    snapshot, snapshot_size = allocated(lambda: ColumnarSnapshot.from_items(decoded))
+
+    print(f"{items} torrents, {files} files each")
+    print(f"{'representation':<20}{'MB':>10}")
+    print(f"{'list of dicts':<20}{decoded_size / 1e6:>10.1f}")
+    print(f"{'columnar snapshot':<20}{snapshot_size / 1e6:>10.1f}   {decoded_size / snapshot_size:.1f}x smaller")
+
+    def dicts_size_by_state():
+        totals = defaultdict(int)
+        for torrent in decoded:
+            totals[torrent['download_state']] += torrent['size']
+        return totals
+
+    def dicts_largest_files():
+        return sorted((file for torrent in decoded for file in torrent['files']), key=lambda file: file['size'],
+                      reverse=True)[:10]
+
+    def dicts_mime_type():
+        return [file for torrent in decoded for file in torrent['files'] if file['mime_type'] == "video/mp4"]
+
+    cases = [
+        ("size by state", dicts_size_by_state, snapshot.size_by_state),
+        ("download speed", lambda: sum(torrent['download_speed'] for torrent in decoded),
+         snapshot.total_download_speed),
+        ("largest 10 files", dicts_largest_files, snapshot.largest_files),
+        ("mime type filter", dicts_mime_type, lambda: snapshot.file_rows_with_mime_type("video/mp4")),
+    ]
+
+    print(f"{'aggregate':<20}{'dicts ms':>10}{'snapshot ms':>13}")
+    for name, dicts, columns in cases:
+        dicts_time = min(timeit.repeat(dicts, number=1, repeat=5))
+        columns_time = min(timeit.repeat(columns, number=1, repeat=5))
+        print(f"{name:<20}{dicts_time * 1e3:>10.2f}{columns_time * 1e3:>13.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=10_000)
+    parser.add_argument('--files', type=int, default=20)
+    arguments = parser.parse_args()
+    run(arguments.items, arguments.files)
@@ -0,0 +1,5 @@
+class CircuitOpen(Exception):
+    def __init__(self, family=None, retry_in=None):
+        self.family = family
+        self.retry_in = retry_in
+        super().__init__(f"Circuit of the '{family}' endpoints is open, retry in {retry_in or 0:.1f}s")
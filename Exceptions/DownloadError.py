@@ -0,0 +1,5 @@
+class DownloadError(Exception):
+    def __init__(self, message=None, path=None, status_code=None):
+        self.path = path
+        self.status_code = status_code
+        super().__init__(message)
@@ -1,5 +1,7 @@
 class TorBoxException(Exception):
     def __init__(self, error=None, detail=None):
+        self.code = error
+        self.status_code = None
         self.error_detail = detail
         self.error = self.get_message(error) or "NULL_DETAIL_ERROR"
         super().__init__(self.get_message(error) or error)
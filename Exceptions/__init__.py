@@ -1,2 +1,4 @@
 from Exceptions.AccessTokenExpired import AccessTokenExpired
+from Exceptions.CircuitOpen import CircuitOpen
+from Exceptions.DownloadError import DownloadError
 from Exceptions.TorBoxException import TorBoxException
\ No newline at end of file
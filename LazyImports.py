@@ -0,0 +1,42 @@
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import Dict
+
+
+class LazyPackage(ModuleType):
+    """
+    A package whose exported names are imported from their submodule on first access.
+    """
+
+    def __getattr__(self, name: str):
+        module = self._lazy_exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+
+        value = getattr(import_module(f"{self.__name__}.{module}"), name)
+        ModuleType.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name: str, value):
+        # The import system binds every loaded submodule on its package, for Apis.Store that would replace the
+        # Store class by the Store module. The class is kept instead, like the eager imports used to do.
+        if isinstance(value, ModuleType) and self._lazy_exports.get(name) == name:
+            value = getattr(value, name)
+        ModuleType.__setattr__(self, name, value)
+
+    def __dir__(self):
+        return sorted(set(ModuleType.__dir__(self)) | set(self._lazy_exports))
+
+
+def lazy_package(name: str, exports: Dict[str, str]):
+    """
+    Make a package load its exports lazily, call it from the __init__ of the package.
+
+    :param name: The __name__ of the package.
+    :param exports: Every exported name mapped to the submodule defining it.
+    """
+    package = sys.modules[name]
+    package._lazy_exports = exports
+    package.__all__ = list(exports)
+    package.__class__ = LazyPackage
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class CircuitState(Enum):
+    Closed = 1  # Requests are sent normally
+    Open = 2  # Requests fail fast without being sent
+    HalfOpen = 3  # A limited number of trial requests are sent to probe whether the endpoint recovered
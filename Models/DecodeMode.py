@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class DecodeMode(Enum):
+    Raw = 1  # Items are returned as the dicts decoded from the JSON response
+    Lazy = 2  # Items are wrapped and only validated into their model when a model attribute is read
+    Validated = 3  # Items are validated into their model while the response is decoded
@@ -1,10 +1,18 @@
-from Models.AuthenticationType import AuthenticationType
-from Models.AvailableTorrent import AvailableTorrent
-from Models.AvailableUsenet import AvailableUsenet
-from Models.QueuedTorrent import QueuedTorrent
-from Models.Response import Response
-from Models.TorrentAddResult import TorrentAddResult
-from Models.TorrentInfoResult import TorrentInfoResult
-from Models.UsenetAddResult import UsenetAddResult
-from Models.UsenetInfoResult import UsenetInfoResult
-from Models.User import User
+from LazyImports import lazy_package
+
+# The models are imported on first access, pydantic and the models are most of the import time of the client.
+lazy_package(__name__, {
+    "AuthenticationType": "AuthenticationType",
+    "AvailableTorrent": "AvailableTorrent",
+    "AvailableUsenet": "AvailableUsenet",
+    "CircuitState": "CircuitState",
+    "DecodeMode": "DecodeMode",
+    "QueuedTorrent": "QueuedTorrent",
+    "Response": "Response",
+    "ResponseData": "Response",
+    "TorrentAddResult": "TorrentAddResult",
+    "TorrentInfoResult": "TorrentInfoResult",
+    "UsenetAddResult": "UsenetAddResult",
+    "UsenetInfoResult": "UsenetInfoResult",
+    "User": "User",
+})
@@ -0,0 +1,84 @@
+import json
+import pytest
+from urllib.parse import parse_qs, urlsplit
+from Apis import AvailabilityCache, MemoryCacheBackend, Transport, TransportResponse
+from Models import AvailableTorrent
+from TorBox import TorBoxPyClient
+
+
+class CheckCachedTransport(Transport):
+    """Answers checkcached calls, every hash ending with "a" is cached."""
+
+    def __init__(self):
+        self.hashes = []
+
+    async def send(self, method, url, headers=None, data=None):
+        hashes = parse_qs(urlsplit(url).query)['hash'][0].split(',')
+        self.hashes.append(hashes)
+        available = [{"name": hash, "size": 1, "hash": hash} for hash in hashes if hash.endswith("a")]
+        return TransportResponse(200, {}, json.dumps({"success": True, "data": available}).encode())
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_negative_entries():
+    cache = AvailabilityCache()
+    available = AvailableTorrent(name="Big Buck Bunny", size=1, hash="aa")
+    await cache.set_many("torrents/checkcached", {"aa": available, "bb": None}, False)
+
+    result = await cache.get_many("torrents/checkcached", ["aa", "bb", "cc"], False)
+    assert result == {"aa": available, "bb": None}
+    assert cache.stats['hits'] == 2
+    assert cache.stats['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_entries():
+    cache = AvailabilityCache(cached_ttl=60, not_cached_ttl=0)
+    await cache.set_many("torrents/checkcached", {"bb": None}, False)
+
+    assert await cache.get_many("torrents/checkcached", ["bb"], False) == {}
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set_many([("a", 1, 60), ("b", 2, 60)])
+    await backend.get_many(["a"])
+    await backend.set_many([("c", 3, 60)])
+
+    assert await backend.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert backend.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_warm_cache_only_sends_the_misses():
+    transport = CheckCachedTransport()
+    torbox = TorBoxPyClient(transport=transport, availability_cache=True)
+    torbox.use_api_authentication("key")
+
+    first = await torbox.torrents.get_availability_many_async(["1a", "2b"])
+    assert first["1a"].name == "1a" and first["2b"] is None
+
+    second = await torbox.torrents.get_availability_many_async(["1A", "2b", "3a", "4b"])
+    assert transport.hashes == [["1a", "2b"], ["3a", "4b"]]
+    assert second["1A"].name == "1a" and second["3a"].name == "3a"
+    assert second["2b"] is None and second["4b"] is None
+
+    await torbox.torrents.get_availability_many_async(["1a", "4b"])
+    assert len(transport.hashes) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_hash_availability_goes_through_the_cache():
+    transport = CheckCachedTransport()
+    torbox = TorBoxPyClient(transport=transport, availability_cache=True)
+    torbox.use_api_authentication("key")
+
+    for _ in range(3):
+        response = json.loads(await torbox.torrents.get_availability_async("1A"))
+        assert response['success'] and response['data'][0]['hash'] == "1a"
+        assert json.loads(await torbox.torrents.get_availability_async("2b"))['data'] == []
+    assert transport.hashes == [["1a"], ["2b"]]
+
+    await torbox.torrents.get_availability_many_async(["1a", "2b"])
+    assert len(transport.hashes) == 2
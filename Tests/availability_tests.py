@@ -0,0 +1,61 @@
+import json
+import asyncio
+import pytest
+from urllib.parse import parse_qs, urlsplit
+from Apis import Transport, TransportResponse
+from TorBox import TorBoxPyClient
+
+
+class SlowCheckCachedTransport(Transport):
+    """Answers checkcached calls after a delay and records the batches and the calls in flight."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, method, url, headers=None, data=None):
+        hashes = parse_qs(urlsplit(url).query)['hash'][0].split(',')
+        self.batches.append(hashes)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        # Like TorBox, the hashes of the cached items are returned lowercase.
+        available = [{"name": hash, "size": 1, "hash": hash} for hash in hashes if int(hash, 16) % 2]
+        return TransportResponse(200, {}, json.dumps({"success": True, "data": available}).encode())
+
+
+@pytest.mark.asyncio
+async def test_hashes_are_sent_in_batches_with_limited_concurrency():
+    transport = SlowCheckCachedTransport()
+    torbox = TorBoxPyClient(transport=transport)
+    torbox.use_api_authentication("key")
+    hashes = [f"{i:040x}" for i in range(1050)]
+
+    result = await torbox.torrents.get_availability_many_async(hashes, max_concurrency=3)
+
+    assert [len(batch) for batch in transport.batches] == [100] * 10 + [50]
+    assert sorted(hash for batch in transport.batches for hash in batch) == hashes
+    assert transport.max_in_flight == 3
+    assert list(result) == hashes
+    assert result[hashes[1]].hash == hashes[1] and result[hashes[2]] is None
+
+
+@pytest.mark.asyncio
+async def test_results_are_keyed_by_the_requested_hashes():
+    transport = SlowCheckCachedTransport(delay=0)
+    torbox = TorBoxPyClient(transport=transport)
+    torbox.use_api_authentication("key")
+    upper = "AB" * 20
+    mixed = " " + "Ab" * 20
+
+    result = await torbox.torrents.get_availability_many_async([upper, mixed, "0" * 40, "", "  "], batch_size=2)
+
+    assert transport.batches == [["ab" * 20, "0" * 40]]
+    assert list(result) == [upper, mixed, "0" * 40]
+    assert result[upper].hash == "ab" * 20 and result[mixed] is result[upper]
+    assert result["0" * 40] is None
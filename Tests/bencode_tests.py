@@ -0,0 +1,90 @@
+import hashlib
+import pytest
+from Apis import bdecode, torrent_metadata
+
+
+def bencode(value):
+    if isinstance(value, int):
+        return b"i%de" % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"%d:%s" % (len(value), value)
+    if isinstance(value, list):
+        return b"l" + b"".join(map(bencode, value)) + b"e"
+    return b"d" + b"".join(bencode(key) + bencode(value[key]) for key in sorted(value)) + b"e"
+
+
+def test_bdecode():
+    assert bdecode(b"d3:agei-42e4:listl1:ai7eee") == {b"age": -42, b"list": [b"a", 7]}
+    with pytest.raises(ValueError):
+        bdecode(b"d3:age")
+    with pytest.raises(ValueError):
+        bdecode(b"i1ei2e")
+
+
+def test_v1_multi_file_torrent():
+    info = {"name": "show", "piece length": 16384, "pieces": b"\0" * 20,
+            "files": [{"length": 10, "path": ["a.mkv"]}, {"length": 5, "path": ["sub", "b.srt"]},
+                      {"length": 3, "path": [".pad", "3"], "attr": "p"}]}
+    metadata = torrent_metadata(bencode({"announce": "http://tracker", "info": info}))
+
+    assert metadata.info_hash == hashlib.sha1(bencode(info)).hexdigest()
+    assert metadata.info_hash_v2 is None
+    assert metadata.files == [("show/a.mkv", 10), ("show/sub/b.srt", 5)]
+    assert metadata.size == 15
+
+
+def test_v2_single_file_torrent():
+    info = {"name": "movie.mkv", "meta version": 2, "piece length": 16384,
+            "file tree": {"movie.mkv": {"": {"length": 42, "pieces root": b"\0" * 32}}}}
+    metadata = torrent_metadata(bencode({"info": info}))
+
+    assert metadata.info_hash is None
+    assert metadata.info_hash_v2 == hashlib.sha256(bencode(info)).hexdigest()
+    assert metadata.files == [("movie.mkv", 42)]
+
+
+def test_invalid_torrent():
+    with pytest.raises(ValueError):
+        torrent_metadata(b"<html>")
+    with pytest.raises(ValueError):
+        torrent_metadata(bencode({"announce": "x"}))
+
+
+def test_malformed_lengths_and_nesting():
+    for data in (b"l-3:e", b"-3:abc", b"d-1:ae", b"d1:a-1:e", b"l+1:ae", b"l 1:ae", b"l1_0:ae", b"l:e", b"99:ab"):
+        with pytest.raises(ValueError):
+            bdecode(data)
+    with pytest.raises(ValueError):
+        bdecode(b"l" * 5000 + b"e" * 5000)
+    with pytest.raises(ValueError):
+        torrent_metadata(b"d4:infol-3:ee")
+
+
+def test_malformed_integers():
+    assert bdecode(b"li-5ei0ei42ee") == [-5, 0, 42]
+    for data in (b"i 5e", b"i+1e", b"i1_0e", b"ie", b"i-e", b"i--1e", b"i5 e"):
+        with pytest.raises(ValueError):
+            bdecode(data)
+
+
+def test_info_dict_with_wrong_types():
+    infos = [
+        {"name": "x", "pieces": b"", "files": [1]},
+        {"name": "x", "pieces": b"", "files": 1},
+        {"name": "x", "pieces": b"", "files": [{"length": 1, "path": 5}]},
+        {"name": "x", "pieces": b"", "files": [{"length": 1, "path": [5]}]},
+        {"name": "x", "pieces": b"", "files": [{"length": "1", "path": ["a"]}]},
+        {"name": "x", "pieces": b"", "files": [{"length": 1, "path": ["a"], "attr": 1}]},
+        {"name": 5, "pieces": b"", "length": 1},
+        {"name": "x", "pieces": b"", "length": "1"},
+        {"name": "x", "meta version": 2, "file tree": 5},
+        {"name": "x", "meta version": 2, "file tree": {"a": 5}},
+        {"name": "x", "meta version": 2, "file tree": {"a": {"": {"length": "1"}}}},
+    ]
+    for info in infos:
+        with pytest.raises(ValueError):
+            torrent_metadata(bencode({"info": info}))
+    with pytest.raises(ValueError):
+        torrent_metadata(b"d4:infod5:filesli1ee4:name1:x6:pieces0:ee")
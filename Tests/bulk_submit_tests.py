@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from Apis.BulkSubmit import submit_many
+from Apis.InfoHash import magnet_info_hash
+from Exceptions import TorBoxException
+
+HASH = "c9e15763f722f23e98a29decdfae341b98d53056"
+
+
+def test_magnet_info_hash():
+    assert magnet_info_hash(f"magnet:?xt=urn:btih:{HASH.upper()}&dn=name") == HASH
+    assert magnet_info_hash("magnet:?xt=urn:btih:ZHQVOY7XELZD5GFCTXWN7LRUDOMNKMCW") == HASH
+    assert magnet_info_hash("magnet:?dn=name") is None
+    assert magnet_info_hash("https://example.com/file.torrent") is None
+
+
+@pytest.mark.asyncio
+async def test_submit_many_dedupes_skips_and_bounds_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def submit(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if item == "bad":
+            raise TorBoxException("BOZO_TORRENT")
+        return item.upper()
+
+    async def load_existing():
+        return {"known"}
+
+    async def items():
+        for item in ["a", "b", "a", "known", "bad", *(f"item{i}" for i in range(20))]:
+            yield item
+
+    results = [result async for result in submit_many(items(), submit, lambda item: item, load_existing, 4)]
+
+    assert len(results) == 25
+    assert sorted(result.item for result in results if result.skipped) == ["a", "known"]
+    assert [result.error.code for result in results if result.error] == ["BOZO_TORRENT"]
+    assert {result.result for result in results if result.ok and not result.skipped} >= {"A", "B", "ITEM19"}
+    assert peak == 4
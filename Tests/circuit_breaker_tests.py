@@ -0,0 +1,51 @@
+import time
+import pytest
+from Apis import CircuitBreaker
+from Exceptions import CircuitOpen, TorBoxException
+from Models import CircuitState
+
+
+def fail(breaker, family="mylist"):
+    breaker.before_call(family)
+    breaker.record(family, TorBoxException("NO_SERVERS_AVAILABLE_ERROR"), 200)
+
+
+def test_opens_after_threshold_and_fails_fast():
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=3, on_state_change=lambda *change: changes.append(change))
+
+    for _ in range(3):
+        fail(breaker)
+
+    assert breaker.state("mylist") == CircuitState.Open
+    assert breaker.state("create") == CircuitState.Closed
+    assert changes == [("mylist", CircuitState.Closed, CircuitState.Open)]
+    with pytest.raises(CircuitOpen):
+        breaker.before_call("mylist")
+
+
+def test_client_errors_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    breaker.before_call("mylist")
+    breaker.record("mylist", TorBoxException("ITEM_NOT_FOUND"), 404)
+
+    assert breaker.state("mylist") == CircuitState.Closed
+
+
+def test_half_open_recovers_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    fail(breaker)
+    time.sleep(0.06)
+
+    assert breaker.state("mylist") == CircuitState.HalfOpen
+    breaker.before_call("mylist")
+    with pytest.raises(CircuitOpen):
+        breaker.before_call("mylist")
+    breaker.record("mylist", ConnectionError())
+    assert breaker.state("mylist") == CircuitState.Open
+
+    time.sleep(0.06)
+    breaker.before_call("mylist")
+    breaker.record("mylist")
+    assert breaker.state("mylist") == CircuitState.Closed
@@ -0,0 +1,63 @@
+import json
+import tracemalloc
+import pytest
+from Apis import ColumnarSnapshot
+from Benchmarks.MockServer import MockTorBoxServer
+from Benchmarks.SyntheticData import torrents
+from TorBox import TorBoxPyClient
+
+
+def download(id, state, size, speed, files):
+    return {"id": id, "hash": f"{id:040x}", "name": f"Download {id}", "download_state": state, "size": size,
+            "progress": 0.5, "download_speed": speed, "upload_speed": 1, "eta": 10,
+            "files": [{"id": i, "name": name, "size": file_size, "mime_type": mime_type}
+                      for i, (name, file_size, mime_type) in enumerate(files)]}
+
+
+def test_aggregates_and_rows():
+    snapshot = ColumnarSnapshot.from_items([
+        download(1, "downloading", 300, 10, [("a.mkv", 200, "video/x-matroska"), ("a.srt", 100, "text/plain")]),
+        download(2, "completed", 50, 0, [("b.mp4", 50, "video/mp4")]),
+        download(3, "downloading", 700, 5, []),
+    ])
+
+    assert (len(snapshot), snapshot.file_count) == (3, 3)
+    assert snapshot.size_by_state() == {"downloading": 1000, "completed": 50}
+    assert snapshot.count_by_state() == {"downloading": 2, "completed": 1}
+    assert (snapshot.total_size(), snapshot.total_download_speed(), snapshot.total_upload_speed()) == (1050, 15, 3)
+    assert [file.name for file in snapshot.largest_files(2)] == ["a.mkv", "a.srt"]
+    assert [(file.download_id, file.name) for file in snapshot.files_with_mime_type("video/")] == \
+           [(1, "a.mkv"), (2, "b.mp4")]
+    assert list(snapshot.file_rows_with_mime_type("text/plain")) == [1]
+    assert snapshot.files_with_mime_type("image/png") == []
+    assert snapshot.file_size_by_mime_type() == {"video/x-matroska": 200, "text/plain": 100, "video/mp4": 50}
+    assert snapshot.download(2).hash == f"{3:040x}" and snapshot.download(0).name == "Download 1"
+
+
+def test_uses_a_fraction_of_the_memory_of_the_decoded_list():
+    content = json.dumps(torrents(500, 10))
+
+    tracemalloc.start()
+    decoded = json.loads(content)
+    decoded_size = tracemalloc.get_traced_memory()[0]
+    snapshot = ColumnarSnapshot.from_items(decoded)
+    snapshot_size = tracemalloc.get_traced_memory()[0] - decoded_size
+    tracemalloc.stop()
+
+    assert snapshot.file_count == 5000
+    assert snapshot_size * 8 < decoded_size
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_built_from_streamed_mylist():
+    async with MockTorBoxServer(torrents=40, usenet_downloads=4, files=2) as server:
+        torbox = TorBoxPyClient()
+        torbox._store.api_url = server.api_url
+        torbox.use_api_authentication("key")
+
+        snapshot = await torbox.torrents.snapshot_async()
+        usenet = await torbox.usenet.snapshot_async()
+
+        assert (len(snapshot), snapshot.file_count, len(usenet)) == (40, 80, 4)
+        assert snapshot.total_size() == sum(item['size'] for item in await torbox.torrents.get_current_async())
+        await torbox.close()
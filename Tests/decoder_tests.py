@@ -0,0 +1,35 @@
+import copy
+import json
+from Apis import Decoder, LazyModel
+from Benchmarks.SyntheticData import torrents
+from Models import DecodeMode, TorrentInfoResult
+
+CONTENT = json.dumps({"success": True, "data": torrents(3)}).encode('utf-8')
+
+
+def test_raw_mode_returns_dicts():
+    result = Decoder(DecodeMode.Raw).decode_list(CONTENT, TorrentInfoResult)
+    assert result[0]['id'] == 1
+
+
+def test_lazy_mode_validates_on_attribute_access():
+    result = Decoder(DecodeMode.Lazy).decode_list(CONTENT, TorrentInfoResult)
+    assert isinstance(result[0], LazyModel)
+    assert result[0]['hash'] == result[0].hash
+    assert isinstance(result[0].model(), TorrentInfoResult)
+
+
+def test_lazy_model_can_be_copied():
+    item = Decoder(DecodeMode.Lazy).decode_list(CONTENT, TorrentInfoResult)[0]
+    for duplicate in (copy.copy(item), copy.deepcopy(item)):
+        assert duplicate['id'] == 1 and duplicate.hash == item.hash
+
+
+def test_validated_mode_returns_models():
+    result = Decoder(DecodeMode.Validated).decode_list(CONTENT, TorrentInfoResult)
+    assert all(isinstance(torrent, TorrentInfoResult) for torrent in result)
+
+
+def test_missing_data():
+    assert Decoder(DecodeMode.Validated).decode_list(b'{"success": true, "data": null}', TorrentInfoResult) is None
+    assert Decoder(DecodeMode.Lazy).decode_list(None, TorrentInfoResult) is None
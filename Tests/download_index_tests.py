@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from Apis import DownloadIndex
+from Benchmarks.MockServer import MockTorBoxServer
+from Benchmarks.SyntheticData import info_hash
+from Exceptions import TorBoxException
+from TorBox import TorBoxPyClient
+
+
+def loader(items):
+    calls = []
+
+    async def load(skip_cache):
+        calls.append(skip_cache)
+        await asyncio.sleep(0.01)
+        return list(items)
+
+    return load, calls
+
+
+@pytest.mark.asyncio
+async def test_lookups_and_removal():
+    load, calls = loader([{"id": 1, "hash": "AA"}, {"id": 2, "hash": "bb"}, {"id": 1, "hash": "aa"}])
+    index = DownloadIndex(load, refresh_interval=60)
+
+    assert (await index.get_by_hash("aa"))["hash"] == "AA"
+    assert (await index.get_by_id(2))["hash"] == "bb"
+    assert await index.get_by_hash("cc") is None
+    assert calls == [False]
+
+    index.remove({"id": 2, "hash": "BB"})
+    assert await index.get_by_id(2) is None and len(index) == 1
+
+    index.invalidate()
+    assert await index.get_by_id(2) is not None
+    assert calls == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_reload():
+    load, calls = loader([{"id": 1, "hash": "aa"}])
+    index = DownloadIndex(load, refresh_interval=60)
+
+    await asyncio.gather(*[index.refresh(skip_cache=True) for _ in range(10)],
+                         *[index.get_by_id(1) for _ in range(10)])
+    assert calls == [True]
+
+    await index.refresh(skip_cache=True)
+    assert calls == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_a_reload_keeps_the_index_stale():
+    load, calls = loader([])
+    index = DownloadIndex(load, refresh_interval=60)
+
+    refresh = asyncio.ensure_future(index.refresh())
+    while not calls:
+        await asyncio.sleep(0)
+    index.invalidate()
+    await refresh
+
+    assert index.stale
+    await index.get_by_id(1)
+    assert len(calls) == 2
+
+
+def client(server):
+    torbox = TorBoxPyClient(index_refresh_interval=60)
+    torbox._store.api_url = server.api_url
+    torbox.use_api_authentication("key")
+    return torbox
+
+
+@pytest.mark.asyncio
+async def test_index_backed_lookups_and_control():
+    async with MockTorBoxServer(torrents=5, queued=2, usenet_downloads=3) as server:
+        torbox = client(server)
+
+        assert (await torbox.torrents.get_hash_info_async(info_hash(2))).id == 2
+        assert (await torbox.torrents.get_id_info_async(6)).download_state == "queued"
+        assert (await torbox.usenet.get_hash_info_async(info_hash(3, 32))).id == 3
+        assert server.requests["torrents/mylist"] == 1 and server.requests["usenet/mylist"] == 1
+
+        await torbox.torrents.control_async(info_hash(7), "delete")
+        assert server.requests["torrents/controlqueued"] == 1
+        assert await torbox.torrents.get_hash_info_async(info_hash(7)) is None
+
+        with pytest.raises(TorBoxException) as error:
+            await torbox.torrents.control_async(info_hash(99), "delete")
+        assert error.value.code == "ITEM_NOT_FOUND"
+        assert server.requests["torrents/controltorrent"] == 0
+
+        with pytest.raises(TorBoxException):
+            await torbox.usenet.control_async(info_hash(99, 32), "delete")
+        assert server.requests["usenet/controlusenetdownload"] == 0
+        await torbox.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_reload_the_list_once():
+    async with MockTorBoxServer(torrents=5, queued=0, latency=0.01) as server:
+        torbox = client(server)
+        await torbox.torrents.index.refresh()
+        requests = server.requests["torrents/mylist"]
+
+        results = await asyncio.gather(*[torbox.torrents.control_async(info_hash(99), "pause")
+                                         for _ in range(10)], return_exceptions=True)
+
+        assert all(isinstance(result, TorBoxException) for result in results)
+        assert server.requests["torrents/mylist"] == requests + 1
+        await torbox.close()
+
+
+@pytest.mark.asyncio
+async def test_started_queued_torrent_is_controlled_as_a_torrent():
+    async with MockTorBoxServer(torrents=3, queued=2) as server:
+        torbox = client(server)
+
+        await torbox.torrents.control_async(info_hash(4), "start")
+        assert server.requests["torrents/controlqueued"] == 1
+        mylist = server.requests["torrents/mylist"]
+
+        await torbox.torrents.control_async(info_hash(4), "delete")
+        assert server.requests["torrents/controltorrent"] == 1
+        assert server.requests["torrents/controlqueued"] == 1
+        assert server.requests["torrents/mylist"] == mylist + 1
+        assert await torbox.torrents.get_hash_info_async(info_hash(4)) is None
+        await torbox.close()
@@ -0,0 +1,44 @@
+import os
+import hashlib
+import pytest
+from contextlib import asynccontextmanager
+from Apis import Downloader, DownloadTarget, Transport
+from Apis.Downloader import target_path
+from Apis.Transport import StreamingResponse
+
+CONTENT = os.urandom(300_000)
+
+
+class RangeTransport(Transport):
+    def __init__(self):
+        self.ranges = []
+
+    @asynccontextmanager
+    async def stream(self, method, url, headers=None, data=None, chunk_size=1024):
+        start, end = map(int, headers["Range"][6:].split("-"))
+        self.ranges.append((start, end))
+
+        async def chunks():
+            for offset in range(start, end + 1, 7_000):
+                yield CONTENT[offset:min(offset + 7_000, end + 1)]
+
+        yield StreamingResponse(206, {}, chunks())
+
+
+def test_target_path_stays_in_directory():
+    assert target_path("out", "Show/../../etc/passwd") == os.path.join("out", "Show", "etc", "passwd")
+
+
+@pytest.mark.asyncio
+async def test_download_in_segments(tmp_path):
+    async def resolve():
+        return "http://cdn/file"
+
+    transport = RangeTransport()
+    target = DownloadTarget(str(tmp_path / "file.bin"), len(CONTENT), resolve, hashlib.md5(CONTENT).hexdigest())
+
+    paths = await Downloader(transport, connections=4, segment_size=64_000, buffer_size=16_000).download_async([target])
+
+    assert open(paths[0], "rb").read() == CONTENT
+    assert sorted(transport.ranges)[-1] == (256_000, len(CONTENT) - 1)
+    assert os.listdir(tmp_path) == ["file.bin"]
@@ -0,0 +1,37 @@
+import json
+import pytest
+from Apis.JsonStream import JsonItemStream
+
+
+def feed_in_chunks(body: bytes, size: int):
+    stream = JsonItemStream()
+    items = []
+    for i in range(0, len(body), size):
+        items += stream.feed(body[i:i + size])
+    return items + stream.close()
+
+
+@pytest.mark.parametrize("size", [1, 3, 64, 65536])
+def test_items_are_extracted_from_data(size):
+    response = {
+        "success": True,
+        "detail": "data",
+        "other": [{"data": [0]}],
+        "data": [{"id": 1, "name": "Big \"Buck\" Bunny ]},"}, {"id": 2, "name": "Sintel é"}, 3, None]
+    }
+    body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+
+    assert feed_in_chunks(body, size) == response["data"]
+
+
+def test_empty_and_missing_data():
+    assert feed_in_chunks(b'{"success": true, "data": []}', 5) == []
+    assert feed_in_chunks(b'{"success": true, "data": null}', 5) == []
+
+
+def test_truncated_body_raises():
+    stream = JsonItemStream()
+    stream.feed(b'{"data": [{"id": 1}, {"id"')
+
+    with pytest.raises(ValueError):
+        stream.close()
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(code: str) -> str:
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+def test_import_does_not_load_models_or_transports():
+    loaded = run("import sys, TorBox; TorBox.TorBoxPyClient(); "
+                 "print(sorted(m for m in ('pydantic', 'aiohttp', 'requests', 'Apis.UsenetApi') if m in sys.modules))")
+    assert loaded == "[]"
+
+    loaded = run("import sys, TorBox; TorBox.TorBoxPyClient(transport='requests').torrents; "
+                 "print(sorted(m for m in ('pydantic', 'aiohttp', 'requests', 'Apis.UsenetApi') if m in sys.modules))")
+    assert loaded == "['pydantic', 'requests']"
+
+
+def test_exports_are_classes_after_their_module_is_imported():
+    assert run("import Apis.Store, Models.Response, Apis, Models; "
+               "print(Apis.Store.__name__, Models.Response.__name__, Models.ResponseData.__name__)") \
+           == "Store Response ResponseData"
+    assert run("from Apis.TorrentsApi import TorrentsApi; from Apis import TorBoxRequests, TorrentsApi as api; "
+               "print(isinstance(TorBoxRequests, type), api is TorrentsApi)") == "True True"
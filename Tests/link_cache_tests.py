@@ -0,0 +1,56 @@
+import json
+import time
+import asyncio
+import pytest
+from Apis import LinkCache
+from Apis.LinkCache import link_expiry
+
+
+def response(link):
+    return json.dumps({"success": True, "error": None, "detail": "", "data": link})
+
+
+def test_link_expiry():
+    assert link_expiry("https://cdn/file?token=x&expires=1700000000") == 1700000000
+    assert link_expiry("https://cdn/file?X-Amz-Date=20231114T221320Z&X-Amz-Expires=600") == 1700000600
+    assert link_expiry("https://cdn/file?token=x") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced_and_cached():
+    cache = LinkCache()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return response("https://cdn/a")
+
+    results = await asyncio.gather(*(cache.get_or_fetch(("torrents", 1, 2, False), fetch) for _ in range(50)))
+    await cache.get_or_fetch(("torrents", 1, 2, False), fetch)
+
+    assert calls == 1
+    assert set(results) == {response("https://cdn/a")}
+    assert cache.stats == {"hits": 1, "misses": 1, "coalesced": 49, "size": 1}
+
+    cache.invalidate_link("https://cdn/a")
+    await cache.get_or_fetch(("torrents", 1, 2, False), fetch)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_links_and_errors_are_not_cached():
+    cache = LinkCache(expiry_margin=60)
+
+    async def expiring():
+        return response(f"https://cdn/a?expires={int(time.time()) + 30}")
+
+    async def failing():
+        raise ConnectionError()
+
+    await cache.get_or_fetch("expiring", expiring)
+    with pytest.raises(ConnectionError):
+        await cache.get_or_fetch("failing", failing)
+
+    assert len(cache) == 0
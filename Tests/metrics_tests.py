@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from Apis import (CircuitBreaker, MetricsCollector, RequestHooks, RetryPolicy, Store, TorBoxRequests, Transport,
+                  TransportResponse)
+from Models import CircuitState
+
+
+class ScriptedTransport(Transport):
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    async def send(self, method, url, headers=None, data=None):
+        return self.responses.pop(0)
+
+
+def client(transport, collector):
+    store = Store()
+    store.api_url = "http://torbox.test/v1/api/"
+    store.api_key = "key"
+    store.authentication_type = "api"
+    store.retry_policy = RetryPolicy(max_retries=2, base_delay=0.01)
+    store.request_hooks = (collector,)
+    return TorBoxRequests(transport, store)
+
+
+@pytest.mark.asyncio
+async def test_collects_retries_status_codes_bytes_and_decoding():
+    collector = MetricsCollector()
+    body = b'{"success": true, "data": []}'
+    transport = ScriptedTransport(TransportResponse(503, {}, b'{"error": "DATABASE_ERROR"}'),
+                                  TransportResponse(200, {}, body),
+                                  TransportResponse(200, {}, body))
+    requests = client(transport, collector)
+
+    await requests.get_request_async_generic("torrents/mylist?bypass_cache=True&token=secret", False)
+    await requests.post_request_raw_async_generic("torrents/createtorrent", {"magnet": "m", "name": None}, False)
+
+    mylist = collector.families["mylist"]
+    assert (mylist.requests, mylist.errors, mylist.retries) == (2, 1, 1)
+    assert mylist.status_codes == {503: 1, 200: 1}
+    assert mylist.response_bytes == len(body) + 27
+    assert 0 <= mylist.backoff_seconds <= 0.01
+    assert mylist.decodes == 1 and mylist.responses == 2
+    assert collector.families["create"].request_bytes == len("magnet=m")
+
+    text = collector.prometheus_text()
+    assert '# TYPE torbox_request_duration_seconds histogram' in text
+    assert 'torbox_responses_total{family="mylist",code="503"} 1' in text
+    assert 'torbox_request_duration_seconds_bucket{family="mylist",le="+Inf"} 2' in text
+    assert 'torbox_retries_total{family="create"} 0' in text
+    assert "secret" not in text
+
+
+class FailingHooks(RequestHooks):
+    def on_request_start(self, request):
+        raise RuntimeError("broken hook")
+
+    def on_request_end(self, request, status_code, response_bytes, seconds):
+        raise RuntimeError("broken hook")
+
+
+class RecordingHooks(RequestHooks):
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, request):
+        self.events.append("start")
+
+    def on_request_end(self, request, status_code, response_bytes, seconds):
+        self.events.append("end")
+
+    def on_request_error(self, request, error, status_code, seconds):
+        self.events.append(type(error).__name__)
+
+
+class HangingTransport(Transport):
+    async def send(self, method, url, headers=None, data=None):
+        await asyncio.sleep(60)
+
+
+@pytest.mark.asyncio
+async def test_failing_hooks_do_not_fail_or_retry_the_request():
+    recording = RecordingHooks()
+    transport = ScriptedTransport(TransportResponse(200, {}, b'{"success": true, "data": {"id": 1}}'))
+    requests = client(transport, FailingHooks())
+    requests._store.request_hooks = (FailingHooks(), recording)
+    requests._store.circuit_breaker = CircuitBreaker(failure_threshold=1)
+
+    result = await requests.post_request_raw_async_generic("torrents/createtorrent", {"magnet": "m"}, False)
+
+    assert result["data"] == {"id": 1} and not transport.responses
+    assert recording.events == ["start", "end"]
+    assert requests._store.circuit_breaker.state("create") == CircuitState.Closed
+
+
+@pytest.mark.asyncio
+async def test_cancelled_attempt_ends_with_an_error_event():
+    recording = RecordingHooks()
+    requests = client(HangingTransport(), recording)
+
+    request = asyncio.ensure_future(requests.get_request_async_generic("torrents/mylist", False))
+    await asyncio.sleep(0.01)
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+    assert recording.events == ["start", "CancelledError"]
+
+
+def test_latency_quantiles_interpolate_within_buckets():
+    collector = MetricsCollector(buckets=(0.1, 0.2, 0.4))
+    metrics = collector.family("mylist")
+
+    assert metrics.latency_quantile(0.5) is None
+    for seconds in (0.05, 0.15, 0.15, 0.3, 1.0):
+        metrics.observe_latency(seconds)
+
+    assert metrics.bucket_counts == [1, 2, 1, 1]
+    assert metrics.latency_quantile(0.5) == pytest.approx(0.175)
+    assert metrics.latency_quantile(0.99) == 0.4
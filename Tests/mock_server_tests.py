@@ -0,0 +1,66 @@
+import pytest
+from Benchmarks.MockServer import MockTorBoxServer
+from Benchmarks.SyntheticData import info_hash
+from TorBox import TorBoxPyClient
+from Apis import RetryPolicy
+from Models import TorrentInfoResult, UsenetInfoResult
+from Exceptions import TorBoxException
+
+
+def client(server, **options):
+    torbox = TorBoxPyClient(**options)
+    torbox._store.api_url = server.api_url
+    torbox.use_api_authentication("key")
+    return torbox
+
+
+@pytest.mark.asyncio
+async def test_client_operations_against_mock_server():
+    async with MockTorBoxServer(torrents=20, queued=2, usenet_downloads=5) as server:
+        torbox = client(server)
+
+        assert len(await torbox.torrents.get_current_async()) == 20
+        assert len(await torbox.torrents.get_queued_async()) == 2
+        assert len([item async for item in torbox.usenet.iter_current_async()]) == 5
+        assert (await torbox.torrents.get_id_info_async(3)).hash == info_hash(3)
+
+        added = await torbox.torrents.add_magnet_async(f"magnet:?xt=urn:btih:{info_hash(99)}")
+        assert added['data']['hash'] == info_hash(99)
+        await torbox.torrents.control_async(info_hash(99), "delete")
+        assert len(await torbox.torrents.get_current_async(True)) == 20
+
+        assert "/dl/torrents/3/0" in await torbox.torrents.request_download_async(3, 0)
+        assert len(await torbox.torrents.get_availability_many_async([info_hash(i) for i in range(10)])) == 10
+        assert server.requests["torrents/createtorrent"] == 1
+        await torbox.close()
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_retried():
+    async with MockTorBoxServer(torrents=5, error_rate=1.0) as server:
+        torbox = client(server, retry_policy=RetryPolicy(max_retries=2, base_delay=0.001))
+
+        with pytest.raises(TorBoxException) as error:
+            await torbox.torrents.get_current_async()
+        assert error.value.code == "DATABASE_ERROR"
+        assert server.requests["torrents/mylist"] == 3
+
+        server.error_rate = 0.0
+        assert len(await torbox.torrents.get_current_async()) == 5
+        await torbox.close()
+
+
+@pytest.mark.asyncio
+async def test_hash_and_id_lookups_return_info_results():
+    async with MockTorBoxServer(torrents=3, queued=2, usenet_downloads=2) as server:
+        torbox = client(server)
+
+        active = await torbox.torrents.get_hash_info_async(info_hash(2))
+        queued = await torbox.torrents.get_hash_info_async(info_hash(5))
+        assert isinstance(active, TorrentInfoResult) and active.id == 2
+        assert isinstance(queued, TorrentInfoResult) and queued.download_state == "queued"
+        assert queued == await torbox.torrents.get_id_info_async(5)
+        assert await torbox.torrents.get_hash_info_async(info_hash(9)) is None
+
+        assert isinstance(await torbox.usenet.get_hash_info_async(info_hash(1, 32)), UsenetInfoResult)
+        await torbox.close()
@@ -0,0 +1,35 @@
+import io
+import pytest
+from Apis import MultipartBody
+
+
+async def read(body):
+    return b"".join([chunk async for chunk in body.chunks(4)])
+
+
+@pytest.mark.asyncio
+async def test_body_matches_content_length_and_replays():
+    file = io.BytesIO(b"skip:torrent-content")
+    file.seek(5)
+    body = MultipartBody({"seed": 1, "name": None, "file": ("a.torrent", file, "application/x-bittorrent")}, "XYZ")
+
+    content = await read(body)
+
+    assert content == (b'--XYZ\r\nContent-Disposition: form-data; name="seed"\r\n\r\n1\r\n'
+                       b'--XYZ\r\nContent-Disposition: form-data; name="file"; filename="a.torrent"\r\n'
+                       b'Content-Type: application/x-bittorrent\r\n\r\ntorrent-content\r\n--XYZ--\r\n')
+    assert body.content_length == len(content)
+    assert body.replayable
+    assert await read(body) == content
+
+
+@pytest.mark.asyncio
+async def test_async_iterable_is_sent_once():
+    async def chunks():
+        yield b"nzb"
+
+    body = MultipartBody({"file": ("a.nzb", chunks(), "application/x-nzb")})
+
+    assert body.content_length is None
+    assert not body.replayable
+    assert b"nzb" in await read(body)
@@ -0,0 +1,85 @@
+import pytest
+from Apis import MyListSync
+
+
+class FakeApi:
+    """The newest downloads come first in mylist, like on TorBox."""
+
+    def __init__(self, *items):
+        self.items = {item['id']: item for item in items}
+        self.list_calls = []
+        self.item_calls = []
+
+    async def get_current_async(self, skip_cache=False, offset=None, limit=None):
+        self.list_calls.append(limit)
+        items = [dict(item) for item in sorted(self.items.values(), key=lambda item: -item['id'])]
+        return items[offset or 0:(offset or 0) + limit] if limit is not None else items
+
+    async def get_list_item_async(self, id, skip_cache=False):
+        self.item_calls.append(id)
+        item = self.items.get(id)
+        return dict(item) if item is not None else None
+
+    def add(self, item):
+        self.items[item['id']] = item
+
+    def set(self, id, **fields):
+        self.items[id] = {**self.items[id], **fields}
+
+
+def download(id, updated_at="t0", finished=False):
+    return {"id": id, "updated_at": updated_at, "active": not finished, "download_finished": finished}
+
+
+@pytest.mark.asyncio
+async def test_delta_sync_reports_added_updated_and_removed():
+    api = FakeApi(download(1, finished=True), download(2), download(3))
+    sync = MyListSync(api, full_sync_every=10, head_size=2)
+
+    first = await sync.sync()
+    assert [item['id'] for item in first.added] == [3, 2, 1]
+    assert api.list_calls == [None]
+
+    assert not await sync.sync()
+    assert api.list_calls == [None, 2]
+    assert sorted(api.item_calls) == [2, 3]
+
+    api.add(download(4))
+    api.set(2, updated_at="t1")
+    del api.items[3]
+    diff = await sync.sync()
+
+    assert [item['id'] for item in diff.added] == [4]
+    assert [item['id'] for item in diff.updated] == [2]
+    assert [item['id'] for item in diff.removed] == [3]
+    assert set(sync.snapshot) == {1, 2, 4}
+    assert api.list_calls == [None, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_finished_items_are_removed_by_the_full_sync():
+    api = FakeApi(download(1, finished=True), download(2))
+    sync = MyListSync(api, full_sync_every=2, head_size=1)
+    await sync.sync()
+
+    del api.items[1]
+    assert not await sync.sync()
+    assert api.item_calls == [2]
+
+    diff = await sync.sync()
+    assert [item['id'] for item in diff.removed] == [1]
+    assert api.list_calls == [None, 1, None]
+
+
+@pytest.mark.asyncio
+async def test_head_of_unknown_items_falls_back_to_a_full_sync():
+    api = FakeApi(download(1))
+    sync = MyListSync(api, head_size=2)
+    await sync.sync()
+
+    api.add(download(2))
+    api.add(download(3))
+    diff = await sync.sync()
+
+    assert [item['id'] for item in diff.added] == [3, 2]
+    assert api.list_calls == [None, 2, None]
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from Apis.Pagination import iter_pages
+from Benchmarks.MockServer import MockTorBoxServer
+from TorBox import TorBoxPyClient
+
+
+class Pages:
+    def __init__(self, count, delay=0.0):
+        self.items = list(range(count))
+        self.delay = delay
+        self.requested = []
+        self.cancelled = []
+
+    async def fetch(self, offset, limit):
+        self.requested.append(offset)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(offset)
+            raise
+        return self.items[offset:offset + limit]
+
+
+@pytest.mark.asyncio
+async def test_stops_on_a_short_or_empty_page():
+    short = Pages(7)
+    assert [item async for item in iter_pages(short.fetch, 3)] == list(range(7))
+    assert short.requested == [0, 3, 6]
+
+    empty = Pages(6)
+    assert [item async for item in iter_pages(empty.fetch, 3)] == list(range(6))
+    assert empty.requested == [0, 3, 6]
+
+
+@pytest.mark.asyncio
+async def test_next_page_is_requested_while_the_current_one_is_processed():
+    pages = Pages(10, delay=0.01)
+    iterator = iter_pages(pages.fetch, 5)
+
+    assert await iterator.__anext__() == 0
+    await asyncio.sleep(0)
+    assert pages.requested == [0, 5]
+    await iterator.aclose()
+
+    pages = Pages(10, delay=0.01)
+    iterator = iter_pages(pages.fetch, 5, prefetch=False)
+
+    assert await iterator.__anext__() == 0
+    await asyncio.sleep(0)
+    assert pages.requested == [0]
+    assert [item async for item in iterator] == list(range(1, 10))
+    assert pages.requested == [0, 5, 10]
+
+
+@pytest.mark.asyncio
+async def test_stopping_early_cancels_the_prefetched_page():
+    pages = Pages(100, delay=0.05)
+    iterator = iter_pages(pages.fetch, 10)
+
+    async for item in iterator:
+        await asyncio.sleep(0)
+        if item == 3:
+            break
+    await iterator.aclose()
+    await asyncio.sleep(0)
+
+    assert pages.requested == [0, 10]
+    assert pages.cancelled == [10]
+
+
+@pytest.mark.asyncio
+async def test_paginate_current_async():
+    async with MockTorBoxServer(torrents=25, queued=3) as server:
+        torbox = TorBoxPyClient()
+        torbox._store.api_url = server.api_url
+        torbox.use_api_authentication("key")
+
+        ids = [item['id'] async for item in torbox.torrents.paginate_current_async(page_size=10)]
+        assert ids == list(range(1, 26))
+        assert server.requests["torrents/mylist"] == 3
+
+        queued = [item async for item in torbox.torrents.paginate_queued_async(page_size=2)]
+        assert [item.download_state for item in queued] == ["queued"] * 3
+        await torbox.close()
@@ -0,0 +1,120 @@
+import asyncio
+import importlib
+import pytest
+from Apis import RateLimiter, TokenBucket, Transport, TransportResponse, endpoint_family
+from TorBox import TorBoxPyClient
+
+
+class EmptyListTransport(Transport):
+    def __init__(self):
+        self.tokens = []
+
+    async def send(self, method, url, headers=None, data=None):
+        self.tokens.append(headers["Authorization"])
+        return TransportResponse(200, {}, b'{"success": true, "data": []}')
+
+
+class FrozenClock:
+    """Replaces the clock of the rate limiter, the buckets then refill only when the test moves the time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FrozenClock()
+    monkeypatch.setattr(importlib.import_module("Apis.RateLimiter"), "time", clock)
+    return clock
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Records the wait of every reservation instead of measuring the wall clock."""
+    delays = []
+    reserve = TokenBucket.reserve
+
+    def recording_reserve(bucket):
+        delays.append(round(reserve(bucket), 6))
+        return delays[-1]
+
+    monkeypatch.setattr(TokenBucket, "reserve", recording_reserve)
+    return delays
+
+
+def test_endpoint_family():
+    assert endpoint_family("torrents/createtorrent") == "create"
+    assert endpoint_family("usenet/mylist?bypass_cache=True") == "mylist"
+    assert endpoint_family("torrents/checkcached?hash=abc&format=list") == "checkcached"
+    assert endpoint_family("user/me") == "default"
+
+
+def test_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(rate=10, burst=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.wait_time == pytest.approx(0.2)
+
+    clock.now += 0.15
+    assert bucket.wait_time == pytest.approx(0.05)
+
+
+@pytest.mark.asyncio
+async def test_limiter_throttles_per_family(clock, delays):
+    limiter = RateLimiter({"create": (20, 1)})
+
+    await asyncio.gather(*(limiter.acquire("create") for _ in range(5)))
+    await asyncio.gather(*(limiter.acquire("mylist") for _ in range(100)))
+
+    assert delays == [0, 0.05, 0.1, 0.15, 0.2]
+    assert limiter.wait_time("mylist") == 0
+
+
+def test_pause():
+    limiter = RateLimiter({"default": (10, 5)})
+    limiter.pause("mylist", 2)
+
+    assert limiter.wait_time("mylist") > 2
+
+
+def test_accounts_have_their_own_buckets():
+    limiter = RateLimiter({"default": (10, 5)})
+    limiter.pause("mylist", 2, account="a")
+
+    assert limiter.wait_time("mylist", account="a") > 2
+    assert limiter.wait_time("mylist", account="b") == 0
+    assert limiter.wait_time("mylist") == 0
+
+
+@pytest.mark.asyncio
+async def test_tenants_are_throttled_separately(clock, delays):
+    transport = EmptyListTransport()
+    limiter = RateLimiter({"mylist": (10, 1)})
+    torbox = TorBoxPyClient(transport=transport, rate_limiter=limiter)
+    torbox.use_api_authentication("a")
+    tenant = torbox.for_api_key("b")
+
+    await asyncio.gather(*(api.get_current_async() for api in (torbox.torrents, tenant.torrents) for _ in range(3)))
+
+    # Each account waits for its own tokens only, a shared bucket would make the last request wait 0.5 seconds.
+    assert sorted(delays) == [0, 0, 0.1, 0.1, 0.2, 0.2]
+    assert sorted(transport.tokens) == ["Bearer a"] * 3 + ["Bearer b"] * 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_its_token_back(clock):
+    bucket = TokenBucket(rate=10, burst=1)
+    await bucket.acquire()
+
+    waiter = asyncio.ensure_future(bucket.acquire())
+    await asyncio.sleep(0)
+    assert bucket.wait_time == pytest.approx(0.2)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert bucket.wait_time == pytest.approx(0.1)
@@ -0,0 +1,56 @@
+from Apis import RetryPolicy
+from Exceptions import AccessTokenExpired, TorBoxException
+
+
+def test_error_codes_take_precedence_over_status():
+    policy = RetryPolicy(max_retries=3)
+
+    assert policy.should_retry(0, TorBoxException("DOWNLOAD_SERVER_ERROR"), 400)
+    assert not policy.should_retry(0, TorBoxException("BOZO_TORRENT"), 500)
+    assert policy.should_retry(0, Exception("Bad Gateway"), 502)
+    assert not policy.should_retry(0, Exception("Bad Request"), 400)
+    assert not policy.should_retry(0, AccessTokenExpired())
+
+
+def test_max_retries():
+    policy = RetryPolicy(max_retries=2)
+
+    assert policy.should_retry(1, ConnectionError())
+    assert not policy.should_retry(2, ConnectionError())
+
+
+def test_only_transport_errors_are_retried_without_a_response():
+    policy = RetryPolicy(max_retries=3)
+
+    assert policy.should_retry(0, TimeoutError())
+    assert policy.should_retry(0, OSError("Connection reset"))
+    assert not policy.should_retry(0, TypeError("unsupported operand"))
+    assert not policy.should_retry(0, KeyError("data"))
+
+
+def test_posts_are_only_retried_when_they_were_not_applied():
+    policy = RetryPolicy(max_retries=3)
+
+    assert not policy.should_retry(0, TimeoutError(), None, "POST")
+    assert not policy.should_retry(0, Exception("Bad Gateway"), 502, "POST")
+    assert not policy.should_retry(0, TorBoxException("DATABASE_ERROR"), 500, "POST")
+    assert policy.should_retry(0, TorBoxException("DATABASE_ERROR"), 503, "POST")
+    assert policy.should_retry(0, Exception("Too Many Requests"), 429, "POST")
+    assert not policy.should_retry(0, TorBoxException("ACTIVE_LIMIT"), 429, "POST")
+
+    opted_in = RetryPolicy(max_retries=3, retry_non_idempotent=True)
+    assert opted_in.should_retry(0, TimeoutError(), None, "POST")
+    assert opted_in.should_retry(0, Exception("Bad Gateway"), 502, "POST")
+
+
+def test_backoff_is_jittered_and_respects_retry_after():
+    policy = RetryPolicy(base_delay=1, max_delay=4)
+
+    assert all(0 <= policy.backoff(10) <= 4 for _ in range(100))
+    assert policy.backoff(0, retry_after=7) == 7
+
+
+def test_parse_retry_after():
+    assert RetryPolicy.parse_retry_after("3") == 3
+    assert RetryPolicy.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert RetryPolicy.parse_retry_after("soon") is None
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from Apis import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"data": []}
+
+    results = await asyncio.gather(*(flight.do("mylist", call) for _ in range(10)))
+    await flight.do("mylist", call)
+
+    assert calls == 2
+    assert all(result is results[0] for result in results)
+    assert (flight.calls, flight.coalesced, len(flight)) == (2, 9, 0)
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_cancelled_leader_is_replaced():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ConnectionError()
+
+    results = await asyncio.gather(*(flight.do("a", failing) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    async def slow():
+        await asyncio.sleep(0.01)
+        return 1
+
+    leader = asyncio.ensure_future(flight.do("b", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("b", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == 1
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import pytest
+from Apis import BackgroundLoop
+from Benchmarks.MockServer import MockTorBoxServer
+from TorBox import TorBoxPyClientSync
+
+
+@pytest.fixture
+def server():
+    loop = BackgroundLoop("mock-server")
+    mock = MockTorBoxServer(torrents=30, usenet_downloads=5)
+    loop.run(mock.start())
+    yield mock
+    loop.run(mock.stop())
+    loop.stop()
+
+
+def client(server):
+    torbox = TorBoxPyClientSync()
+    torbox.client._store.api_url = server.api_url
+    torbox.use_api_authentication("key")
+    return torbox
+
+
+def test_blocking_calls_share_one_loop_and_pool(server):
+    with client(server) as torbox:
+        assert len(torbox.torrents.get_current()) == 30
+        assert len(list(torbox.usenet.iter_current())) == 5
+        assert [item['id'] for item in torbox.torrents.paginate_current(page_size=10)][:3] == [1, 2, 3]
+
+        session = torbox.client.transport._session
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(5):
+                    assert len(torbox.torrents.get_current(True)) == 30
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert torbox.client.transport._session is session
+
+    assert not torbox._background.running
+
+
+def test_batches_and_tenants(server):
+    with client(server) as torbox:
+        links = torbox.run_many(torbox.client.torrents.request_download_async(id, 0) for id in range(1, 11))
+        assert len(links) == 10 and all("/dl/torrents/" in link for link in links)
+
+        results = torbox.run_many([torbox.client.torrents.get_id_info_async(1),
+                                   torbox.client.torrents.request_download_async(10_000, 0)],
+                                  return_exceptions=True)
+        assert results[0].id == 1 and isinstance(results[1], Exception)
+
+        tenant = torbox.for_api_key("other")
+        assert len(tenant.torrents.get_current()) == 30
+        tenant.close()
+        assert torbox._background.running
+        assert set(server.accounts) == {"key", "other"}
+
+
+def test_blocking_call_from_the_loop_is_refused():
+    loop = BackgroundLoop()
+
+    async def nested():
+        return loop.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        loop.run(nested())
+    loop.stop()
+
+
+def test_session_of_a_stopped_loop_is_closed(server):
+    with client(server) as torbox:
+        assert len(torbox.torrents.get_current()) == 30
+        session = torbox.client.transport._session
+
+        torbox._background.stop()
+        assert len(torbox.torrents.get_current(True)) == 30
+        assert session.closed
+        assert torbox.client.transport._session is not session
@@ -66,6 +66,14 @@ async def test_check_availability(client: TorBoxPyClient):
     assert result  # Adjust based on actual response structure
 
 
+@pytest.mark.asyncio
+async def test_check_availability_many(client: TorBoxPyClient):
+    hashes = ["dd8255ecdc7ca55fb0bbf81323d87062db1f6d1c", "0000000000000000000000000000000000000000"]
+    result = await client.torrents.get_availability_many_async(hashes, False)
+    assert set(result.keys()) == set(hashes)
+    assert result["0000000000000000000000000000000000000000"] is None
+
+
 @pytest.mark.asyncio
 async def test_request_download(client: TorBoxPyClient):
     torrent_id = 123
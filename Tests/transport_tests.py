@@ -0,0 +1,71 @@
+import time
+import asyncio
+import threading
+import aiohttp
+import requests
+from Apis import AiohttpTransport
+from TorBox import TorBoxPyClient
+
+
+class SlowClosingSession:
+    closed = False
+
+    async def close(self):
+        await asyncio.sleep(0.01)
+        self.closed = True
+
+
+def test_concurrent_calls_on_a_new_loop_share_one_session():
+    transport = AiohttpTransport()
+    old_loop = asyncio.new_event_loop()
+    old_loop.close()
+    old_session = transport._session = SlowClosingSession()
+    transport._loop = old_loop
+
+    async def sessions():
+        return await asyncio.gather(*[transport._get_session() for _ in range(10)])
+
+    first = asyncio.run(sessions())
+    assert all(session is first[0] for session in first)
+    assert old_session.closed
+
+    second = asyncio.run(sessions())
+    assert all(session is second[0] for session in second)
+    assert second[0] is not first[0] and first[0].closed
+
+    asyncio.run(transport.close())
+    assert second[0].closed
+
+
+def test_sessions_created_on_two_threads_are_not_leaked(monkeypatch):
+    created = []
+    client_session = aiohttp.ClientSession
+
+    def slow_client_session(*args, **kwargs):
+        time.sleep(0.05)
+        created.append(client_session(*args, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(aiohttp, 'ClientSession', slow_client_session)
+    transport = AiohttpTransport()
+
+    async def use():
+        await transport._get_session()
+        # Keeps the loop alive, so the other thread can close this loop's session on it.
+        await asyncio.sleep(0.2)
+
+    threads = [threading.Thread(target=asyncio.run, args=(use(),)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    asyncio.run(transport.close())
+
+    assert len(created) == 2 and all(session.closed for session in created)
+
+
+def test_client_is_the_requests_session():
+    session = requests.Session()
+    assert TorBoxPyClient(http_client=session).client is session
+    assert isinstance(TorBoxPyClient(transport="requests").client, requests.Session)
+    assert TorBoxPyClient().client is None
@@ -60,6 +60,13 @@ async def test_usenet_availability(client):
     assert result['success']  # Adjust based on actual response structure
 
 
+@pytest.mark.asyncio
+async def test_usenet_availability_many(client):
+    hashes = ["1c414b53446c0249abfc2bb705e42ffe", "00000000000000000000000000000000"]
+    result = await client.usenet.get_availability_many_async(hashes, False)
+    assert set(result.keys()) == set(hashes)
+
+
 @pytest.mark.asyncio
 async def test_usenet_request_download(client):
     usenet_id = 123
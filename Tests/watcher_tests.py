@@ -0,0 +1,170 @@
+import asyncio
+import pytest
+from Apis import Watcher
+from Apis.Watcher import FINISHED
+from Exceptions import TorBoxException
+
+
+class FakeAccount:
+    def __init__(self, *items):
+        self.items = {item['hash']: item for item in items}
+        self.loads = 0
+
+    async def load(self, skip_cache):
+        self.loads += 1
+        return [dict(item) for item in self.items.values()]
+
+    def set(self, hash, **fields):
+        self.items[hash] = {**self.items[hash], **fields}
+
+
+def download(hash, state="downloading", eta=0, finished=False):
+    return {"id": hash, "hash": hash, "download_state": state, "eta": eta, "download_finished": finished}
+
+
+@pytest.mark.asyncio
+async def test_many_waiters_share_one_poll():
+    account = FakeAccount(download("AA"), download("bb"))
+    watcher = Watcher(account.load, min_interval=0.01, max_interval=0.05)
+
+    waiters = asyncio.gather(*(watcher.wait_for("aa" if i % 2 else "BB") for i in range(1000)))
+    await asyncio.sleep(0.02)
+    account.set("AA", download_state="completed", download_finished=True)
+    account.set("bb", download_state="completed", download_finished=True)
+
+    results = await asyncio.wait_for(waiters, 1)
+
+    assert {result['hash'] for result in results} == {"AA", "bb"}
+    assert account.loads <= 5
+    await asyncio.sleep(0.06)
+    assert not watcher.running
+
+
+@pytest.mark.asyncio
+async def test_arriving_waiters_do_not_poll_faster_than_min_interval():
+    account = FakeAccount(download("aa"))
+    watcher = Watcher(account.load, min_interval=0.05, max_interval=1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    waiters = []
+    for i in range(100):
+        waiters.append(asyncio.ensure_future(watcher.wait_for("aa" if i % 2 else f"new{i}", timeout=5)))
+        await asyncio.sleep(0.005)
+    account.set("aa", download_state="completed", download_finished=True)
+    for i in range(0, 100, 2):
+        account.items[f"new{i}"] = download(f"new{i}", state="completed", finished=True)
+    await asyncio.wait_for(asyncio.gather(*waiters), 5)
+
+    assert 1 < account.loads <= (loop.time() - started) / watcher.min_interval + 2
+    await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_interval_stays_short_until_the_waited_download_is_listed():
+    account = FakeAccount(download("aa", state="paused"))
+    watcher = Watcher(account.load, min_interval=1, max_interval=8)
+    watcher._waiters["bb"] = [[FINISHED, asyncio.get_running_loop().create_future(), False]]
+
+    for _ in range(3):
+        await watcher.poll()
+        assert watcher.interval == 1
+
+    account.items["bb"] = download("bb", state="paused")
+    await watcher.poll()
+    assert watcher.interval == 2
+
+
+@pytest.mark.asyncio
+async def test_wait_for_state_timeout_and_removal():
+    account = FakeAccount(download("aa", state="metaDL"))
+    watcher = Watcher(account.load, min_interval=0.01, max_interval=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await watcher.wait_for("aa", "uploading", timeout=0.03)
+
+    account.set("aa", download_state="uploading")
+    assert (await watcher.wait_for("aa", "uploading", timeout=1))['download_state'] == "uploading"
+    assert (await watcher.wait_for("aa", lambda item: item['eta'] == 0))['hash'] == "aa"
+
+    waiter = asyncio.ensure_future(watcher.wait_for("aa", timeout=1))
+    await asyncio.sleep(0.02)
+    del account.items["aa"]
+    with pytest.raises(TorBoxException):
+        await waiter
+    await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_events_report_transitions():
+    account = FakeAccount(download("aa", state="downloading"))
+    watcher = Watcher(account.load, min_interval=0.01, max_interval=0.05)
+    events = watcher.events()
+    received = []
+
+    async def consume():
+        async for event in events:
+            received.append((event.hash, event.old_state, event.new_state))
+            if len(received) == 3:
+                return
+
+    consumer = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.02)
+    account.set("aa", download_state="completed", download_finished=True)
+    account.items["bb"] = download("bb", state="queued")
+    await asyncio.sleep(0.03)
+    del account.items["aa"]
+    await asyncio.wait_for(consumer, 1)
+    await events.aclose()
+
+    assert received == [("aa", "downloading", "completed"), ("bb", None, "queued"), ("aa", "completed", None)]
+    await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_dropped_when_the_poller_stops():
+    account = FakeAccount(download("aa", state="downloading"))
+    watcher = Watcher(account.load, min_interval=0.01, max_interval=0.05)
+
+    assert (await watcher.wait_for("aa", "downloading", timeout=1))['download_state'] == "downloading"
+    await asyncio.sleep(0.03)
+    assert not watcher.running
+
+    account.set("aa", download_state="completed", download_finished=True)
+    with pytest.raises(asyncio.TimeoutError):
+        await watcher.wait_for("aa", "downloading", timeout=0.05)
+    await asyncio.sleep(0.03)
+    assert not watcher.running
+
+    # The change of aa happened before subscribing, the first event must be the later change of bb.
+    account.items["bb"] = download("bb", state="queued")
+    events = watcher.events()
+    received = asyncio.ensure_future(events.__anext__())
+    await asyncio.sleep(0.02)
+    account.set("bb", download_state="downloading")
+
+    event = await asyncio.wait_for(received, 1)
+    assert (event.hash, event.old_state, event.new_state) == ("bb", "queued", "downloading")
+    await events.aclose()
+    await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_interval_adapts_to_eta_and_idle():
+    account = FakeAccount(download("aa", eta=5))
+    watcher = Watcher(account.load, min_interval=1, max_interval=8)
+    watcher._subscribers.add(asyncio.Queue())
+
+    await watcher.poll()
+    assert watcher.interval == 5
+
+    account.set("aa", eta=0)
+    await watcher.poll()
+    assert watcher.interval == 1
+
+    account.set("aa", download_state="paused")
+    intervals = []
+    for _ in range(5):
+        await watcher.poll()
+        intervals.append(watcher.interval)
+    assert intervals == [2, 4, 8, 8, 8]
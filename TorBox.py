@@ -1,6 +1,8 @@
-import requests
-from Apis import TorrentsApi, Store
-from Models import AuthenticationType
+import copy
+import Apis
+from Apis import (Store, AvailabilityCache, RetryPolicy, RateLimiter, CircuitBreaker, LinkCache, SingleFlight,
+                  BackgroundLoop, SyncApi, create_transport, hook_tuple)
+from Models import AuthenticationType, DecodeMode
 
 
 class TorBoxPyClient:
@@ -9,7 +11,11 @@ class TorBoxPyClient:
     Documentation about the API can be found here: https://api.real-debrid.com/
     """
 
-    def __init__(self, app_id=None, http_client=None, retry_count=1):
+    def __init__(self, app_id=None, http_client=None, retry_count=1, transport=None, connection_limit=100,
+                 connection_limit_per_host=0, keepalive_timeout=30.0, timeout=None, availability_cache=None,
+                 index_refresh_interval=None, decode_mode=DecodeMode.Raw, retry_policy=None,
+                 rate_limiter=None, circuit_breaker=None, link_cache=None, single_flight=None,
+                 request_hooks=None):
         """
         Initialize the TorBoxNet API.
         To use authentication make sure to call either use_api_authentication for Api Key authentication
@@ -18,17 +24,116 @@ class TorBoxPyClient:
         :param app_id: The ID of your application. If None the app id will be set to the default Opensource App ID
                        X245A4XAIBGVM. You can request a new key through the Help section on Real-Debrid.
         :param http_client: Optional requests.Session if you want to use your own Session.
+                            Passing a Session selects the requests transport.
         :param retry_count: The API will retry this many times before failing.
+        :param transport: The HTTP transport, either "aiohttp" (default), "requests" or a Transport instance.
+                          The aiohttp transport is truly non-blocking, the requests transport runs every
+                          call on a worker thread and is kept as a fallback.
+        :param connection_limit: Maximum number of pooled connections for the aiohttp transport, 0 for no limit.
+        :param connection_limit_per_host: Maximum number of pooled connections per host for the aiohttp transport.
+        :param keepalive_timeout: Seconds an idle pooled connection is kept alive by the aiohttp transport.
+        :param timeout: Total timeout in seconds for a single request made by the aiohttp transport.
+        :param availability_cache: Optional AvailabilityCache in front of the checkcached calls of
+                                   get_availability_async and get_availability_many_async, pass True to use an
+                                   in-memory cache with the default settings.
+        :param index_refresh_interval: Seconds between refreshes of the local hash and id index of the account's
+                                       torrents and usenet downloads. None disables the index and every lookup
+                                       downloads the full list.
+        :param decode_mode: How list items are returned, DecodeMode.Raw returns the decoded dicts, DecodeMode.Lazy
+                            returns LazyModel wrappers validated on first attribute access and DecodeMode.Validated
+                            validates the response bytes straight into models.
+        :param retry_policy: Optional RetryPolicy deciding which failures are retried and how long to back off.
+                             Defaults to a RetryPolicy retrying retry_count times with exponential backoff.
+        :param rate_limiter: Optional RateLimiter throttling requests per account and endpoint family before they
+                             are sent, pass True to use the default limits.
+        :param circuit_breaker: Optional CircuitBreaker failing requests fast with CircuitOpen while an endpoint
+                                family keeps failing, pass True to use the default thresholds.
+        :param link_cache: Optional LinkCache reusing download links returned by requestdl until they expire,
+                           pass True to use a cache with the default TTL.
+        :param single_flight: Optional SingleFlight sharing one request and its parsed result between concurrent
+                              identical GET calls of the same account, for example mylist and checkcached. Callers
+                              then receive the same objects and should not modify them. Pass True to enable it.
+        :param request_hooks: Optional RequestHooks, or a list of them, notified when requests start, end, fail
+                              and are retried, for example a MetricsCollector.
         """
         self._store = Store()
         self._store.app_id = app_id or "X245A4XAIBGVM"
         self._store.retry_count = retry_count
+        self._store.retry_policy = retry_policy or RetryPolicy(max_retries=retry_count)
+        self._store.rate_limiter = RateLimiter() if rate_limiter is True else rate_limiter
+        self._store.circuit_breaker = CircuitBreaker() if circuit_breaker is True else circuit_breaker
+        self._store.link_cache = LinkCache() if link_cache is True else link_cache
+        self._store.single_flight = SingleFlight() if single_flight is True else single_flight
+        self._store.request_hooks = hook_tuple(request_hooks)
+        self._store.availability_cache = AvailabilityCache() if availability_cache is True else availability_cache
+        self._store.index_refresh_interval = index_refresh_interval
+        self._store.decode_mode = decode_mode
 
-        self.client = http_client or requests.Session()
+        self.transport = create_transport(transport, http_client,
+                                          connection_limit=connection_limit,
+                                          connection_limit_per_host=connection_limit_per_host,
+                                          keepalive_timeout=keepalive_timeout,
+                                          timeout=timeout)
+        self._owns_transport = True
 
-        self.torrents = TorrentsApi(self.client, self._store)
-        # self.usenet = UsenetApi(self.client, self._store)
-        # self.user = UserApi(self.client, self._store)
+        self._create_apis()
+
+    @property
+    def client(self):
+        """
+        The requests.Session of the requests transport, kept for callers configuring it directly.
+        None with the other transports, pass http_client or transport="requests" to keep using a Session.
+        """
+        return getattr(self.transport, 'http_client', None)
+
+    def _create_apis(self):
+        # The Apis, their modules and models are loaded on first access.
+        self._torrents = None
+        self._usenet = None
+        # self.user = UserApi(self.transport, self._store)
+
+    @property
+    def torrents(self):
+        if self._torrents is None:
+            self._torrents = Apis.TorrentsApi(self.transport, self._store)
+        return self._torrents
+
+    @property
+    def usenet(self):
+        if self._usenet is None:
+            self._usenet = Apis.UsenetApi(self.transport, self._store)
+        return self._usenet
+
+    def for_api_key(self, api_key):
+        """
+        Create a client for another account that shares this client's transport and connection pool.
+        Use this to serve many API keys from a single pool, creating a tenant client is cheap and can be done
+        per incoming request. Closing a tenant client does not close the shared transport.
+
+        :param api_key: The API key of the account the returned client should authenticate as.
+        """
+        tenant = copy.copy(self)
+        tenant._store = self._store.copy()
+        tenant._owns_transport = False
+        tenant.use_api_authentication(api_key)
+        tenant._create_apis()
+        return tenant
+
+    async def close(self):
+        """
+        Stop the download watchers, close the underlying transport and release its pooled connections.
+        """
+        for api in (self._torrents, self._usenet):
+            if api is not None:
+                await api.watcher.stop()
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
 
     def use_api_authentication(self, api_key):
         """
@@ -69,3 +174,97 @@ class TorBoxPyClient:
         self._store.oauth_client_secret = client_secret
         self._store.oauth_access_token = access_token
         self._store.oauth_refresh_token = refresh_token
+
+
+class TorBoxPyClientSync:
+    """
+    Blocking TorBoxPyClient for threads without an event loop, for example Celery workers and scripts.
+    Calls run on one long-lived background event loop, so the connection pool is kept between calls, and any
+    number of threads can share a client.
+
+    The methods of client.torrents and client.usenet are available without their _async suffix, for example
+    client.torrents.get_current(). Use run_many to send a batch of calls concurrently.
+    """
+
+    def __init__(self, *args, background_loop=None, **options):
+        """
+        Accepts the arguments of TorBoxPyClient.
+
+        :param background_loop: Optional BackgroundLoop to share with other clients, by default the client
+                                starts its own and stops it when closed.
+        """
+        self._background = background_loop or BackgroundLoop()
+        self._owns_background = background_loop is None
+        self.client = TorBoxPyClient(*args, **options)
+        self._create_apis()
+
+    def _create_apis(self):
+        self._torrents = None
+        self._usenet = None
+
+    @property
+    def torrents(self):
+        if self._torrents is None:
+            self._torrents = SyncApi(self.client.torrents, self._background)
+        return self._torrents
+
+    @property
+    def usenet(self):
+        if self._usenet is None:
+            self._usenet = SyncApi(self.client.usenet, self._background)
+        return self._usenet
+
+    def __getattr__(self, name):
+        # Authentication and the other synchronous methods of TorBoxPyClient.
+        client = self.__dict__.get('client')
+        if client is None or name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(client, name)
+
+    def for_api_key(self, api_key):
+        """
+        Create a client for another account that shares this client's background loop and connection pool.
+
+        :param api_key: The API key of the account the returned client should authenticate as.
+        """
+        tenant = copy.copy(self)
+        tenant.client = self.client.for_api_key(api_key)
+        tenant._owns_background = False
+        tenant._create_apis()
+        return tenant
+
+    def run(self, awaitable, timeout=None):
+        """
+        Run a coroutine, for example client.client.torrents.watcher.wait_for(hash), and return its result.
+        """
+        return self._background.run(awaitable, timeout)
+
+    def run_many(self, awaitables, return_exceptions=False, timeout=None):
+        """
+        Run coroutines concurrently on the background loop and return their results in order, for example
+        client.run_many(client.client.torrents.get_hash_info_async(hash) for hash in hashes).
+
+        :param return_exceptions: Return the errors in the results instead of raising the first one.
+        """
+        return self._background.run_many(awaitables, return_exceptions, timeout)
+
+    def submit(self, awaitable):
+        """
+        Schedule a coroutine without waiting and return a concurrent.futures.Future of its result.
+        """
+        return self._background.submit(awaitable)
+
+    def close(self):
+        """
+        Close the client, and stop the background loop when the client started it.
+        """
+        if self._background.running:
+            self._background.run(self.client.close())
+        if self._owns_background:
+            self._background.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()